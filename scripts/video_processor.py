@@ -1,19 +1,22 @@
 import subprocess
 import os
 
-def convert_video_to_audio(video_path, audio_path):
+def convert_video_to_audio(video_path, audio_path, sample_rate=16000, bitrate='32k'):
+    """영상에서 음성 인식용 오디오(기본 16kHz 모노) 추출"""
     try:
         command = [
             'ffmpeg',
+            '-nostdin', '-y',
             '-i', video_path,
             '-vn',
+            '-ac', '1',
+            '-ar', str(sample_rate),
             '-acodec', 'libmp3lame',
-            '-ab', '192k',
-            '-ar', '44100',
+            '-ab', bitrate,
             audio_path
         ]
         subprocess.run(command, check=True)
         return True
     except Exception as e:
         print(f"Error converting video: {str(e)}")
-        return False 
\ No newline at end of file
+        return False
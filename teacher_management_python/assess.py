@@ -1,52 +1,320 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from prompt import TeachingPrompts
 from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
+from concurrent.futures import ThreadPoolExecutor
 import config as config
+from llm_cache import CachedChatModel
+from chunking import ChunkPlanner, count_tokens
+from patterns import default_engine
+from structured_output import StructuredOutputClient
+from checkpoint import RunCheckpoint, messages_hash
+from utterance_store import select_texts
+import tracing
+import asyncio
 import re
+import time
 from tqdm import tqdm
 
+# 청크 프롬프트에 수업 전체 컨텍스트를 넣는 방식
+CONTEXT_MODES = ("full", "summary", "local")
+
 class TeachingAssessor:
-    def __init__(self):
+    def __init__(self, max_concurrency: Optional[int] = None, context_mode: Optional[str] = None,
+                 fused: Optional[bool] = None):
         self.prompts = TeachingPrompts()
-        self.llm = ChatOpenAI(
+        self.llm = CachedChatModel(ChatOpenAI(
             api_key=config.OPENAI_API_KEY,
             model="gpt-4.1-2025-04-14", 
             temperature=0
-        )
+        ))
+        # JSON 스키마 검증 + 실패한 호출만 재시도
+        self.structured = StructuredOutputClient(self.llm)
+        # 동시에 평가할 최대 청크 수 (1이면 순차 실행)
+        if max_concurrency is None:
+            max_concurrency = config.ASSESS_MAX_CONCURRENCY
+        self.max_concurrency = max(1, max_concurrency)
+        self.chunk_timings: List[Dict] = []
+        self.chunk_planner = ChunkPlanner()
+        # full: 전체 지표·질적 분석을 청크마다 전송, summary: 토큰 한도가 있는 요약 블록, local: 청크 자체 지표
+        self.context_mode = context_mode or config.CHUNK_CONTEXT_MODE
+        if self.context_mode not in CONTEXT_MODES:
+            raise ValueError(f"지원하지 않는 컨텍스트 모드입니다: {self.context_mode}")
+        self.context_report: Dict = {}
+        # 질적 분석과 청크 평가를 청크당 한 번의 JSON 응답으로 함께 수행
+        self.fused = config.FUSED_CHUNK_ANALYSIS if fused is None else fused
+        # 지정 시 청크별 평가 결과를 저장하고 재실행 때 재사용
+        self.checkpoint: Optional[RunCheckpoint] = None
     
     def assess_teaching(self, processed_data: Dict) -> Dict:
         """교사 평가 수행"""
-        chunks = self._split_conversation_into_chunks(processed_data['대화_세션'])
-        chunk_assessments = []
-        
-        for chunk in tqdm(chunks, desc="청크 평가 진행률"):
-            # 기존 TeachingDataProcessor의 분석 결과 활용
-            chunk_data = {
-                "대화_세션": chunk,
-                "교사_발화": [msg for speaker, msg in chunk if speaker == "Teacher"],
-                "학생_발화": [msg for speaker, msg in chunk if speaker in ["Michael", "Abby"]],
+        chunk_data_list = self._plan_chunk_data(processed_data)
+        self.chunk_timings = []
+        
+        started = time.perf_counter()
+        if self.max_concurrency > 1:
+            # executor.map은 입력 순서대로 결과를 돌려주므로 청크 순서가 유지됨
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                chunk_assessments = list(tqdm(
+                    executor.map(tracing.in_current_span(self._assess_chunk_timed),
+                                 range(len(chunk_data_list)), chunk_data_list),
+                    total=len(chunk_data_list),
+                    desc="청크 평가 진행률"
+                ))
+        else:
+            chunk_assessments = [
+                self._assess_chunk_timed(index, chunk_data)
+                for index, chunk_data in enumerate(tqdm(chunk_data_list, desc="청크 평가 진행률"))
+            ]
+        self._report_chunk_timings(time.perf_counter() - started)
+        
+        return self.finalize_assessment(chunk_assessments, processed_data)
+    
+    async def assess_teaching_async(self, processed_data: Dict) -> Dict:
+        """교사 평가 수행 (비동기, 최대 max_concurrency개 청크 동시 평가)"""
+        chunk_assessments = await self.assess_chunks_async(processed_data)
+        return await asyncio.to_thread(self.finalize_assessment, chunk_assessments, processed_data)
+    
+    async def assess_chunks_async(self, processed_data: Dict,
+                                  semaphore: Optional[asyncio.Semaphore] = None) -> List[Dict]:
+        """청크별 평가만 비동기로 수행 (청크 순서 유지)
+        
+        Args:
+            processed_data: TeachingDataProcessor 처리 결과
+            semaphore: 다른 단계와 공유할 동시 호출 제한 (없으면 max_concurrency로 생성)
+        """
+        chunk_data_list = self._plan_chunk_data(processed_data)
+        self.chunk_timings = []
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(index: int, chunk_data: Dict) -> Dict:
+            async with semaphore:
+                return await self._assess_chunk_timed_async(index, chunk_data)
+        
+        started = time.perf_counter()
+        # gather는 입력 순서대로 결과를 돌려주므로 청크 순서가 유지됨
+        chunk_assessments = await asyncio.gather(*[
+            run(index, chunk_data) for index, chunk_data in enumerate(chunk_data_list)
+        ])
+        self._report_chunk_timings(time.perf_counter() - started)
+        return list(chunk_assessments)
+    
+    def finalize_assessment(self, chunk_assessments: List[Dict], processed_data: Dict) -> Dict:
+        """청크 평가 결과를 통합해 최종 점수 산출"""
+        if self.fused:
+            # 통합 분석에서 함께 받은 질적 분석을 청크 순서대로 누적
+            for assessment in chunk_assessments:
+                for category, items in assessment.get("질적_분석", {}).items():
+                    processed_data["질적_분석"].setdefault(category, []).extend(items)
+        result = self._generate_final_assessment(chunk_assessments, processed_data)
+        result["chunk_timings"] = self.chunk_timings
+        return result
+    
+    def _plan_chunk_data(self, processed_data: Dict) -> List[Dict]:
+        """토큰 예산에 맞춰 대화를 분할하고 청크별 평가 입력 데이터 구성"""
+        # 요약 블록은 강의당 한 번만 만들어 모든 청크가 공유
+        lecture_summary = None
+        if self.context_mode == "summary":
+            lecture_summary = self.prompts.build_lecture_summary(
+                processed_data, config.LECTURE_SUMMARY_MAX_TOKENS
+            )
+        
+        # 대화 외에 호출마다 반복되는 프롬프트(지표·질적 분석) 토큰 (절감량 비교용)
+        reserved_tokens = self._context_tokens(
+            self._build_chunk_data([], processed_data, lecture_summary)
+        )
+        chunks = self.chunk_planner.chunks(
+            processed_data['대화_세션'], reserved_tokens,
+            label="평가 청크", fixed_chunk_size=30, fixed_overlap=5
+        )
+        chunk_data_list = [
+            self._build_chunk_data(chunk, processed_data, lecture_summary) for chunk in chunks
+        ]
+        self._report_context_tokens(chunk_data_list, processed_data)
+        return chunk_data_list
+    
+    def _build_chunk_data(self, chunk: List[Tuple[str, str]], processed_data: Dict,
+                          lecture_summary: Optional[str] = None,
+                          context_mode: Optional[str] = None) -> Dict:
+        """청크 평가 입력 데이터 구성"""
+        context_mode = context_mode or self.context_mode
+        chunk_data = {
+            "대화_세션": chunk,
+            "교사_발화": select_texts(chunk, include=["Teacher"]),
+            "학생_발화": select_texts(chunk, include=["Michael", "Abby"])
+        }
+        if context_mode == "summary":
+            if lecture_summary is None:
+                lecture_summary = self.prompts.build_lecture_summary(
+                    processed_data, config.LECTURE_SUMMARY_MAX_TOKENS
+                )
+            chunk_data["lecture_summary"] = lecture_summary
+        elif context_mode == "local":
+            # 수업 전체 누적값 대신 이 청크의 발화만으로 계산한 지표
+            local = default_engine.analyze(chunk)
+            chunk_data["chunk_metrics"] = self.prompts.build_lecture_summary({
+                "교사_전략": {
+                    "스캐폴딩": local["스캐폴딩"],
+                    "질문_유형": local["질문_유형"]
+                },
+                "학생_참여": local["학생_참여"],
+                "피드백_분석": local["피드백_분석"]
+            }, config.LECTURE_SUMMARY_MAX_TOKENS)
+        else:
+            # 기존 TeachingDataProcessor의 분석 결과 전체를 그대로 활용
+            chunk_data.update({
                 "핵심_지표": processed_data["핵심_지표"],
                 "교사_전략": processed_data["교사_전략"],
                 "학생_참여": processed_data["학생_참여"],
                 "피드백_분석": processed_data["피드백_분석"],
                 "질적_분석": processed_data["질적_분석"]
-            }
-            
-            assessment_result = self._assess_chunk(chunk_data)
-            chunk_assessments.append(assessment_result)
-        
-        return self._generate_final_assessment(chunk_assessments, processed_data)
+            })
+        return chunk_data
+    
+    def _context_tokens(self, chunk_data: Dict) -> int:
+        """청크 프롬프트에서 대화 내용을 제외한 부분(시스템 프롬프트·컨텍스트)의 토큰 수"""
+        return (
+            count_tokens(self.prompts.SCORING_SYSTEM_PROMPT)
+            + count_tokens(self.prompts.get_assessment_prompt(dict(chunk_data, 대화_세션=[])))
+        )
+    
+    def _report_context_tokens(self, chunk_data_list: List[Dict], processed_data: Dict):
+        """현재 컨텍스트 모드와 full 모드의 청크 프롬프트 컨텍스트 토큰 비교 출력"""
+        if self.context_mode == "summary":
+            # 모든 청크가 같은 요약 블록을 사용하므로 한 번만 계산
+            per_chunk = self._context_tokens(chunk_data_list[0]) if chunk_data_list else 0
+            context_tokens = per_chunk * len(chunk_data_list)
+        else:
+            context_tokens = sum(self._context_tokens(chunk_data) for chunk_data in chunk_data_list)
+        full_tokens = self._context_tokens(
+            self._build_chunk_data([], processed_data, context_mode="full")
+        ) * len(chunk_data_list)
+        reduction = (1 - context_tokens / full_tokens) * 100 if full_tokens else 0.0
+        self.context_report = {
+            "모드": self.context_mode,
+            "청크_수": len(chunk_data_list),
+            "컨텍스트_토큰": context_tokens,
+            "full_컨텍스트_토큰": full_tokens,
+            "절감률": round(reduction, 1)
+        }
+        print(
+            f"청크 컨텍스트({self.context_mode}): {len(chunk_data_list)}개 청크, "
+            f"{context_tokens} 토큰 (full 모드 {full_tokens} 토큰 대비 {reduction:.1f}% 절감)"
+        )
     
     def _assess_chunk(self, chunk_data: Dict) -> Dict:
         """개별 청크 평가"""
-        assessment_prompt = self.prompts.get_assessment_prompt(chunk_data)
-        response = self.llm.invoke([
+        if self.fused:
+            data = self.structured.invoke(
+                self._fused_messages(chunk_data), self.prompts.FUSED_CHUNK_SCHEMA,
+                "chunk_analysis", fallback=self._parse_fused_fallback
+            )
+            return self._to_chunk_result(data)
+        
+        data = self.structured.invoke(
+            self._assessment_messages(chunk_data), self.prompts.ASSESSMENT_SCHEMA,
+            "chunk_assessment", fallback=self._parse_assessment_result
+        )
+        return self._to_chunk_result(data)
+    
+    async def _assess_chunk_async(self, chunk_data: Dict) -> Dict:
+        """개별 청크 평가 (비동기)"""
+        if self.fused:
+            data = await self.structured.ainvoke(
+                self._fused_messages(chunk_data), self.prompts.FUSED_CHUNK_SCHEMA,
+                "chunk_analysis", fallback=self._parse_fused_fallback
+            )
+            return self._to_chunk_result(data)
+        
+        data = await self.structured.ainvoke(
+            self._assessment_messages(chunk_data), self.prompts.ASSESSMENT_SCHEMA,
+            "chunk_assessment", fallback=self._parse_assessment_result
+        )
+        return self._to_chunk_result(data)
+    
+    def _assessment_messages(self, chunk_data: Dict) -> List:
+        """청크 평가 요청 메시지 구성"""
+        return [
             SystemMessage(content=self.prompts.SCORING_SYSTEM_PROMPT),
-            HumanMessage(content=assessment_prompt)
-        ])
+            HumanMessage(content=self.prompts.get_assessment_prompt(chunk_data))
+        ]
+    
+    def _fused_messages(self, chunk_data: Dict) -> List:
+        """통합 청크 분석 요청 메시지 구성"""
+        return [
+            SystemMessage(content=self.prompts.FUSED_SYSTEM_PROMPT),
+            HumanMessage(content=self.prompts.get_fused_analysis_prompt(chunk_data))
+        ]
+    
+    def _assess_chunk_timed(self, index: int, chunk_data: Dict) -> Dict:
+        """청크 평가 + 소요 시간 기록 (체크포인트에 결과가 있으면 재사용)"""
+        started = time.perf_counter()
+        kind, chunk_hash = self._chunk_checkpoint_key(chunk_data)
+        with tracing.span("청크 평가", "chunk", index=index, 발화_수=len(chunk_data["대화_세션"])) as span:
+            result = self._load_chunk_checkpoint(kind, index, chunk_hash)
+            if span is not None:
+                span.attributes["체크포인트"] = result is not None
+            if result is None:
+                result = self._assess_chunk(chunk_data)
+                self._save_chunk_checkpoint(kind, index, chunk_hash, result)
+        self._record_chunk_timing(index, chunk_data, time.perf_counter() - started)
+        return result
+    
+    async def _assess_chunk_timed_async(self, index: int, chunk_data: Dict) -> Dict:
+        """청크 평가 + 소요 시간 기록 (비동기, 체크포인트에 결과가 있으면 재사용)"""
+        started = time.perf_counter()
+        kind, chunk_hash = self._chunk_checkpoint_key(chunk_data)
+        with tracing.span("청크 평가", "chunk", index=index, 발화_수=len(chunk_data["대화_세션"])) as span:
+            result = self._load_chunk_checkpoint(kind, index, chunk_hash)
+            if span is not None:
+                span.attributes["체크포인트"] = result is not None
+            if result is None:
+                result = await self._assess_chunk_async(chunk_data)
+                self._save_chunk_checkpoint(kind, index, chunk_hash, result)
+        self._record_chunk_timing(index, chunk_data, time.perf_counter() - started)
+        return result
+    
+    def _chunk_checkpoint_key(self, chunk_data: Dict) -> Tuple[str, Optional[str]]:
+        """청크 체크포인트 종류와 요청 내용 해시 (체크포인트 미사용 시 해시 None)"""
+        if self.fused:
+            kind, messages = "chunk_analysis", self._fused_messages
+        else:
+            kind, messages = "chunk_assessment", self._assessment_messages
+        if self.checkpoint is None:
+            return kind, None
+        return kind, messages_hash(kind, messages(chunk_data))
+    
+    def _load_chunk_checkpoint(self, kind: str, index: int, chunk_hash: Optional[str]) -> Optional[Dict]:
+        if self.checkpoint is None:
+            return None
+        return self.checkpoint.load_chunk(kind, index, chunk_hash)
+    
+    def _save_chunk_checkpoint(self, kind: str, index: int, chunk_hash: Optional[str], result: Dict):
+        if self.checkpoint is not None:
+            self.checkpoint.save_chunk(kind, index, chunk_hash, result)
+    
+    def _record_chunk_timing(self, index: int, chunk_data: Dict, elapsed: float):
+        self.chunk_timings.append({
+            "청크": index,
+            "발화_수": len(chunk_data["대화_세션"]),
+            "소요_시간": round(elapsed, 3)
+        })
+    
+    def _report_chunk_timings(self, wall_time: float):
+        """청크별 소요 시간 및 병렬 처리 효과 출력"""
+        # 완료 순서로 쌓인 기록을 청크 순서로 정렬
+        self.chunk_timings.sort(key=lambda timing: timing["청크"])
+        total_time = sum(timing["소요_시간"] for timing in self.chunk_timings)
+        speedup = total_time / wall_time if wall_time > 0 else 1.0
         
-        return self._parse_assessment_result(response.content)
+        for timing in self.chunk_timings:
+            print(f"청크 {timing['청크']}: {timing['발화_수']}개 발화, {timing['소요_시간']:.2f}초")
+        print(
+            f"청크 평가 완료: {len(self.chunk_timings)}개 청크, "
+            f"누적 {total_time:.2f}초 / 실제 {wall_time:.2f}초 "
+            f"(동시성 {self.max_concurrency}, {speedup:.1f}배)"
+        )
     
     def _generate_final_assessment(self, chunk_assessments: List[Dict], processed_data: Dict) -> Dict:
         """최종 평가 결과 생성"""
@@ -58,7 +326,8 @@ class TeachingAssessor:
             processed_data["핵심_지표"]
         )
         
-        scores = self._generate_scores(scores_prompt)
+        with tracing.span("점수 산출", "chunk"):
+            scores = self._generate_scores(scores_prompt)
         
         return {
             "scores": scores,
@@ -68,7 +337,7 @@ class TeachingAssessor:
         }
 
     def _split_conversation_into_chunks(self, conversation, chunk_size=30, overlap=5):
-        """대화를 청크로 분할
+        """대화를 고정 발화 수 단위 청크로 분할 (토큰 예산 분할 도입 전 방식)
         
         Args:
             conversation: 전체 대화 목록
@@ -146,13 +415,9 @@ class TeachingAssessor:
         """평가 내용을 바탕으로 점수 산출"""
         scores_prompt = f"""
 다음 교사의 수업 평가 내용을 바탕으로 각 영역별 점수를 산출해주세요.
-반드시 아래와 같은 형식으로만 응답해주세요:
+반드시 아래와 같은 JSON 형식으로만 응답해주세요:
 
-학생 참여: [숫자]
-개념 설명: [숫자]
-피드백: [숫자]
-체계성: [숫자]
-상호작용: [숫자]
+{{"학생_참여": 숫자, "개념_설명": 숫자, "피드백": 숫자, "체계성": 숫자, "상호작용": 숫자}}
 
 평가 내용:
 {detailed_eval}
@@ -166,13 +431,13 @@ class TeachingAssessor:
 각 항목은 0-20점 사이의 정수로 평가해주세요.
 다른 설명은 일체 하지 말고, 오직 위 형식의 점수만 응답해주세요.
 """
-        response = self.llm.invoke([
+        scores = self.structured.invoke([
             SystemMessage(content="당신은 매우 엄격한 교육 평가 전문가입니다."),
             HumanMessage(content=scores_prompt)
-        ])
+        ], self.prompts.SCORES_SCHEMA, "scores", fallback=self._parse_scores)
         
-        print("GPT 응답:", response.content)  # 디버깅용 로그
-        return self._parse_scores(response.content)
+        print("GPT 응답:", scores)  # 디버깅용 로그
+        return scores
     
     def _parse_assessment_result(self, response: str) -> Dict:
         """GPT-4의 평가 응답을 파싱"""
@@ -211,6 +476,28 @@ class TeachingAssessor:
         
         return parsed_result
     
+    @staticmethod
+    def _to_chunk_result(data: Dict) -> Dict:
+        """검증된 청크 평가(또는 통합 분석) 응답을 병합 단계 형식으로 변환"""
+        result = {
+            "세부_평가": data["세부_평가"],
+            "우수점": list(data["우수점"]),
+            "개선점": list(data["개선점"]),
+            "총점": 0
+        }
+        if "질적_분석" in data:
+            result["질적_분석"] = data["질적_분석"]
+        elif "교사_전문성" in data:
+            result["질적_분석"] = {
+                category: list(data[category])
+                for category in ("교사_전문성", "수업_담화", "학습_환경")
+            }
+        return result
+    
+    def _parse_fused_fallback(self, response: str) -> Dict:
+        """통합 분석 응답 검증 실패 시 기존 평가 텍스트 파서로 해석 (질적 분석은 비움)"""
+        return dict(self._parse_assessment_result(response), 질적_분석={})
+    
     def _parse_scores(self, response: str) -> dict:
         """GPT-4의 점수 평가 응답을 파싱"""
         scores = {
@@ -221,27 +508,26 @@ class TeachingAssessor:
             "상호작용": 0
         }
         
+        labels = {
+            '학생 참여': '학생_참여',
+            '개념 설명': '개념_설명',
+            '피드백': '피드백',
+            '체계성': '체계성',
+            '상호작용': '상호작용'
+        }
+        
         lines = response.split('\n')
         for line in lines:
-            try:
-                # 숫자만 추출
-                digits = ''.join(filter(str.isdigit, line))
-                
-                # 숫자가 있는 경우에만 처리
-                if digits:
-                    if '학생 참여' in line:
-                        scores['학생_참여'] = int(digits)
-                    elif '개념 설명' in line:
-                        scores['개념_설명'] = int(digits)
-                    elif '피드백' in line:
-                        scores['피드백'] = int(digits)
-                    elif '체계성' in line:
-                        scores['체계성'] = int(digits)
-                    elif '상호작용' in line:
-                        scores['상호작용'] = int(digits)
-            except ValueError as e:
-                print(f"Warning: 점수 파싱 중 오류 발생 (라인: {line})")
-                continue
+            for label, key in labels.items():
+                if label in line or key in line:
+                    # 항목명 뒤의 첫 번째 숫자만 점수로 사용 ("17/20" → 17, 앞의 번호 무시)
+                    after_label = re.split(re.escape(label) + '|' + re.escape(key), line, maxsplit=1)[1]
+                    number = re.search(r'\d+', after_label)
+                    if number:
+                        scores[key] = int(number.group())
+                    else:
+                        print(f"Warning: 점수 파싱 중 오류 발생 (라인: {line})")
+                    break
         
         # 모든 점수가 0인 경우 로그 출력
         if sum(scores.values()) == 0:
@@ -0,0 +1,197 @@
+"""여러 강의 전사본 일괄 처리
+
+전사본 디렉토리 또는 매니페스트를 받아 강의를 프로세스 풀에 분배한다.
+전사본 파싱·패턴 분석 같은 CPU 작업은 워커 프로세스별로 병렬 실행되고,
+각 워커 안에서는 강의의 LLM 호출이 asyncio로 동시에 진행된다.
+
+사용법:
+    python batch.py <전사본 디렉토리 | 매니페스트(.txt/.json)> [--output-dir DIR]
+                    [--workers N] [--concurrency N] [--resume]
+
+디렉토리는 하위의 '화자: 발화' 전사본(.txt)과 AssemblyAI transcript.json을 모두 처리한다.
+
+매니페스트 형식:
+    .txt  한 줄에 전사본 경로 하나 (빈 줄, #으로 시작하는 줄 무시)
+    .json 경로 문자열 또는 {"input": 경로, "output": 리포트 경로, "teacher": 교사 ID, "report_id": 리포트 ID} 목록
+    상대 경로는 매니페스트 파일 위치 기준
+
+교사 ID가 있는 강의(매니페스트의 teacher, 리포트 디렉토리의 transcript.json)는 최종 점수가
+교사별 누적 프로필(teacher_profiles.py)에 반영된다. 리포트 디렉토리의 transcript.json은 리포트 색인과
+같은 키(시각 디렉토리 이름)를 리포트 ID로 써서 rebuild_from_index와 중복 반영되지 않는다.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+import argparse
+import hashlib
+import json
+import os
+import time
+import traceback
+import config as config
+from blob_store import iter_artifacts
+
+def _resolve(path: str, base_dir: str) -> str:
+    return os.path.normpath(path if os.path.isabs(path) else os.path.join(base_dir, path))
+
+def _job_name(input_file: str) -> str:
+    """출력·체크포인트 이름 (다른 디렉토리의 같은 파일명과 겹치지 않도록 경로 해시 부여)"""
+    stem = os.path.splitext(os.path.basename(input_file))[0]
+    if stem == "transcript":
+        # public/reports/<교사>/<시각>/transcript.json은 디렉토리 이름으로 구분
+        stem = os.path.basename(os.path.dirname(os.path.abspath(input_file)))
+    digest = hashlib.sha1(os.path.abspath(input_file).encode("utf-8")).hexdigest()[:8]
+    return f"{stem}-{digest}"
+
+def collect_jobs(source: str, output_dir: str) -> List[Dict]:
+    """디렉토리(하위 .txt·transcript.json 전체) 또는 매니페스트에서 처리할 강의 목록 구성"""
+    entries = []
+    if os.path.isdir(source):
+        for root, directories, files in os.walk(source):
+            # 저장소 디렉토리(.blobs 등) 제외
+            directories[:] = [entry for entry in directories if not entry.startswith(".")]
+            for name in sorted(files):
+                if name.endswith(".txt"):
+                    entries.append({"input": os.path.join(root, name)})
+        # transcript.json은 저장소로 옮겨져 manifest만 남은 경우도 포함
+        # public/reports/<교사>/<시각>/transcript.json은 교사 ID·리포트 ID를 경로에서 얻음
+        entries.extend(
+            {
+                "input": path,
+                "teacher": os.path.basename(os.path.dirname(os.path.dirname(path))),
+                "report_id": os.path.basename(os.path.dirname(path))
+            }
+            for path in iter_artifacts(source, "transcript.json")
+        )
+        entries.sort(key=lambda entry: entry["input"])
+    else:
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding="utf-8-sig") as f:
+            if source.endswith(".json"):
+                items = json.load(f)
+            else:
+                items = [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+        for item in items:
+            entry = {"input": item} if isinstance(item, str) else dict(item)
+            entry["input"] = _resolve(entry["input"], base_dir)
+            if entry.get("output"):
+                entry["output"] = _resolve(entry["output"], base_dir)
+            entries.append(entry)
+
+    jobs = []
+    for entry in entries:
+        name = _job_name(entry["input"])
+        jobs.append({
+            "name": name,
+            "input": entry["input"],
+            "output": entry.get("output") or os.path.join(output_dir, f"{name}_report.md"),
+            "log": os.path.join(output_dir, "logs", f"{name}.log"),
+            "run_dir": os.path.join(config.CHECKPOINT_DIR, name),
+            "teacher": entry.get("teacher"),
+            "report_id": entry.get("report_id")
+        })
+    return jobs
+
+def _run_job(job: Dict, resume: bool, max_concurrency: Optional[int]) -> Dict:
+    """워커 프로세스에서 강의 1건 처리 (로그는 강의별 파일로, 실패는 결과로 반환)"""
+    # 워커 프로세스에서 처음 import되도록 함수 안에서 불러옴
+    from main_pipe import run_lecture
+
+    os.makedirs(os.path.dirname(job["log"]), exist_ok=True)
+    started = time.perf_counter()
+    with open(job["log"], "w", encoding="utf-8") as log, redirect_stdout(log):
+        try:
+            stats = run_lecture(
+                job["input"], job["output"], run_dir=job["run_dir"], resume=resume,
+                max_concurrency=max_concurrency, verbose=False,
+                teacher=job.get("teacher"), report_id=job.get("report_id")
+            )
+            return dict(stats, name=job["name"], status="completed")
+        except Exception as e:
+            traceback.print_exc(file=log)
+            return {
+                "name": job["name"],
+                "input": job["input"],
+                "status": "failed",
+                "error": f"{type(e).__name__}: {e}",
+                "소요_시간": time.perf_counter() - started,
+                "LLM_호출": 0
+            }
+
+def run_batch(jobs: List[Dict], workers: Optional[int] = None, max_concurrency: Optional[int] = None,
+              resume: bool = False) -> Dict:
+    """강의 목록을 프로세스 풀로 처리하고 집계 결과 반환"""
+    workers = max(1, min(workers or config.BATCH_WORKERS, len(jobs) or 1))
+    results = []
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_run_job, job, resume, max_concurrency): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # 워커 프로세스 자체가 비정상 종료된 경우
+                result = {"name": job["name"], "input": job["input"], "status": "failed",
+                          "error": f"{type(e).__name__}: {e}", "소요_시간": 0.0, "LLM_호출": 0}
+            results.append(result)
+            status = "완료" if result["status"] == "completed" else f"실패 ({result['error']})"
+            print(f"[{done}/{len(jobs)}] {result['name']}: {status}, {result['소요_시간']:.1f}초")
+
+    summary = summarize(results, time.perf_counter() - started, workers)
+    print_summary(summary)
+    return summary
+
+def summarize(results: List[Dict], wall_time: float, workers: int) -> Dict:
+    completed = [result for result in results if result["status"] == "completed"]
+    failed = [result for result in results if result["status"] != "completed"]
+    llm_calls = sum(result["LLM_호출"] for result in results)
+    return {
+        "강의_수": len(results),
+        "완료": len(completed),
+        "실패": len(failed),
+        "워커_수": workers,
+        "소요_시간": wall_time,
+        "강의_시간당": len(completed) / wall_time * 3600 if wall_time > 0 else 0.0,
+        "LLM_호출": llm_calls,
+        "초당_호출": llm_calls / wall_time if wall_time > 0 else 0.0,
+        "비용": sum(result.get("비용", 0.0) for result in results),
+        "실패_목록": [{"input": result["input"], "error": result["error"]} for result in failed],
+        "결과": sorted(results, key=lambda result: result["input"])
+    }
+
+def print_summary(summary: Dict):
+    print(
+        f"일괄 처리 완료: {summary['완료']}/{summary['강의_수']}개 강의 "
+        f"(실패 {summary['실패']}), 워커 {summary['워커_수']}개, {summary['소요_시간']:.1f}초"
+    )
+    print(
+        f"처리량: 시간당 {summary['강의_시간당']:.1f}개 강의, "
+        f"LLM 호출 {summary['LLM_호출']}회 (초당 {summary['초당_호출']:.2f}회), 비용 ${summary['비용']:.4f}"
+    )
+    for failure in summary["실패_목록"]:
+        print(f"  실패: {failure['input']} - {failure['error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="강의 전사본 일괄 분석")
+    parser.add_argument("source", help="전사본 디렉토리 또는 매니페스트(.txt/.json)")
+    parser.add_argument("--output-dir", default=None, help="리포트·로그 저장 디렉토리")
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수")
+    parser.add_argument("--concurrency", type=int, default=None, help="강의당 동시 LLM 호출 수")
+    parser.add_argument("--resume", action="store_true", help="이전 실행의 체크포인트 재사용")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "reports"
+    )
+    jobs = collect_jobs(args.source, output_dir)
+    if not jobs:
+        print(f"처리할 전사본이 없습니다: {args.source}")
+        return
+    summary = run_batch(jobs, args.workers, args.concurrency, args.resume or config.PIPELINE_RESUME)
+    if summary["실패"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
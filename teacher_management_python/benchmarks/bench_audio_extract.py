@@ -0,0 +1,69 @@
+"""전사용 오디오 추출 벤치마크: 이전 2회 인코딩 방식 vs 16kHz 모노 단일 인코딩
+
+이전 방식: 영상 → 고음질 MP3(-q:a 0) → 10분 청크로 다시 디코딩·인코딩(pydub 기본값, 44.1kHz 스테레오)
+새 방식:   영상 → 16kHz 모노 청크 (ffmpeg segment muxer, 1회 디코딩·인코딩)
+
+사용법: python benchmarks/bench_audio_extract.py <영상 경로> [청크 길이(분), 기본 10]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_transcript import convert_mp4_to_mp3, iter_speech_segments, probe_duration
+
+def run_legacy(video_path: str, work_dir: str, chunk_duration: int):
+    started = time.perf_counter()
+    mp3_path = os.path.join(work_dir, "output.mp3")
+    if not convert_mp4_to_mp3(video_path, mp3_path):
+        raise RuntimeError("MP3 변환 실패")
+    duration = probe_duration(mp3_path) or 0.0
+    chunk_seconds = chunk_duration * 60
+    chunk_bytes = 0
+    for index, start in enumerate(range(0, int(duration) + 1, chunk_seconds)):
+        if start >= duration:
+            break
+        chunk_path = os.path.join(work_dir, f"chunk_{index}.mp3")
+        subprocess.run(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-ss", str(start), "-t", str(chunk_seconds),
+             "-i", mp3_path, "-ar", "44100", "-ac", "2", "-c:a", "libmp3lame", chunk_path],
+            check=True
+        )
+        chunk_bytes += os.path.getsize(chunk_path)
+    return time.perf_counter() - started, chunk_bytes
+
+def run_single(video_path: str, work_dir: str, chunk_duration: int):
+    stats = {}
+    for _ in iter_speech_segments(video_path, chunk_duration, work_dir, stats=stats):
+        pass
+    return stats["encode_seconds"], stats["bytes"]
+
+def main(video_path: str, chunk_duration: int):
+    duration = probe_duration(video_path)
+    print(f"영상: {video_path} ({(duration or 0) / 60:.1f}분)")
+    results = {}
+    for name, run in (("이전 방식", run_legacy), ("단일 인코딩", run_single)):
+        work_dir = tempfile.mkdtemp(prefix="bench-audio-")
+        try:
+            results[name] = run(video_path, work_dir, chunk_duration)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        seconds, size = results[name]
+        print(f"{name:<10} 인코딩 {seconds:>7.1f}초, 전송 {size / 1e6:>8.1f}MB")
+
+    (legacy_seconds, legacy_bytes), (single_seconds, single_bytes) = results.values()
+    print(
+        f"절감: 인코딩 {legacy_seconds - single_seconds:.1f}초, "
+        f"전송 {(legacy_bytes - single_bytes) / 1e6:.1f}MB "
+        f"({1 - single_bytes / legacy_bytes:.0%})" if legacy_bytes else "절감: 비교 불가"
+    )
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10)
@@ -0,0 +1,84 @@
+"""청크 프롬프트 컨텍스트 모드별 토큰 비교 (LLM 호출 없음)
+
+보관된 강의 중 발화가 가장 많은 강의의 transcript.json으로 청크 평가 프롬프트를 구성하고
+full / summary / local 모드의 프롬프트 토큰을 비교한다.
+질적 분석은 LLM 없이 채울 수 없으므로 질적 분석 청크마다 카테고리별 3건의 예시 문장으로 근사한다.
+
+사용법: python benchmarks/bench_context.py [강의 수 (기본 3)]
+"""
+import glob
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config as config
+from assess import CONTEXT_MODES, TeachingAssessor
+from data_processing import TeachingDataProcessor
+
+QUALITATIVE_SAMPLE = "교사가 학생의 답변을 다시 질문으로 연결하여 개념 이해를 점검하고, 오개념을 구체적인 예시로 교정함"
+
+def load_utterances(path: str):
+    with open(path, encoding="utf-8-sig") as f:
+        return json.load(f).get("utterances") or []
+
+def to_transcript_text(utterances) -> str:
+    """발화량이 가장 많은 화자를 교사로 보고 '화자: 발화' 형식 텍스트로 변환"""
+    volume = {}
+    for utterance in utterances:
+        volume[utterance["speaker"]] = volume.get(utterance["speaker"], 0) + len(utterance["text"])
+    teacher = max(volume, key=volume.get)
+    return "\n".join(
+        f"{'Teacher' if utterance['speaker'] == teacher else 'Student'}: {utterance['text']}"
+        for utterance in utterances
+    )
+
+def build_processed_data(path: str):
+    # transcript.json을 텍스트로 변환하지 않고 발화 시각까지 그대로 읽음
+    processor = TeachingDataProcessor.from_assemblyai_json(path)
+    with redirect_stdout(io.StringIO()):
+        processor.extract_conversations()
+        processor.analyze_patterns()
+        chunk_count = len(processor.chunk_conversations())
+    for items in processor.processed_data["질적_분석"].values():
+        items.extend([QUALITATIVE_SAMPLE] * 3 * chunk_count)
+    return processor.processed_data
+
+def main(limit: int):
+    # 같은 영상을 다시 분석한 강의는 전사 내용이 같으므로 한 번만 포함
+    lectures, seen = [], set()
+    for path in glob.glob(os.path.join(config.REPORTS_DIR, "*", "*", "transcript.json")):
+        utterances = load_utterances(path)
+        text = to_transcript_text(utterances) if utterances else ""
+        if text and text not in seen:
+            seen.add(text)
+            lectures.append((len(utterances), path))
+    lectures = sorted(lectures, reverse=True)[:limit]
+    if not lectures:
+        print(f"{config.REPORTS_DIR}에서 transcript.json을 찾을 수 없습니다")
+        return
+
+    print(f"{'강의':<40} {'발화':>6} {'청크':>5} " + " ".join(f"{mode:>10}" for mode in CONTEXT_MODES))
+    for count, path in lectures:
+        processed_data = build_processed_data(path)
+        totals = {}
+        for mode in CONTEXT_MODES:
+            assessor = TeachingAssessor(context_mode=mode)
+            with redirect_stdout(io.StringIO()):
+                chunk_data_list = assessor._plan_chunk_data(processed_data)
+            conversation_tokens = sum(
+                span.tokens for span in assessor.chunk_planner.plan(processed_data["대화_세션"])
+            )
+            totals[mode] = assessor.context_report["컨텍스트_토큰"] + conversation_tokens
+        label = os.path.relpath(os.path.dirname(path), config.REPORTS_DIR)
+        print(
+            f"{label:<40} {count:>6} {len(chunk_data_list):>5} "
+            + " ".join(f"{totals[mode]:>10}" for mode in CONTEXT_MODES)
+        )
+    print("(값은 강의 전체 청크 평가 프롬프트의 입력 토큰 합계)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,61 @@
+"""패턴 분석 벤치마크: 기존 3단계 분석 vs 단일 패스 패턴 엔진
+
+대화 세션은 extract_conversations/set_conversations와 같이 UtteranceStore로 넣고,
+양쪽 모두 REPEAT번 실행한 최소 시간을 비교한다.
+
+사용법: python benchmarks/bench_patterns.py [발화 수 ...]
+"""
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_processing import TeachingDataProcessor
+from patterns import default_engine
+from utterance_store import UtteranceStore
+from benchmarks.synthetic import generate_conversations
+
+RESULT_KEYS = ["교사_전략", "학생_참여", "피드백_분석", "수업_주제"]
+# 측정 잡음을 줄이기 위해 반복 실행 중 최소 시간 사용
+REPEAT = 5
+
+def run_legacy(processor: TeachingDataProcessor) -> float:
+    started = time.perf_counter()
+    processor.analyze_teaching_patterns()
+    processor.analyze_feedback_patterns()
+    processor.extract_subjects()
+    return time.perf_counter() - started
+
+def run_engine(processor: TeachingDataProcessor) -> float:
+    started = time.perf_counter()
+    default_engine.apply(processor.processed_data)
+    return time.perf_counter() - started
+
+def measure(run, processor: TeachingDataProcessor, template: dict, conversations, repeat: int):
+    """빈 분석 결과에서 repeat번 실행한 최소 시간과 마지막 실행 결과"""
+    best = float("inf")
+    for _ in range(repeat):
+        processor.processed_data = copy.deepcopy(template)
+        processor.processed_data["대화_세션"] = conversations
+        best = min(best, run(processor))
+    return best, {key: processor.processed_data[key] for key in RESULT_KEYS}
+
+def main(sizes, repeat: int = REPEAT):
+    processor = TeachingDataProcessor("")
+    template = copy.deepcopy(processor.processed_data)
+
+    print(f"{'발화 수':>10} {'기존(초)':>10} {'엔진(초)':>10} {'배속':>8}")
+    for size in sizes:
+        conversations = UtteranceStore(generate_conversations(size))
+        legacy_time, legacy_result = measure(run_legacy, processor, template, conversations, repeat)
+        engine_time, engine_result = measure(run_engine, processor, template, conversations, repeat)
+
+        if legacy_result != engine_result:
+            raise AssertionError(f"{size}개 발화에서 기존 분석과 엔진 결과가 다릅니다")
+
+        print(f"{size:>10,} {legacy_time:>10.3f} {engine_time:>10.3f} {legacy_time / engine_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000])
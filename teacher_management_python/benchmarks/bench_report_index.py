@@ -0,0 +1,59 @@
+"""리포트 점수 조회 벤치마크: analysis.json 전체 읽기 vs ReportIndex
+
+요청마다 public/reports를 걸으며 analysis.json을 모두 파싱하는 기존 방식과,
+임시 인덱스를 만든 뒤 (1) 변경 없는 증분 갱신 (2) 교사별 요약 (3) 전체 요약 조회 시간을 비교한다.
+
+사용법: python benchmarks/bench_report_index.py [반복 횟수 (기본 20)]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config as config
+from report_index import ReportIndex, parse_analysis
+
+def scan_json(reports_dir: str):
+    """기존 방식: 모든 analysis.json을 읽어 교사별 총점 평균 계산"""
+    totals = {}
+    for teacher in os.scandir(reports_dir):
+        if not teacher.is_dir():
+            continue
+        for report in os.scandir(teacher.path):
+            path = os.path.join(report.path, "analysis.json")
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8-sig") as f:
+                scores = parse_analysis(json.load(f))["scores"]
+            if scores:
+                totals.setdefault(teacher.name, []).append(sum(scores.values()))
+    return {teacher: sum(values) / len(values) for teacher, values in totals.items()}
+
+def timed(function, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    reports_dir = config.REPORTS_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ReportIndex(os.path.join(tmp, "report_index.sqlite3"), reports_dir)
+        started = time.perf_counter()
+        built = index.update()
+        build_ms = (time.perf_counter() - started) * 1000
+        teacher = max(index.teachers(), key=lambda name: index.teacher_summary(name)["리포트_수"])
+
+        print(f"리포트 {built['scanned']}개, 인덱스 최초 생성 {build_ms:.1f}ms")
+        print(f"{'JSON 전체 읽기':<20} {timed(lambda: scan_json(reports_dir), repeat):>8.2f}ms")
+        print(f"{'증분 갱신 (변경 없음)':<20} {timed(index.update, repeat):>8.2f}ms")
+        print(f"{'교사별 요약':<20} {timed(lambda: index.teacher_summary(teacher), repeat):>8.2f}ms  ({teacher})")
+        print(f"{'전체·교사별 요약':<20} {timed(index.cohort_summary, repeat):>8.2f}ms")
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""화자 역할 판별 벤치마크: 기존 발화별 반복 vs 특징 행렬 분류기
+
+보관된 강의의 transcript.json(AssemblyAI 화자 라벨)으로 두 방식의 교사 판별이 같은지 확인하고,
+합성 발화(발화 수 × 화자 수)로 처리 시간을 비교한다.
+
+사용법: python benchmarks/bench_speaker_roles.py [발화 수 ...]
+"""
+import glob
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config as config
+from speaker_roles import TEACHER_PATTERNS, default_classifier
+
+SAMPLE_TEXTS = (
+    "Let's look at the next question, can anyone explain why?",
+    "I think it is three.",
+    "Remember when we talked about fractions? Everyone, please look at the board.",
+    "Yes.",
+    "Does anyone understand what happens if we divide by two?",
+    "Can I ask a question?"
+)
+
+def legacy_teacher(utterances):
+    """기존 _analyze_speaker_patterns의 교사 판별 (발화마다 패턴 13개 부분 일치)"""
+    stats = {}
+    for utterance in utterances:
+        entry = stats.setdefault(utterance.speaker, [0, 0, 0])
+        entry[0] += 1
+        entry[1] += len(utterance.text)
+        for pattern in TEACHER_PATTERNS:
+            if pattern in utterance.text.lower():
+                entry[2] += 1
+    return max(stats, key=lambda speaker: stats[speaker][2] * 2 + stats[speaker][1] / stats[speaker][0] * 0.5
+               + stats[speaker][0] * 0.3)
+
+def synthetic(count: int, speaker_count: int):
+    rng = random.Random(count)
+    speakers = [chr(ord("A") + index % 26) + str(index // 26) for index in range(speaker_count)]
+    return [
+        SimpleNamespace(speaker=rng.choice(speakers), text=rng.choice(SAMPLE_TEXTS))
+        for _ in range(count)
+    ]
+
+def check_archived():
+    lectures = agree = 0
+    for path in glob.glob(os.path.join(config.REPORTS_DIR, "*", "*", "transcript.json")):
+        with open(path, encoding="utf-8-sig") as f:
+            utterances = [SimpleNamespace(**u) for u in json.load(f).get("utterances") or []]
+        if not utterances:
+            continue
+        roles = default_classifier.classify([u.speaker for u in utterances], [u.text for u in utterances])
+        teacher = next(role.speaker for role in roles.values() if role.role == "Teacher")
+        lectures += 1
+        agree += teacher == legacy_teacher(utterances)
+    print(f"보관 강의 {lectures}건 중 {agree}건에서 기존 방식과 같은 교사 판별")
+
+def main(sizes):
+    check_archived()
+    print(f"{'발화':>8} {'화자':>5} {'기존(ms)':>10} {'분류기(ms)':>11} {'배속':>6}")
+    for size in sizes:
+        for speaker_count in (3, 50):
+            utterances = synthetic(size, speaker_count)
+            started = time.perf_counter()
+            legacy_teacher(utterances)
+            legacy = time.perf_counter() - started
+            started = time.perf_counter()
+            default_classifier.classify([u.speaker for u in utterances], [u.text for u in utterances])
+            vectorized = time.perf_counter() - started
+            print(f"{size:>8} {speaker_count:>5} {legacy * 1000:>10.1f} {vectorized * 1000:>11.1f} "
+                  f"{legacy / vectorized:>5.1f}x")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
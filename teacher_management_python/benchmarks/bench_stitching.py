@@ -0,0 +1,94 @@
+"""청크 간 화자 이어붙이기 정확도 (LLM·API 호출 없음)
+
+보관된 강의 transcript.json을 10분 단위 청크로 나누고, 청크마다 화자 라벨을 섞고 시간을
+0부터 다시 시작하게 만든 뒤 SpeakerStitcher로 다시 합친다. 원래 화자와 같은 전역 화자로
+배정된 발화 비율과, 청크별로 따로 교사를 고르던 기존 방식 대비 교사/학생 역할 일치율을 비교한다.
+
+사용법: python benchmarks/bench_stitching.py [청크 길이(분), 기본 10]
+"""
+import glob
+import json
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config as config
+from speaker_roles import default_classifier
+from speaker_stitching import SpeakerStitcher
+
+def split_chunks(utterances, chunk_ms, rng):
+    """발화 시작 시각 기준으로 청크 분할 후 청크별 라벨 섞기·시간 초기화"""
+    chunks = {}
+    for utterance in utterances:
+        chunks.setdefault(int(utterance["start"] // chunk_ms), []).append(utterance)
+    result = []
+    for index in sorted(chunks):
+        speakers = sorted({utterance["speaker"] for utterance in chunks[index]})
+        shuffled = dict(zip(speakers, rng.sample("ABCDEFGH"[:max(len(speakers), 3)], len(speakers))))
+        offset = index * chunk_ms
+        result.append((offset, [
+            {"speaker": shuffled[u["speaker"]], "text": u["text"],
+             "start": u["start"] - offset, "end": u["end"] - offset, "original": u["speaker"]}
+            for u in chunks[index]
+        ]))
+    return result
+
+def role_map(speakers, texts):
+    return {label: role.role for label, role in default_classifier.classify(speakers, texts).items()}
+
+def main(chunk_minutes: int):
+    rng = random.Random(0)
+    totals = Counter()
+    seen = set()
+    for path in sorted(glob.glob(os.path.join(config.REPORTS_DIR, "*", "*", "transcript.json"))):
+        with open(path, encoding="utf-8-sig") as f:
+            utterances = [u for u in json.load(f).get("utterances") or [] if u.get("text")]
+        key = tuple(u["text"] for u in utterances[:20])
+        if not utterances or key in seen:
+            continue
+        seen.add(key)
+        chunks = split_chunks(utterances, chunk_minutes * 60 * 1000, rng)
+        if len(chunks) < 2:
+            continue
+
+        stitcher = SpeakerStitcher(max_speakers=3)
+        originals = []
+        naive_roles = []
+        for offset, chunk in chunks:
+            stitcher.add_chunk(chunk, offset)
+            originals.extend(u["original"] for u in chunk)
+            roles = role_map([u["speaker"] for u in chunk], [u["text"] for u in chunk])
+            naive_roles.extend(roles[u["speaker"]] for u in chunk)
+
+        # 전역 화자마다 가장 많이 겹치는 원래 화자로 대응시켜 정확도 계산
+        pairs = Counter(zip((u["speaker"] for u in stitcher.utterances), originals))
+        best = {}
+        for (stitched, original), count in pairs.most_common():
+            best.setdefault(stitched, original)
+        correct = sum(count for (stitched, original), count in pairs.items() if best[stitched] == original)
+
+        reference = role_map([u["speaker"] for u in utterances], [u["text"] for u in utterances])
+        truth = [reference[original] for original in originals]
+        stitched_roles = [u["role"] for u in stitcher.labelled()]
+        totals["강의"] += 1
+        totals["발화"] += len(originals)
+        totals["화자_일치"] += correct
+        totals["역할_일치_이어붙임"] += sum(a == b for a, b in zip(stitched_roles, truth))
+        totals["역할_일치_청크별"] += sum(a == b for a, b in zip(naive_roles, truth))
+        totals["전역_화자"] += len(stitcher.speakers)
+        totals["원래_화자"] += len(set(originals))
+
+    if not totals["강의"]:
+        print(f"{config.REPORTS_DIR}에서 여러 청크로 나뉘는 transcript.json을 찾을 수 없습니다")
+        return
+    print(f"강의 {totals['강의']}건, 발화 {totals['발화']}개 ({chunk_minutes}분 청크)")
+    print(f"화자 일치율: {totals['화자_일치'] / totals['발화']:.1%} "
+          f"(전역 화자 {totals['전역_화자']}명 / 원래 화자 {totals['원래_화자']}명)")
+    print(f"교사/학생 역할 일치율: 이어붙임 {totals['역할_일치_이어붙임'] / totals['발화']:.1%}, "
+          f"청크별 판별 {totals['역할_일치_청크별'] / totals['발화']:.1%}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
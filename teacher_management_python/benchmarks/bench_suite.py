@@ -0,0 +1,222 @@
+"""CPU 측 주요 경로 벤치마크 모음 (합성 전사본, LLM 없음)
+
+발화 수별로 합성 전사본(텍스트, AssemblyAI transcript.json)을 만들어 전처리·패턴 분석·청크 분할·
+응답 파싱·청크 병합·리포트 생성 함수의 시간(반복 중 최솟값)과 tracemalloc 최대 메모리를 잰다.
+LLM은 synthetic.StubChatModel로 바꿔 네트워크 호출이 일어나지 않으며, 파서에는 청크 수만큼의
+합성 응답 텍스트를 넣는다.
+
+결과는 benchmarks/baseline.json의 기준값과 비교해 시간이 --time-tolerance, 메모리가
+--memory-tolerance보다 많이 늘면 회귀로 표시하고 종료 코드 1을 반환한다. 시간이 회귀로 보이면
+--confirm 횟수만큼 다시 재서 그중 최솟값으로 판정한다 (측정 잡음 오탐 방지).
+기준값은 같은 기계에서 --update로 갱신한다 (실행한 발화 수의 값만 덮어씀).
+
+사용법: python benchmarks/bench_suite.py [--sizes 1000 10000 100000 1000000] [--only 이름]
+                                         [--repeat N] [--update] [--baseline 경로]
+"""
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 프로세서·평가기 생성에 API 키가 필요하지만 호출은 모두 StubChatModel로 대체
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from assess import TeachingAssessor
+from data_processing import TeachingDataProcessor
+from report import generate_fancy_report
+from structured_output import StructuredOutputClient
+from utterance_store import UtteranceStore
+from benchmarks.synthetic import (
+    StubChatModel, chunk_assessment_response, iter_conversations, qualitative_analysis_response,
+    scores_response, write_assemblyai_json, write_transcript_text
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+# 이보다 작은 차이는 측정 잡음으로 보고 회귀로 표시하지 않음
+MIN_TIME_DELTA = 0.002
+MIN_MEMORY_DELTA = 64 * 1024
+
+def _stubbed(target):
+    """LLM 호출을 고정 응답 모델로 대체"""
+    target.llm = StubChatModel()
+    target.structured = StructuredOutputClient(target.llm)
+    return target
+
+class Workload:
+    """발화 수 하나에 대한 입력 (파일·대화 세션·합성 LLM 응답)"""
+    def __init__(self, size: int, directory: str, words: bool = False):
+        self.size = size
+        self.text_path = write_transcript_text(os.path.join(directory, f"transcript_{size}.txt"), size)
+        self.json_path = write_assemblyai_json(os.path.join(directory, f"transcript_{size}.json"), size, words=words)
+        self.conversations = UtteranceStore(iter_conversations(size))
+        self.processor = _stubbed(TeachingDataProcessor(""))
+        self.assessor = _stubbed(TeachingAssessor())
+        self.template = copy.deepcopy(self.processor.processed_data)
+
+        # 고정 발화 수 청크(30개, 5개 중복)마다 LLM 응답 하나씩
+        chunk_count = len(self.assessor._split_conversation_into_chunks(self.conversations))
+        rng = random.Random(size)
+        self.assessment_responses = [chunk_assessment_response(rng) for _ in range(chunk_count)]
+        self.analysis_responses = [qualitative_analysis_response(rng) for _ in range(chunk_count)]
+        self.scores_responses = [scores_response(rng) for _ in range(chunk_count)]
+        self.chunk_assessments = [self.assessor._parse_assessment_result(text) for text in self.assessment_responses]
+        merged = self.assessor._merge_chunk_assessments(self.chunk_assessments)
+        qualitative = {"교사_전문성": [], "수업_담화": [], "학습_환경": []}
+        for text in self.analysis_responses:
+            for category, items in self.processor._parse_llm_analysis(text).items():
+                qualitative[category].extend(items)
+        self.assessment_result = {
+            "scores": self.assessor._parse_scores(self.scores_responses[0]),
+            "우수점": merged["우수점"],
+            "개선점": merged["개선점"],
+            "질적_분석": qualitative
+        }
+
+    def fresh_processor(self) -> TeachingDataProcessor:
+        """대화 세션만 채운 빈 분석 결과 (분석 함수는 결과를 누적하므로 실행마다 새로 만듦)"""
+        self.processor.processed_data = copy.deepcopy(self.template)
+        self.processor.processed_data["대화_세션"] = self.conversations
+        return self.processor
+
+def _extract(workload: Workload, path: str) -> Callable[[], Any]:
+    processor = workload.processor
+    processor.processed_data = copy.deepcopy(workload.template)
+    processor.source = path
+    return processor.extract_conversations
+
+def _parse_all(parse: Callable[[str], Any], responses: List[str]) -> Callable[[], Any]:
+    return lambda: [parse(text) for text in responses]
+
+# 이름 → 실행마다 호출할 함수를 준비하는 함수 (준비 시간은 재지 않음)
+CASES: Dict[str, Callable[[Workload], Callable[[], Any]]] = {
+    "extract_conversations[text]": lambda w: _extract(w, w.text_path),
+    "extract_conversations[json]": lambda w: _extract(w, w.json_path),
+    "analyze_teaching_patterns": lambda w: w.fresh_processor().analyze_teaching_patterns,
+    "analyze_feedback_patterns": lambda w: w.fresh_processor().analyze_feedback_patterns,
+    "extract_subjects": lambda w: w.fresh_processor().extract_subjects,
+    "analyze_patterns": lambda w: w.fresh_processor().analyze_patterns,
+    "_split_conversation_into_chunks": lambda w: lambda: w.assessor._split_conversation_into_chunks(w.conversations),
+    "_parse_assessment_result": lambda w: _parse_all(w.assessor._parse_assessment_result, w.assessment_responses),
+    "_parse_scores": lambda w: _parse_all(w.assessor._parse_scores, w.scores_responses),
+    "_parse_llm_analysis": lambda w: _parse_all(w.processor._parse_llm_analysis, w.analysis_responses),
+    "_merge_chunk_assessments": lambda w: lambda: w.assessor._merge_chunk_assessments(w.chunk_assessments),
+    "generate_fancy_report": lambda w: lambda: generate_fancy_report(w.assessment_result)
+}
+
+def measure(prepare: Callable[[], Callable[[], Any]], repeat: int) -> Dict[str, float]:
+    """반복 실행 중 최소 시간과 (별도 1회 실행의) tracemalloc 최대 메모리 증가량"""
+    best = float("inf")
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for _ in range(repeat):
+            run = prepare()
+            started = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - started)
+        run = prepare()
+        tracemalloc.start()
+        current = tracemalloc.get_traced_memory()[0]
+        run()
+        peak = tracemalloc.get_traced_memory()[1] - current
+        tracemalloc.stop()
+    return {"time": best, "peak": peak}
+
+def load_baseline(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {"results": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path: str, baseline: Dict, results: Dict[str, Dict[str, Dict]]):
+    for name, by_size in results.items():
+        baseline.setdefault("results", {}).setdefault(name, {}).update(by_size)
+    baseline["meta"] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "updated": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(current: Dict[str, float], base: Dict[str, float], time_tolerance: float,
+            memory_tolerance: float) -> List[str]:
+    """기준값 대비 회귀 항목 목록"""
+    regressions = []
+    if current["time"] - base["time"] > max(base["time"] * time_tolerance, MIN_TIME_DELTA):
+        regressions.append(f"시간 {current['time'] / base['time']:.2f}배")
+    if current["peak"] - base["peak"] > max(base["peak"] * memory_tolerance, MIN_MEMORY_DELTA):
+        regressions.append(f"메모리 {current['peak'] / max(base['peak'], 1):.2f}배")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU 측 주요 경로 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="발화 수 목록")
+    parser.add_argument("--only", nargs="+", default=None, help="이름에 이 문자열이 들어간 벤치마크만 실행")
+    parser.add_argument("--repeat", type=int, default=5, help="시간 측정 반복 횟수 (10만 발화 초과는 1회)")
+    parser.add_argument("--words", action="store_true", help="transcript.json 발화마다 단어별 시각 포함")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준값 파일")
+    parser.add_argument("--update", action="store_true", help="이번 결과로 기준값 갱신")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="허용 시간 증가율")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="허용 메모리 증가율")
+    parser.add_argument("--confirm", type=int, default=2, help="회귀로 보일 때 다시 측정하는 횟수")
+    args = parser.parse_args()
+
+    cases = {
+        name: case for name, case in CASES.items()
+        if not args.only or any(part in name for part in args.only)
+    }
+    baseline = load_baseline(args.baseline)
+    results: Dict[str, Dict[str, Dict]] = {}
+    regressions = []
+
+    print(f"{'벤치마크':<32} {'발화 수':>10} {'시간(ms)':>10} {'메모리(MB)':>11} {'기준 대비':>10}  상태")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                workload = Workload(size, directory, words=args.words)
+            repeat = args.repeat if size <= 100_000 else 1
+            for name, case in cases.items():
+                current = measure(lambda: case(workload), repeat)
+                results.setdefault(name, {})[str(size)] = current
+                base = baseline.get("results", {}).get(name, {}).get(str(size))
+                status, ratio = "기준 없음", ""
+                if base:
+                    found = compare(current, base, args.time_tolerance, args.memory_tolerance)
+                    # 시간 측정 잡음으로 인한 오탐을 줄이기 위해 회귀로 보이면 다시 재서 최솟값 사용
+                    for _ in range(args.confirm if found else 0):
+                        current["time"] = min(current["time"], measure(lambda: case(workload), repeat)["time"])
+                        found = compare(current, base, args.time_tolerance, args.memory_tolerance)
+                        if not found:
+                            break
+                    ratio = f"{current['time'] / base['time']:.2f}x" if base["time"] else ""
+                    status = f"회귀 ({', '.join(found)})" if found else "통과"
+                    if found:
+                        regressions.append(f"{name} [{size:,}]: {', '.join(found)}")
+                print(
+                    f"{name:<32} {size:>10,} {current['time'] * 1000:>10.2f} "
+                    f"{current['peak'] / 1e6:>11.2f} {ratio:>10}  {status}"
+                )
+            del workload
+
+    if args.update:
+        save_baseline(args.baseline, baseline, results)
+        print(f"기준값 저장: {args.baseline}")
+        return
+    if regressions:
+        print(f"회귀 {len(regressions)}건:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""단어 사이드카 벤치마크: json.load vs 메모리 맵 WordIndex
+
+보관된 transcript.json마다 임시 사이드카를 만들고, 새 프로세스에서 각 방식으로
+(1) 파일 열기 (2) 30초 구간 단어 조회 (3) 발화 1건 + 단어 조회를 수행해 시간과
+최대 RSS 증가량을 비교한다.
+
+사용법: python benchmarks/bench_word_index.py [강의 수 (기본 10)]
+"""
+import glob
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import config as config
+from word_index import WordIndex, build_word_index
+
+def run_json(transcript_path: str, start_ms: int, utterance_index: int):
+    with open(transcript_path, encoding="utf-8-sig") as f:
+        transcript = json.load(f)
+    words = [w for w in transcript["words"] if w["end"] > start_ms and w["start"] < start_ms + 30000]
+    utterance = transcript["utterances"][utterance_index]
+    return transcript, (len(words), len(utterance["words"]))
+
+def run_index(sidecar: str, start_ms: int, utterance_index: int):
+    index = WordIndex(sidecar)
+    words = index.words_between(start_ms, start_ms + 30000)
+    utterance = index.utterance(utterance_index, with_words=True)
+    return index, (len(words), len(utterance["words"]))
+
+def current_rss_kb() -> int:
+    """현재 RSS (Linux는 /proc, 그 외에는 최대 RSS로 대체)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def child(mode: str, path: str, start_ms: int, utterance_index: int):
+    """새 프로세스에서 한 방식만 실행하고 (초, RSS 증가 KB) 출력"""
+    rss_before = current_rss_kb()
+    started = time.perf_counter()
+    loaded, result = (run_json if mode == "json" else run_index)(path, start_ms, utterance_index)
+    elapsed = time.perf_counter() - started
+    # 불러온 데이터가 살아 있는 상태에서 측정
+    rss_after = current_rss_kb()
+    del loaded
+    print(json.dumps({"seconds": elapsed, "rss_kb": rss_after - rss_before, "result": list(result)}))
+
+def measure(mode: str, path: str, start_ms: int, utterance_index: int):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, path, str(start_ms), str(utterance_index)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+def main(limit: int):
+    paths = sorted(glob.glob(os.path.join(config.REPORTS_DIR, "*", "*", "transcript.json")),
+                   key=os.path.getsize, reverse=True)[:limit]
+    if not paths:
+        print(f"{config.REPORTS_DIR}에서 transcript.json을 찾을 수 없습니다")
+        return
+    work_dir = tempfile.mkdtemp(prefix="bench-words-")
+    totals = {"json": [0.0, 0], "index": [0.0, 0]}
+    try:
+        print(f"{'파일(MB)':>8} {'사이드카(MB)':>11} {'json(ms)':>9} {'index(ms)':>10} {'json RSS(MB)':>13} {'index RSS(MB)':>14}")
+        for number, path in enumerate(paths):
+            sidecar = build_word_index(path, os.path.join(work_dir, f"{number}.words.bin"))
+            index = WordIndex(sidecar)
+            start_ms = int(index.audio_duration or 0) * 500  # 강의 중간 지점
+            utterance_index = index.utterance_count // 2
+            json_run = measure("json", path, start_ms, utterance_index)
+            index_run = measure("index", sidecar, start_ms, utterance_index)
+            assert json_run["result"] == index_run["result"]
+            for mode, run in (("json", json_run), ("index", index_run)):
+                totals[mode][0] += run["seconds"]
+                totals[mode][1] += run["rss_kb"]
+            print(
+                f"{os.path.getsize(path) / 1e6:>8.2f} {os.path.getsize(sidecar) / 1e6:>11.2f} "
+                f"{json_run['seconds'] * 1000:>9.1f} {index_run['seconds'] * 1000:>10.2f} "
+                f"{json_run['rss_kb'] / 1024:>13.1f} {index_run['rss_kb'] / 1024:>14.1f}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    count = len(paths)
+    print(
+        f"평균: json {totals['json'][0] / count * 1000:.1f}ms / {totals['json'][1] / count / 1024:.1f}MB, "
+        f"index {totals['index'][0] / count * 1000:.2f}ms / {totals['index'][1] / count / 1024:.1f}MB"
+    )
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
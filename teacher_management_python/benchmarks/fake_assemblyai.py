@@ -0,0 +1,266 @@
+"""AssemblyAI 전사 API 로컬 대체 서버 (API 키·네트워크 없이 청크 동시 전사 확인용)
+
+/v2/upload, /v2/transcript, /v2/transcript/<id>만 흉내 낸다. 전사는 요청마다 무작위 시간
+(--min-latency ~ --max-latency초) 뒤에 완료되므로 나중에 올린 청크가 먼저 끝날 수 있다.
+업로드 내용이 짧은 텍스트(예: "chunk-3")면 그 텍스트를, 아니면 업로드 순번을 발화에 넣는다.
+
+서버만 실행한 뒤 AAI_BASE_URL로 연결:
+    python benchmarks/fake_assemblyai.py [--port 8765]
+    AAI_BASE_URL=http://127.0.0.1:8765 python text_transcript.py ...
+
+--demo는 서버를 띄우고 text_transcript.main()을 가짜 청크 파일로 실행한다 (ffmpeg 분할만 대체).
+전사 완료 순서가 뒤섞여도 transcript.txt에 청크 순서대로 추가되는지, "Progress: N"이 완료된
+청크 수를 따라가는지 확인한다.
+
+사용법: python benchmarks/fake_assemblyai.py [--port N] [--min-latency 초] [--max-latency 초]
+                                            [--seed N] [--demo] [--chunks N]
+"""
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+import argparse
+import io
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeAssemblyAI(ThreadingHTTPServer):
+    """업로드·전사 요청을 메모리에 보관하고 무작위 지연 뒤 완료로 응답하는 서버"""
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), min_latency: float = 0.2, max_latency: float = 1.5,
+                 seed: Optional[int] = None):
+        super().__init__(address, _Handler)
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.uploads: Dict[str, str] = {}        # 업로드 URL → 발화에 넣을 이름
+        self.transcripts: Dict[str, Dict] = {}
+        self.completed: List[str] = []           # 완료로 처음 응답한 순서 (발화에 넣은 이름)
+        self._ids = itertools.count(1)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def latency(self, scale: float = 1.0) -> float:
+        with self.lock:
+            return self.rng.uniform(self.min_latency, self.max_latency) * scale
+
+    def upload(self, content: bytes) -> str:
+        with self.lock:
+            number = next(self._ids)
+        try:
+            text = content.decode("ascii").strip()
+        except UnicodeDecodeError:
+            text = ""
+        url = f"{self.base_url}/files/{number}"
+        with self.lock:
+            self.uploads[url] = text if 0 < len(text) <= 64 else f"upload-{number}"
+        return url
+
+    def create(self, request: Dict) -> Dict:
+        ready_at = time.monotonic() + self.latency()
+        with self.lock:
+            transcript_id = f"fake-{next(self._ids)}"
+            self.transcripts[transcript_id] = {
+                "id": transcript_id,
+                "audio_url": request.get("audio_url"),
+                "label": self.uploads.get(request.get("audio_url"), transcript_id),
+                "request": request,
+                "ready_at": ready_at,
+                "reported": False
+            }
+        return self.response(transcript_id)
+
+    def response(self, transcript_id: str) -> Optional[Dict]:
+        with self.lock:
+            transcript = self.transcripts.get(transcript_id)
+            if transcript is None:
+                return None
+            done = time.monotonic() >= transcript["ready_at"]
+            if done and not transcript["reported"]:
+                transcript["reported"] = True
+                self.completed.append(transcript["label"])
+        body = dict(
+            transcript["request"], id=transcript["id"], audio_url=transcript["audio_url"],
+            status="completed" if done else "processing", error=None, language_code="en"
+        )
+        if done:
+            body["utterances"] = _utterances(transcript["label"])
+            body["text"] = " ".join(utterance["text"] for utterance in body["utterances"])
+            body["words"] = [word for utterance in body["utterances"] for word in utterance["words"]]
+            body["audio_duration"] = body["utterances"][-1]["end"] // 1000
+        return body
+
+def _utterances(label: str) -> List[Dict]:
+    """교사(A)·학생(B) 대화 몇 턴 (청크 안 기준 ms)"""
+    turns = [
+        ("A", f"Let's break this down, {label}. What is a fraction?", 0, 4000),
+        ("B", f"I think it is half of the pizza, {label}?", 4500, 7000),
+        ("A", f"Good, excellent. Can you explain why, {label}?", 7500, 10000)
+    ]
+    return [
+        {"speaker": speaker, "text": text, "start": start, "end": end, "confidence": 0.9, "words": []}
+        for speaker, text, start, end in turns
+    ]
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeAssemblyAI
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict):
+        # 응답마다 작은 무작위 지연 (네트워크 왕복 흉내)
+        time.sleep(self.server.latency(0.05))
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(parts)
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == "/v2/upload":
+            self._send(200, {"upload_url": self.server.upload(body)})
+        elif self.path == "/v2/transcript":
+            self._send(200, self.server.create(json.loads(body or b"{}")))
+        else:
+            self._send(404, {"error": f"알 수 없는 경로: {self.path}"})
+
+    def do_GET(self):
+        match = re.fullmatch(r"/v2/transcript/([\w-]+)", self.path)
+        response = self.server.response(match.group(1)) if match else None
+        if response is None:
+            self._send(404, {"error": f"전사를 찾을 수 없음: {self.path}"})
+        else:
+            self._send(200, response)
+
+def start_server(port: int = 0, min_latency: float = 0.2, max_latency: float = 1.5,
+                 seed: Optional[int] = None) -> FakeAssemblyAI:
+    """백그라운드 스레드에서 서버 시작 (port=0이면 빈 포트)"""
+    server = FakeAssemblyAI(("127.0.0.1", port), min_latency, max_latency, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_demo(server: FakeAssemblyAI, chunks: int) -> bool:
+    """가짜 청크로 text_transcript.main() 실행 후 기록 순서·진행률 확인"""
+    import assemblyai as aai
+    import text_transcript
+
+    text_transcript.AAI_BASE_URL = server.base_url
+    aai.settings.polling_interval = 0.05
+    appended: List[List[str]] = []
+    write_transcript = text_transcript.write_transcript
+
+    def recording_write(transcript_file, utterances, append=False):
+        if append:
+            appended.append([re.search(r"chunk-\d+", utterance["text"]).group(0) for utterance in utterances])
+        return write_transcript(transcript_file, utterances, append)
+
+    def fake_segments(video_path, chunk_duration=10, output_dir=None, stats=None):
+        # ffmpeg 분할 대신 청크 이름만 담은 작은 파일 (서버가 발화에 그대로 넣음)
+        for index in range(chunks):
+            path = os.path.join(output_dir, f"chunk_{index}.mp3")
+            with open(path, "wb") as f:
+                f.write(f"chunk-{index}".encode("ascii"))
+            if stats is not None:
+                stats.update(segments=index + 1, bytes=stats.get("bytes", 0) + os.path.getsize(path),
+                             encode_seconds=0.0)
+            yield text_transcript.AudioChunk(path, index * chunk_duration * 60, (index + 1) * chunk_duration * 60)
+
+    originals = {
+        name: getattr(text_transcript, name)
+        for name in ("write_transcript", "iter_speech_segments", "probe_duration")
+    }
+    text_transcript.write_transcript = recording_write
+    text_transcript.iter_speech_segments = fake_segments
+    text_transcript.probe_duration = lambda path: chunks * 600.0
+    output = io.StringIO()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            video_path = os.path.join(directory, "lecture.mp4")
+            open(video_path, "wb").close()
+            with redirect_stdout(output):
+                result = text_transcript.main(video_path, "demo")
+            with open(result["transcript_path"], encoding="utf-8") as f:
+                written = re.findall(r"chunk-\d+", f.read())
+    finally:
+        for name, original in originals.items():
+            setattr(text_transcript, name, original)
+
+    expected = [f"chunk-{index}" for index in range(chunks)]
+    append_order = [labels[0] for labels in appended]
+    file_order = list(dict.fromkeys(written))
+    progress = [int(value) for value in re.findall(r"^Progress: (\d+)$", output.getvalue(), re.M)]
+    # 10, 40 다음부터 완료된 청크마다 하나씩, 마지막은 100
+    chunk_progress = progress[2:-1]
+    expected_progress = [int(40 + (completed / chunks * 50)) for completed in range(1, chunks + 1)]
+
+    print(f"전사 완료 순서:   {', '.join(server.completed)}")
+    print(f"transcript.txt 추가 순서: {', '.join(append_order)}")
+    print(f"transcript.txt 최종 순서: {', '.join(file_order)}")
+    print(f"Progress: {', '.join(map(str, progress))}")
+    checks = {
+        "완료 순서가 청크 순서와 다름 (지연 무작위)": server.completed != expected,
+        "추가 순서 = 청크 순서": append_order == expected,
+        "최종 파일 순서 = 청크 순서": file_order == expected,
+        "청크 완료마다 Progress 1회 (완료 청크 수 기준)": chunk_progress == expected_progress
+    }
+    for name, passed in checks.items():
+        print(f"  {'통과' if passed else '실패'}: {name}")
+    # 완료 순서가 우연히 청크 순서와 같을 수 있으므로 그 항목은 판정에서 제외
+    return all(passed for name, passed in checks.items() if "완료 순서" not in name)
+
+def main():
+    parser = argparse.ArgumentParser(description="AssemblyAI 전사 API 로컬 대체 서버")
+    parser.add_argument("--port", type=int, default=8765, help="포트 (--demo는 빈 포트 사용)")
+    parser.add_argument("--min-latency", type=float, default=0.2, help="전사 완료까지 최소 지연(초)")
+    parser.add_argument("--max-latency", type=float, default=1.5, help="전사 완료까지 최대 지연(초)")
+    parser.add_argument("--seed", type=int, default=None, help="지연 난수 시드")
+    parser.add_argument("--demo", action="store_true", help="text_transcript.main()으로 순서·진행률 확인")
+    parser.add_argument("--chunks", type=int, default=8, help="--demo 청크 수")
+    args = parser.parse_args()
+
+    if args.demo:
+        server = start_server(0, args.min_latency, args.max_latency, args.seed)
+        try:
+            sys.exit(0 if run_demo(server, args.chunks) else 1)
+        finally:
+            server.shutdown()
+
+    server = FakeAssemblyAI(("127.0.0.1", args.port), args.min_latency, args.max_latency, args.seed)
+    print(f"대체 서버 실행 중: AAI_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""벤치마크용 합성 수업 데이터
+
+    generate_conversations       (화자, 발화) 목록
+    write_transcript_text        'Teacher: ...' / 'Student: ...' 전사본 텍스트 파일
+    write_assemblyai_json        AssemblyAI transcript.json 형식 파일 (화자 A=교사, B/C=학생)
+    StubChatModel                LLM 대신 고정 응답을 돌려주는 모델 (invoke/ainvoke)
+    *_response                   청크 평가·질적 분석·점수 응답 텍스트 (파서 벤치마크용)
+
+파일은 발화 하나씩 써서 100만 발화도 메모리에 전체 문서를 만들지 않는다.
+"""
+from typing import Iterator, List, Tuple
+import json
+import random
+from langchain.schema import AIMessage
+
+# 패턴 규칙에 일치하는 문장과 일치하지 않는 문장을 섞어 실제 수업과 비슷한 밀도로 구성
+TEACHER_LINES = [
+    "Let's break this down into smaller steps before we move on.",
+    "What is the denominator when we cut the pizza into eight slices?",
+    "Good, that's right. Now look at the next problem on the board.",
+    "Try drawing the pumpkin instead and count the pieces again.",
+    "Remember when we learned how to multiply fractions last week?",
+    "Can you explain why you chose to divide here?",
+    "Why do you think the answer gets smaller when we divide by a fraction?",
+    "Think about what happens if we add another equal part.",
+    "Okay everyone, please write the equation in your notebook.",
+    "자, 이제 분모를 같게 만들어 볼게요. 12를 60으로 바꾸려면 어떻게 해야 할까요?",
+    "잘했어요. 그래서 답을 얻을 수 있는 방법을 하나 더 생각해 봅시다.",
+]
+STUDENT_LINES = [
+    "I think it's six?",
+    "Is it a fraction?",
+    "I don't know.",
+    "We subtract the smaller one.",
+    "네",
+    "아, 나요.",
+    "그럼 5를 곱하면 되나요?",
+]
+STUDENT_NAMES = ["Student", "Michael", "Abby"]
+
+def generate_conversations(count: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """교사/학생 발화가 번갈아 나오는 합성 대화 세션"""
+    return list(iter_conversations(count, seed))
+
+# AssemblyAI 화자 라벨 (교사 1명, 학생 2명)
+ASSEMBLYAI_SPEAKERS = {"Teacher": "A", "Student": "B", "Michael": "B", "Abby": "C"}
+
+def iter_conversations(count: int, seed: int = 0) -> Iterator[Tuple[str, str]]:
+    """generate_conversations와 같은 대화를 목록 없이 하나씩 생성"""
+    rng = random.Random(seed)
+    for i in range(count):
+        if i % 2 == 0:
+            yield "Teacher", " ".join(rng.choice(TEACHER_LINES) for _ in range(rng.randint(1, 3)))
+        else:
+            yield rng.choice(STUDENT_NAMES), rng.choice(STUDENT_LINES)
+
+def write_transcript_text(path: str, count: int, seed: int = 0) -> str:
+    """'화자: 발화' 형식 전사본 파일 (학생 이름은 모두 Student)"""
+    with open(path, "w", encoding="utf-8") as f:
+        for speaker, text in iter_conversations(count, seed):
+            f.write(f"{'Teacher' if speaker == 'Teacher' else 'Student'}: {text}\n")
+    return path
+
+def write_assemblyai_json(path: str, count: int, seed: int = 0, words: bool = False) -> str:
+    """AssemblyAI transcript.json 형식 파일 (words=True면 발화마다 단어별 시각 포함)"""
+    position = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"id": "synthetic", "status": "completed", "utterances": [')
+        for i, (speaker, text) in enumerate(iter_conversations(count, seed)):
+            tokens = text.split()
+            start, end = position, position + 300 * len(tokens)
+            utterance = {
+                "speaker": ASSEMBLYAI_SPEAKERS[speaker],
+                "text": text,
+                "confidence": 0.95,
+                "start": start,
+                "end": end
+            }
+            if words:
+                utterance["words"] = [
+                    {"text": token, "start": start + 300 * j, "end": start + 300 * (j + 1),
+                     "confidence": 0.95, "speaker": utterance["speaker"]}
+                    for j, token in enumerate(tokens)
+                ]
+            f.write(("," if i else "") + json.dumps(utterance, ensure_ascii=False))
+            position = end + 200
+        f.write(f'], "audio_duration": {position // 1000}}}')
+    return path
+
+def chunk_assessment_response(rng: random.Random) -> str:
+    """청크 평가 응답 텍스트 (TeachingAssessor._parse_assessment_result 형식)"""
+    areas = ["피드백", "개념 설명", "수업 체계성", "상호작용", "학생 참여", "질문"]
+    lines = ["세부 평가"]
+    lines += [f"교사는 {rng.choice(areas)} 측면에서 분수 개념을 단계적으로 다루었다." for _ in range(4)]
+    lines.append("특히 우수한 부분")
+    lines += [f"- {rng.choice(areas)}: 학생의 답을 바탕으로 다음 질문을 이어감 {rng.randint(1, 50)}" for _ in range(3)]
+    lines.append("개선이 필요한 부분")
+    lines += [f"- {rng.choice(areas)} 과정에서 학생의 사고를 더 기다려 줄 필요 {rng.randint(1, 50)}" for _ in range(3)]
+    return "\n".join(lines)
+
+def qualitative_analysis_response(rng: random.Random) -> str:
+    """질적 분석 응답 텍스트 (TeachingDataProcessor._parse_llm_analysis 형식)"""
+    lines = []
+    for section in ("교사 전문성", "수업 담화", "학습 환경"):
+        lines.append(f"{section}:")
+        lines += [f"- {section} 관련 관찰 {rng.randint(1, 100)}" for _ in range(3)]
+    return "\n".join(lines)
+
+def scores_response(rng: random.Random) -> str:
+    """점수 응답 텍스트 (TeachingAssessor._parse_scores 형식)"""
+    labels = ("학생 참여", "개념 설명", "피드백", "체계성", "상호작용")
+    return "\n".join(f"{i}. {label}: {rng.randint(8, 19)}/20" for i, label in enumerate(labels, 1))
+
+class StubChatModel:
+    """네트워크 없이 고정 응답을 돌려주는 LLM (CachedChatModel 자리에 사용)"""
+    def __init__(self, content: str = "{}", model_name: str = "stub"):
+        self.content = content
+        self.model_name = model_name
+        self.temperature = 0
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        return AIMessage(content=self.content)
+
+    async def ainvoke(self, messages, **kwargs):
+        return self.invoke(messages, **kwargs)
@@ -0,0 +1,295 @@
+"""리포트 산출물 내용 주소 기반(content-addressed) 압축 저장소
+
+public/reports/<교사>/<시각>/transcript.json(약 1.6MB)은 같은 영상을 다시 분석할 때마다
+통째로 복사되며, 복사본끼리는 id·audio_url 등 몇 줄만 다르다. 파일 전체 해시로는 중복이
+잡히지 않으므로 파일을 줄 경계에서 내용 기준으로 자른 청크(content-defined chunk) 단위로
+SHA-256 주소를 매겨 압축 저장하고, 리포트 디렉토리에는 청크 목록만 담은 작은 manifest.json을 둔다.
+청크 경계는 줄 내용의 해시로 정해지므로 앞부분이 달라져도 뒤쪽 청크는 그대로 재사용된다.
+
+    <저장소>/<해시 앞 2자리>/<해시>.<코덱>     압축된 청크 (쓰기는 임시 파일 + os.replace)
+    <리포트 디렉토리>/manifest.json            {"version": 1, "files": {이름: {sha256, size, codec, chunks}}}
+
+read_artifact()는 원본 파일이 있으면 그대로, 없으면 manifest로 청크를 모아 압축을 풀어 돌려준다.
+artifact_exists/artifact_mtime/artifact_sha256도 원본이 없으면 manifest 항목을 본다 (일괄 처리 작업 탐색,
+단어 색인 갱신 판단, 파이프라인 체크포인트 입력 해시).
+
+사용법: python blob_store.py [--apply] [--reports-dir DIR] [--store DIR] [--name transcript.json ...]
+    기본은 절감량만 계산하는 dry-run이며, --apply를 주면 청크·manifest를 쓰고 원본을 지운다.
+    웹 앱(src/app)은 아직 transcript.json을 직접 읽으므로 --apply는 보관용 리포트 트리에만 사용한다.
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import hashlib
+import json
+import lzma
+import os
+import time
+import zlib
+import config as config
+from checkpoint import file_hash
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+# 마이그레이션 기본 대상 (analysis.json 등 작은 파일은 원본 유지)
+DEFAULT_ARTIFACTS = ("transcript.json",)
+
+# 코덱 이름 → (압축, 해제)
+CODECS: Dict[str, Tuple[Callable[[bytes, int], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress)
+}
+
+# 청크 경계: 최소 크기를 넘긴 뒤 줄 해시의 하위 비트가 0인 줄에서 자름 (평균 약 CHUNK_MASK+1줄)
+CHUNK_MASK = (1 << 8) - 1
+CHUNK_MIN_BYTES = 8 * 1024
+CHUNK_MAX_BYTES = 256 * 1024
+
+def content_chunks(data: bytes, mask: int = CHUNK_MASK, min_size: int = CHUNK_MIN_BYTES,
+                   max_size: int = CHUNK_MAX_BYTES) -> List[memoryview]:
+    """줄 경계 기준 내용 정의 청크 (줄바꿈이 없는 데이터는 max_size마다 자름)"""
+    view = memoryview(data)
+    chunks = []
+    start = position = 0
+    while position < len(data):
+        newline = data.find(b"\n", position, start + max_size)
+        end = newline + 1 if newline >= 0 else min(len(data), start + max_size)
+        line = view[position:end]
+        position = end
+        size = position - start
+        if (size >= min_size and zlib.crc32(line) & mask == 0) or size >= max_size or position >= len(data):
+            chunks.append(view[start:position])
+            start = position
+    return chunks
+
+def _atomic_write(path: str, data: bytes):
+    """임시 파일에 쓰고 fsync 후 교체 (중간에 실패해도 기존 파일 유지)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class BlobStore:
+    """SHA-256 주소 기반 압축 청크 저장소"""
+    def __init__(self, root: Optional[str] = None, codec: Optional[str] = None, level: Optional[int] = None):
+        self.root = root or config.BLOB_STORE_DIR
+        self.codec = codec or config.BLOB_STORE_CODEC
+        if self.codec not in CODECS:
+            raise ValueError(f"지원하지 않는 압축 코덱입니다: {self.codec} ({', '.join(CODECS)})")
+        self.level = config.BLOB_STORE_LEVEL if level is None else level
+        self.stats = {"chunks_written": 0, "chunks_reused": 0, "bytes_written": 0}
+
+    def blob_path(self, digest: str, codec: Optional[str] = None) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.{codec or self.codec}")
+
+    def has(self, digest: str, codec: Optional[str] = None) -> bool:
+        return os.path.exists(self.blob_path(digest, codec))
+
+    def put(self, data: bytes) -> str:
+        """청크 하나 저장 후 해시 반환 (이미 있으면 쓰지 않음)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            self.stats["chunks_reused"] += 1
+            return digest
+        compressed = CODECS[self.codec][0](bytes(data), self.level)
+        _atomic_write(path, compressed)
+        self.stats["chunks_written"] += 1
+        self.stats["bytes_written"] += len(compressed)
+        return digest
+
+    def get(self, digest: str, codec: Optional[str] = None) -> bytes:
+        """청크 읽기 (압축 해제 후 해시 검증)"""
+        codec = codec or self.codec
+        with open(self.blob_path(digest, codec), "rb") as f:
+            data = CODECS[codec][1](f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"청크 내용이 해시와 다릅니다: {digest}")
+        return data
+
+    def store(self, data: bytes) -> Dict:
+        """파일 내용을 청크로 나눠 저장하고 manifest 항목 반환"""
+        return {
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "size": len(data),
+            "codec": self.codec,
+            "chunks": [self.put(chunk) for chunk in content_chunks(data)]
+        }
+
+    def load(self, entry: Dict) -> bytes:
+        """manifest 항목의 청크를 모아 원래 파일 내용 복원"""
+        data = b"".join(self.get(digest, entry.get("codec")) for digest in entry["chunks"])
+        if len(data) != entry["size"] or hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise ValueError(f"복원한 내용이 manifest와 다릅니다: {entry['sha256']}")
+        return data
+
+def manifest_path(report_dir: str) -> str:
+    return os.path.join(report_dir, MANIFEST_NAME)
+
+def read_manifest(report_dir: str) -> Dict:
+    """리포트 디렉토리의 manifest (없으면 빈 manifest)"""
+    path = manifest_path(report_dir)
+    if not os.path.exists(path):
+        return {"version": MANIFEST_VERSION, "files": {}}
+    with open(path, encoding="utf-8-sig") as f:
+        return json.load(f)
+
+def write_manifest(report_dir: str, manifest: Dict):
+    data = json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8")
+    _atomic_write(manifest_path(report_dir), data)
+
+def _manifest_entry(path: str) -> Optional[Dict]:
+    report_dir, name = os.path.split(os.path.abspath(path))
+    if not os.path.exists(manifest_path(report_dir)):
+        return None
+    return read_manifest(report_dir)["files"].get(name)
+
+def artifact_exists(path: str) -> bool:
+    """원본 파일 또는 manifest 항목이 있는지 여부"""
+    return os.path.exists(path) or _manifest_entry(path) is not None
+
+def artifact_mtime(path: str) -> float:
+    """원본 파일 수정 시각 (저장소로 옮겨졌으면 manifest 수정 시각)"""
+    if os.path.exists(path):
+        return os.path.getmtime(path)
+    if _manifest_entry(path) is None:
+        raise FileNotFoundError(path)
+    return os.path.getmtime(manifest_path(os.path.dirname(os.path.abspath(path))))
+
+def artifact_sha256(path: str) -> str:
+    """원본 파일 내용의 SHA-256 (저장소로 옮겨졌으면 복원 없이 manifest에 기록된 값)"""
+    if os.path.exists(path):
+        return file_hash(path)
+    entry = _manifest_entry(path)
+    if entry is None:
+        raise FileNotFoundError(path)
+    return entry["sha256"]
+
+def read_artifact(path: str, store: Optional[BlobStore] = None) -> bytes:
+    """리포트 산출물 읽기 (원본 파일이 없으면 저장소에서 복원)"""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    entry = _manifest_entry(path)
+    if entry is None:
+        raise FileNotFoundError(path)
+    return (store or default_store).load(entry)
+
+def write_artifact(path: str, data: bytes, store: Optional[BlobStore] = None) -> Dict:
+    """리포트 산출물을 저장소에 쓰고 manifest 갱신 (같은 이름의 원본 파일은 삭제)"""
+    store = store or default_store
+    report_dir, name = os.path.split(os.path.abspath(path))
+    entry = store.store(data)
+    manifest = read_manifest(report_dir)
+    manifest["files"][name] = entry
+    write_manifest(report_dir, manifest)
+    if os.path.exists(path):
+        os.remove(path)
+    return entry
+
+def iter_artifacts(root: str, name: str) -> Iterator[str]:
+    """디렉토리 하위에서 이름이 name인 산출물 경로 (원본 파일과 manifest 항목 모두, 저장소 디렉토리 제외)"""
+    for directory, directories, files in os.walk(root):
+        directories[:] = sorted(entry for entry in directories if not entry.startswith("."))
+        if name in files:
+            yield os.path.join(directory, name)
+        elif MANIFEST_NAME in files and name in read_manifest(directory)["files"]:
+            yield os.path.join(directory, name)
+
+def migrate(reports_dir: Optional[str] = None, store: Optional[BlobStore] = None,
+            names: Sequence[str] = DEFAULT_ARTIFACTS, apply: bool = False) -> Dict:
+    """리포트 디렉토리의 산출물을 저장소로 옮기고(apply=False면 계산만) 절감량 반환"""
+    reports_dir = reports_dir or config.REPORTS_DIR
+    store = store or default_store
+    started = time.perf_counter()
+    result = {"files": 0, "original_bytes": 0, "stored_bytes": 0, "manifest_bytes": 0,
+              "chunks": 0, "unique_chunks": 0, "applied": apply}
+    # dry-run에서 이미 계산한 청크 (저장소에 있는 청크는 추가 용량 0)
+    pending = set()
+
+    for directory, directories, files in os.walk(reports_dir):
+        directories[:] = sorted(entry for entry in directories if not entry.startswith("."))
+        targets = [name for name in names if name in files]
+        if not targets:
+            continue
+        manifest = read_manifest(directory)
+        for name in targets:
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            result["files"] += 1
+            result["original_bytes"] += len(data)
+
+            if apply:
+                written = store.stats["bytes_written"]
+                chunks_written = store.stats["chunks_written"]
+                entry = store.store(data)
+                result["stored_bytes"] += store.stats["bytes_written"] - written
+                result["unique_chunks"] += store.stats["chunks_written"] - chunks_written
+                result["chunks"] += len(entry["chunks"])
+            else:
+                chunks = content_chunks(data)
+                digests = []
+                for chunk in chunks:
+                    digest = hashlib.sha256(chunk).hexdigest()
+                    digests.append(digest)
+                    if digest not in pending and not store.has(digest):
+                        pending.add(digest)
+                        result["stored_bytes"] += len(CODECS[store.codec][0](bytes(chunk), store.level))
+                        result["unique_chunks"] += 1
+                result["chunks"] += len(chunks)
+                entry = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data),
+                         "codec": store.codec, "chunks": digests}
+            manifest["files"][name] = entry
+
+        result["manifest_bytes"] += len(json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+        if apply:
+            write_manifest(directory, manifest)
+            # manifest로 복원이 확인된 뒤에만 원본 삭제
+            for name in targets:
+                store.load(manifest["files"][name])
+                os.remove(os.path.join(directory, name))
+
+    result["saved_bytes"] = result["original_bytes"] - result["stored_bytes"] - result["manifest_bytes"]
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+# 기본 저장소 (생성 시 디스크를 건드리지 않음)
+default_store = BlobStore()
+
+def main():
+    parser = argparse.ArgumentParser(description="리포트 산출물 중복 제거·압축 저장소 마이그레이션")
+    parser.add_argument("--reports-dir", default=None, help="리포트 디렉토리 (기본 REPORTS_DIR)")
+    parser.add_argument("--store", default=None, help="저장소 디렉토리 (기본 BLOB_STORE_DIR)")
+    parser.add_argument("--name", action="append", default=None,
+                        help=f"옮길 파일 이름 (여러 번 지정 가능, 기본 {', '.join(DEFAULT_ARTIFACTS)})")
+    parser.add_argument("--apply", action="store_true", help="실제로 저장하고 원본 삭제 (기본은 계산만)")
+    args = parser.parse_args()
+
+    store = BlobStore(args.store) if args.store else default_store
+    result = migrate(args.reports_dir, store, args.name or DEFAULT_ARTIFACTS, args.apply)
+    mode = "적용" if result["applied"] else "dry-run"
+    original = result["original_bytes"]
+    print(
+        f"[{mode}] 파일 {result['files']}개, 청크 {result['chunks']}개 중 고유 {result['unique_chunks']}개 "
+        f"({result['seconds']:.1f}초)"
+    )
+    print(
+        f"  원본 {original / 1e6:.1f}MB → 청크 {result['stored_bytes'] / 1e6:.2f}MB "
+        f"+ manifest {result['manifest_bytes'] / 1e6:.2f}MB, "
+        f"절감 {result['saved_bytes'] / 1e6:.1f}MB ({result['saved_bytes'] / original * 100 if original else 0:.1f}%)"
+    )
+    if not result["applied"] and result["files"]:
+        print("  --apply를 주면 저장소에 쓰고 원본을 manifest로 대체합니다.")
+
+if __name__ == "__main__":
+    main()
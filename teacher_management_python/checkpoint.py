@@ -0,0 +1,134 @@
+from typing import Any, Iterable, Optional
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+def atomic_write_json(path: str, data: Any):
+    """임시 파일에 쓴 뒤 os.replace로 교체 (중단되어도 반쯤 쓰인 파일이 남지 않음)"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=_json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _json_default(value: Any):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"JSON으로 저장할 수 없는 값입니다: {type(value).__name__}")
+
+def content_hash(*parts: Any) -> str:
+    """입력 내용(문자열/JSON 가능한 값)의 sha256"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, ensure_ascii=False, sort_keys=True, default=_json_default)
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def messages_hash(kind: str, messages: Iterable) -> str:
+    """LLM 요청 메시지 기준 청크 체크포인트 키"""
+    return content_hash(kind, [[message.type, message.content] for message in messages])
+
+class RunCheckpoint:
+    """강의 1건 처리의 단계별·청크별 체크포인트
+
+    run_dir 구조:
+        manifest.json            입력 해시, 생성/갱신 시각
+        stages/<단계>.json       단계 결과 + 입력 해시
+        chunks/<종류>/<번호>.json 청크 결과 + 요청 내용 해시
+
+    모든 파일은 원자적으로 기록된다. 저장된 해시가 현재 입력과 다르면 해당 결과는
+    재사용하지 않으므로, 청크 분할이나 프롬프트가 바뀐 청크만 다시 실행된다.
+    """
+    def __init__(self, run_dir: str, input_hash: str, resume: bool = False):
+        self.run_dir = run_dir
+        self.input_hash = input_hash
+        self.resume = resume
+        self.stats = {"reused_stages": 0, "reused_chunks": 0, "saved": 0}
+
+        manifest_path = os.path.join(run_dir, "manifest.json")
+        manifest = self._read(manifest_path) if resume else None
+        if manifest is not None and manifest.get("input_hash") != input_hash:
+            print(f"Warning: 입력이 이전 실행과 달라 체크포인트를 초기화합니다 ({run_dir})")
+            manifest = None
+        if manifest is None:
+            # 새 실행: 이전 체크포인트는 재사용하지 않음
+            for name in ("stages", "chunks"):
+                shutil.rmtree(os.path.join(run_dir, name), ignore_errors=True)
+            manifest = {"input_hash": input_hash, "created_at": time.time()}
+        manifest["updated_at"] = time.time()
+        atomic_write_json(manifest_path, manifest)
+
+    @staticmethod
+    def _read(path: str) -> Optional[Any]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # 없는 파일 또는 손상된 파일은 체크포인트가 없는 것으로 취급
+            return None
+
+    def _stage_path(self, name: str) -> str:
+        return os.path.join(self.run_dir, "stages", f"{name}.json")
+
+    def _chunk_path(self, kind: str, index: int) -> str:
+        return os.path.join(self.run_dir, "chunks", kind, f"{index:05d}.json")
+
+    def load_stage(self, name: str, inputs_hash: Optional[str] = None) -> Optional[Any]:
+        """단계 결과 조회 (없거나 입력 해시가 다르면 None)"""
+        record = self._read(self._stage_path(name))
+        if record is None or record.get("hash") != (inputs_hash or self.input_hash):
+            return None
+        self.stats["reused_stages"] += 1
+        return record["result"]
+
+    def save_stage(self, name: str, result: Any, inputs_hash: Optional[str] = None):
+        atomic_write_json(self._stage_path(name), {
+            "hash": inputs_hash or self.input_hash,
+            "saved_at": time.time(),
+            "result": result
+        })
+        self.stats["saved"] += 1
+
+    def load_chunk(self, kind: str, index: int, chunk_hash: str) -> Optional[Any]:
+        """청크 결과 조회 (요청 내용 해시가 같을 때만)"""
+        record = self._read(self._chunk_path(kind, index))
+        if record is None or record.get("hash") != chunk_hash:
+            return None
+        self.stats["reused_chunks"] += 1
+        return record["result"]
+
+    def save_chunk(self, kind: str, index: int, chunk_hash: str, result: Any):
+        atomic_write_json(self._chunk_path(kind, index), {
+            "hash": chunk_hash,
+            "saved_at": time.time(),
+            "result": result
+        })
+        self.stats["saved"] += 1
+
+    def summary(self) -> str:
+        return (
+            f"체크포인트({self.run_dir}): 재사용 단계 {self.stats['reused_stages']}, "
+            f"재사용 청크 {self.stats['reused_chunks']}, 저장 {self.stats['saved']}"
+        )
@@ -0,0 +1,172 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import config as config
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken이 없으면 근사 추정기 사용
+    tiktoken = None
+
+# 발화 한 줄("화자: 텍스트\n")마다 붙는 형식 토큰 수 (화자명·구분자·줄바꿈)
+LINE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_loaded = False
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.encoding_for_model(config.CHUNK_TOKENIZER_MODEL)
+            except Exception:
+                try:
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    # 인코딩 파일을 내려받을 수 없는 환경
+                    _encoding = None
+    return _encoding
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 토큰 수 근사 (ASCII 약 4자당 1토큰, 한글 등 비ASCII 1자당 1토큰)"""
+    ascii_chars = sum(1 for char in text if char < "\x80")
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+def count_tokens(text: str) -> int:
+    """텍스트 토큰 수 (tiktoken이 있으면 실제 인코딩 기준)"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+@dataclass(frozen=True)
+class ChunkSpan:
+    start: int   # 청크 첫 발화 인덱스
+    stop: int    # 청크 마지막 발화 다음 인덱스
+    tokens: int  # 청크 대화 본문 토큰 수
+
+class ChunkPlanner:
+    """토큰 예산 기반 대화 청크 계획
+
+    발화 길이를 토큰으로 환산해 호출당 대화 토큰 예산(token_budget)에 가깝게 발화를 채우고,
+    다음 청크와의 중복도 발화 수가 아닌 토큰 수(overlap_tokens) 이내로 맞춘다.
+    지표 등 호출마다 반복되는 프롬프트는 예산에 포함하지 않으며 비교 시 비용으로만 더한다.
+    예산보다 긴 단일 발화는 잘라내지 않고 단독 청크로 둔다.
+    """
+    def __init__(self, token_budget: Optional[int] = None, overlap_tokens: Optional[int] = None,
+                 counter: Optional[Callable[[str], int]] = None):
+        self.token_budget = config.CHUNK_TOKEN_BUDGET if token_budget is None else token_budget
+        self.overlap_tokens = config.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self.counter = counter or count_tokens
+        if self.token_budget <= 0:
+            raise ValueError("token_budget은 0보다 커야 합니다")
+        if not 0 <= self.overlap_tokens < self.token_budget:
+            raise ValueError("overlap_tokens는 0 이상, token_budget 미만이어야 합니다")
+        self.last_comparison: Optional[Dict] = None
+
+    def utterance_tokens(self, conversation: Iterable[Tuple[str, str]]) -> List[int]:
+        """발화별 토큰 수 (프롬프트에 들어가는 "화자: 텍스트" 형식 기준)"""
+        return [
+            self.counter(text) + self.counter(speaker) + LINE_OVERHEAD_TOKENS
+            for speaker, text in conversation
+        ]
+
+    def plan(self, conversation: Sequence[Tuple[str, str]],
+             tokens: Optional[List[int]] = None) -> List[ChunkSpan]:
+        """청크 구간 계획
+
+        Args:
+            conversation: 대화 목록 (UtteranceStore/뷰 또는 튜플 리스트)
+            tokens: 미리 계산한 발화별 토큰 수 (없으면 계산)
+        """
+        if tokens is None:
+            tokens = self.utterance_tokens(conversation)
+        budget, overlap = self.token_budget, self.overlap_tokens
+        # prefix[i] = 앞선 i개 발화의 토큰 합
+        prefix = [0] + list(accumulate(tokens))
+        spans = []
+        start = 0
+        previous_stop = 0
+        while start < len(tokens):
+            # 예산 안에 들어가는 가장 먼 끝점 (이전 청크보다 최소 1개 발화는 더 포함)
+            stop = max(bisect_right(prefix, prefix[start] + budget) - 1, start + 1, previous_stop + 1)
+            spans.append(ChunkSpan(start, stop, prefix[stop] - prefix[start]))
+            if stop >= len(tokens):
+                break
+            # 끝에서부터 overlap 토큰 이내의 발화를 다음 청크에 다시 포함 (항상 전진)
+            next_start = stop
+            while next_start - 1 > start and prefix[stop] - prefix[next_start - 1] <= overlap:
+                next_start -= 1
+            start = next_start
+            previous_stop = stop
+        return spans
+
+    def chunks(self, conversation: Sequence[Tuple[str, str]], reserved_tokens: int = 0,
+               label: Optional[str] = None, fixed_chunk_size: Optional[int] = None,
+               fixed_overlap: int = 0) -> List:
+        """계획된 구간대로 대화를 분할 (UtteranceStore는 복사 없는 뷰로 반환)
+
+        label과 fixed_chunk_size가 주어지면 기존 고정 분할 대비 절감량을 출력한다.
+        reserved_tokens는 호출마다 반복되는 프롬프트 토큰으로, 비교 시 호출 수만큼 더해진다.
+        """
+        tokens = self.utterance_tokens(conversation)
+        spans = self.plan(conversation, tokens=tokens)
+        if label is not None and fixed_chunk_size is not None:
+            self.last_comparison = self.compare(
+                conversation, fixed_chunk_size, fixed_overlap, reserved_tokens,
+                tokens=tokens, planned_spans=spans
+            )
+            print_chunk_comparison(label, self.last_comparison)
+        return [conversation[span.start:span.stop] for span in spans]
+
+    def compare(self, conversation: Sequence[Tuple[str, str]], chunk_size: int, overlap: int = 0,
+                reserved_tokens: int = 0, tokens: Optional[List[int]] = None,
+                planned_spans: Optional[List[ChunkSpan]] = None) -> Dict:
+        """고정 발화 수 분할 대비 호출 수·토큰 수 비교
+
+        토큰 수는 호출마다 반복되는 프롬프트(reserved_tokens)와 중복 발화를 포함한 총 입력 토큰이다.
+        """
+        if tokens is None:
+            tokens = self.utterance_tokens(conversation)
+        if planned_spans is None:
+            planned_spans = self.plan(conversation, tokens=tokens)
+        prefix = [0] + list(accumulate(tokens))
+        fixed_spans = [
+            (start, min(start + chunk_size, len(tokens)))
+            for start in fixed_chunk_starts(len(tokens), chunk_size, overlap)
+        ]
+
+        fixed_tokens = sum(prefix[stop] - prefix[start] + reserved_tokens for start, stop in fixed_spans)
+        planned_tokens = sum(span.tokens + reserved_tokens for span in planned_spans)
+        return {
+            "발화_수": len(tokens),
+            "대화_토큰": prefix[-1],
+            "고정_호출_수": len(fixed_spans),
+            "고정_토큰": fixed_tokens,
+            "고정_최대_청크_토큰": max((prefix[stop] - prefix[start] for start, stop in fixed_spans), default=0),
+            "계획_호출_수": len(planned_spans),
+            "계획_토큰": planned_tokens,
+            "계획_최대_청크_토큰": max((span.tokens for span in planned_spans), default=0),
+            "예산_초과_청크": sum(1 for span in planned_spans if span.tokens > self.token_budget),
+            "절감_호출_수": len(fixed_spans) - len(planned_spans),
+            "절감_토큰": fixed_tokens - planned_tokens
+        }
+
+def fixed_chunk_starts(length: int, chunk_size: int, overlap: int = 0) -> List[int]:
+    """기존 고정 발화 수 분할의 청크 시작 인덱스"""
+    return list(range(0, length, chunk_size - overlap))
+
+def print_chunk_comparison(label: str, comparison: Dict):
+    """청크 계획 비교 결과 출력"""
+    print(
+        f"[{label}] 발화 {comparison['발화_수']}개 ({comparison['대화_토큰']} 토큰): "
+        f"고정 분할 {comparison['고정_호출_수']}회/{comparison['고정_토큰']} 토큰 → "
+        f"토큰 예산 분할 {comparison['계획_호출_수']}회/{comparison['계획_토큰']} 토큰 "
+        f"(호출 {comparison['절감_호출_수']:+d}회 절감, 토큰 {comparison['절감_토큰']:+d} 절감, "
+        f"최대 청크 {comparison['고정_최대_청크_토큰']} → {comparison['계획_최대_청크_토큰']} 토큰)"
+    )
+    if comparison["예산_초과_청크"]:
+        print(f"Warning: 예산을 넘는 단일 발화 청크 {comparison['예산_초과_청크']}개")
@@ -10,6 +10,87 @@ UPSTAGE_API_KEY = os.getenv("UPSTAGE_API_KEY", "your_upstage_api_key_here")
 HF_TOKEN = os.getenv("HF_TOKEN", "your_huggingface_token_here")
 STABILITY_API_KEY = os.getenv("STABILITY_API_KEY", "your_stability_api_key_here")
 AAI_API_KEY = os.getenv("AAI_API_KEY", "your_assemblyai_api_key_here")
+# AssemblyAI API 주소 (테스트용 로컬 대체 서버를 쓸 때만 지정, 예: http://localhost:8090)
+AAI_BASE_URL = os.getenv("AAI_BASE_URL", "")
 
 # API URLs
-SD_API_URL = "https://api.stability.ai/v2beta/stable-image/generate/sd3"
\ No newline at end of file
+SD_API_URL = "https://api.stability.ai/v2beta/stable-image/generate/sd3"
+
+# Assessment
+ASSESS_MAX_CONCURRENCY = int(os.getenv("ASSESS_MAX_CONCURRENCY", "4"))
+
+# LLM 응답 캐시
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") not in ("0", "false", "False")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_cache.sqlite3"
+)
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+# 토큰 예산 기반 청크 분할 (호출당 대화 토큰 예산, 청크 간 중복 토큰)
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "3000"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "150"))
+QUALITATIVE_CHUNK_TOKEN_BUDGET = int(os.getenv("QUALITATIVE_CHUNK_TOKEN_BUDGET", "6000"))
+CHUNK_TOKENIZER_MODEL = os.getenv("CHUNK_TOKENIZER_MODEL", "gpt-4.1")
+
+# 청크 평가 프롬프트의 수업 전체 컨텍스트 (full: 전체 지표·질적 분석, summary: 요약 블록, local: 청크 자체 지표)
+CHUNK_CONTEXT_MODE = os.getenv("CHUNK_CONTEXT_MODE", "summary")
+LECTURE_SUMMARY_MAX_TOKENS = int(os.getenv("LECTURE_SUMMARY_MAX_TOKENS", "400"))
+
+# 질적 분석과 청크 평가를 청크당 한 번의 JSON 응답으로 통합 (LLM 호출 약 절반)
+FUSED_CHUNK_ANALYSIS = os.getenv("FUSED_CHUNK_ANALYSIS", "0") in ("1", "true", "True")
+
+# 구조화(JSON 스키마) 응답 검증 실패 시 해당 호출만 다시 요청하는 최대 횟수
+STRUCTURED_OUTPUT_MAX_RETRIES = int(os.getenv("STRUCTURED_OUTPUT_MAX_RETRIES", "2"))
+
+# 강의 처리 체크포인트 (단계별·청크별 결과) 저장 위치, 기본 재개 여부
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".runs"
+)
+PIPELINE_RESUME = os.getenv("PIPELINE_RESUME", "0") in ("1", "true", "True")
+
+# 일괄 처리(batch.py) 워커 프로세스 수
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# 오디오 청크 동시 전사 수
+TRANSCRIBE_MAX_CONCURRENCY = int(os.getenv("TRANSCRIBE_MAX_CONCURRENCY", "4"))
+# 전사용 오디오 청크 인코딩 (음성 인식은 16kHz 모노면 충분)
+TRANSCRIBE_SAMPLE_RATE = int(os.getenv("TRANSCRIBE_SAMPLE_RATE", "16000"))
+TRANSCRIBE_AUDIO_BITRATE = os.getenv("TRANSCRIBE_AUDIO_BITRATE", "32k")
+
+# 리포트 아카이브(public/reports) 위치와 점수 인덱스(report_index.py) 파일
+REPORTS_DIR = os.getenv("REPORTS_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "public", "reports"
+)
+REPORT_INDEX_PATH = os.getenv("REPORT_INDEX_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "report_index.sqlite3"
+)
+
+# 리포트 산출물 중복 제거·압축 저장소 (blob_store.py)
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR") or os.path.join(REPORTS_DIR, ".blobs")
+BLOB_STORE_CODEC = os.getenv("BLOB_STORE_CODEC", "zlib")
+BLOB_STORE_LEVEL = int(os.getenv("BLOB_STORE_LEVEL", "6"))
+
+# 교사별 누적 점수 프로필 (teacher_profiles.py) 저장 위치와 추세 EWMA 가중치
+TEACHER_PROFILE_PATH = os.getenv("TEACHER_PROFILE_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "teacher_profiles.sqlite3"
+)
+TEACHER_PROFILE_EWMA_ALPHA = float(os.getenv("TEACHER_PROFILE_EWMA_ALPHA", "0.3"))
+
+# 단계·청크별 프로파일링 스팬 (tracing.py). TRACE_DIR를 지정하면 강의마다 Chrome 트레이스·JSONL로 내보냄
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") not in ("0", "false", "False")
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+
+# LLM 토큰·비용 계량과 강의별 예산 (metering.py). 예산 0이면 제한 없음
+# MODEL_PRICES: 기본 가격표를 덮어쓸 JSON ({"모델": [입력, 출력 USD/100만 토큰]})
+MODEL_PRICES = os.getenv("MODEL_PRICES", "")
+LECTURE_TOKEN_BUDGET = int(os.getenv("LECTURE_TOKEN_BUDGET", "0"))
+LECTURE_COST_BUDGET = float(os.getenv("LECTURE_COST_BUDGET", "0"))
+# degrade: 예산의 BUDGET_DEGRADE_RATIO에 도달하면 대체 모델로 전환 / abort: 전환 없이 예산 초과 시 중단
+BUDGET_ACTION = os.getenv("BUDGET_ACTION", "degrade")
+BUDGET_DEGRADE_RATIO = float(os.getenv("BUDGET_DEGRADE_RATIO", "0.8"))
+BUDGET_FALLBACK_MODEL = os.getenv("BUDGET_FALLBACK_MODEL", "gpt-4.1-mini")
+# 사용량 기록 전 예산 확인에 쓰는 호출당 예상 응답 토큰
+METER_COMPLETION_ESTIMATE = int(os.getenv("METER_COMPLETION_ESTIMATE", "800"))
+USAGE_LEDGER_PATH = os.getenv("USAGE_LEDGER_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "usage.sqlite3"
+)
@@ -1,19 +1,97 @@
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+import asyncio
+import io
+import os
 import re
 from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 import config as config
+from llm_cache import CachedChatModel
+from patterns import default_engine
+from chunking import ChunkPlanner, count_tokens
+from prompt import TeachingPrompts
+from structured_output import StructuredOutputClient
+from checkpoint import RunCheckpoint, messages_hash
+from utterance_store import UtteranceStore, UtteranceView
+from speaker_roles import default_classifier
+from transcript_json import is_assemblyai_json, iter_assemblyai_utterances
+import tracing
+
+TranscriptSource = Union[str, os.PathLike, TextIO]
+
+def iter_transcript_turns(source: TranscriptSource) -> Iterator[Tuple[str, str]]:
+    """'화자: 발화' 형식 전사본을 한 줄씩 읽으며 (화자, 발화) 턴을 순서대로 생성
+    
+    Args:
+        source: 전사본 파일 경로 또는 텍스트 파일 객체
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='utf-8') as f:
+            yield from _iter_turns(f)
+    else:
+        yield from _iter_turns(source)
+
+def _iter_turns(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    current_speaker = ""
+    # 발화 조각을 모아 턴이 끝날 때 한 번만 합침 (문자열 반복 연결 방지)
+    pieces: List[str] = []
+    
+    for line in lines:
+        line = line.rstrip('\n')
+        # 화자 구분을 위한 패턴 체크
+        if ": " in line:  # 콜론과 공백으로 구분
+            # 이전 대화가 있으면 반환
+            if current_speaker and pieces[0]:
+                yield current_speaker, " ".join(pieces).strip()
+            
+            # 새로운 대화 시작
+            parts = line.split(": ", 1)  # 최대 1번만 분할
+            current_speaker = "Teacher" if "teacher" in parts[0].lower() else "Student"
+            pieces = [parts[1]]
+        elif pieces and pieces[0]:  # 현재 진행 중인 발화가 있는 경우에만
+            pieces.append(line.strip())
+    
+    # 마지막 대화 처리
+    if current_speaker and pieces[0]:
+        yield current_speaker, " ".join(pieces).strip()
+
+def load_assemblyai_conversations(path: Union[str, os.PathLike]) -> UtteranceStore:
+    """AssemblyAI transcript.json의 utterances를 시각(ms)과 함께 대화 세션으로 읽기
+    
+    words/text 필드는 읽지 않고 발화만 스트리밍으로 저장한 뒤, 화자 라벨(A, B, ...)을
+    SpeakerRoleClassifier로 판별한 Teacher/Student로 바꾼다.
+    """
+    conversations = UtteranceStore()
+    for utterance in iter_assemblyai_utterances(os.fspath(path)):
+        text = (utterance.get("text") or "").strip()
+        if text:
+            conversations.append(
+                str(utterance.get("speaker") or ""), text, utterance.get("start"), utterance.get("end")
+            )
+    roles = default_classifier.classify(
+        [speaker for speaker, _ in conversations],
+        list(conversations.texts())
+    )
+    conversations.relabel({speaker: role.role for speaker, role in roles.items()})
+    return conversations
 
 class TeachingDataProcessor:
-    def __init__(self, raw_text: str):
+    def __init__(self, raw_text: str = "", source: Optional[TranscriptSource] = None):
         self.raw_text = raw_text
-        self.llm = ChatOpenAI(
+        # 전사본 파일 경로/파일 객체 (지정 시 raw_text 대신 스트리밍으로 읽음)
+        # .json 경로는 AssemblyAI transcript.json으로 보고 발화 시각까지 읽음
+        self.source = source
+        self.llm = CachedChatModel(ChatOpenAI(
             api_key=config.OPENAI_API_KEY,
             model="gpt-4.1-2025-04-14",
             temperature=0
-        )
+        ))
+        # JSON 스키마 검증 + 실패한 호출만 재시도
+        self.structured = StructuredOutputClient(self.llm)
+        # 지정 시 청크별 질적 분석 결과를 저장하고 재실행 때 재사용
+        self.checkpoint: Optional[RunCheckpoint] = None
         self.processed_data = {
-            "대화_세션": [],
+            "대화_세션": UtteranceStore(),
             "교사_발화": [], 
             "학생_발화": [],
             "수업_주제": set(),
@@ -54,10 +132,27 @@ class TeachingDataProcessor:
                 "학습_환경": []
             }
         }
+        # 기존 고정 분할 크기 (토큰 예산 분할과의 비교 기준)
         self.CHUNK_SIZE = 100
+        # 질적 분석은 청크 간 중복 없이 토큰 예산으로 분할
+        self.chunk_planner = ChunkPlanner(config.QUALITATIVE_CHUNK_TOKEN_BUDGET, overlap_tokens=0)
 
     def analyze_chunk_with_llm(self, chunk: List[Tuple[str, str]]) -> Dict:
         """LLM을 사용한 대화 청크 질적 분석"""
+        return self.structured.invoke(
+            self._qualitative_messages(chunk), TeachingPrompts.QUALITATIVE_SCHEMA,
+            "qualitative_analysis", fallback=self._parse_llm_analysis
+        )
+
+    async def analyze_chunk_with_llm_async(self, chunk: List[Tuple[str, str]]) -> Dict:
+        """LLM을 사용한 대화 청크 질적 분석 (비동기)"""
+        return await self.structured.ainvoke(
+            self._qualitative_messages(chunk), TeachingPrompts.QUALITATIVE_SCHEMA,
+            "qualitative_analysis", fallback=self._parse_llm_analysis
+        )
+
+    def _qualitative_messages(self, chunk: List[Tuple[str, str]]) -> List:
+        """질적 분석 요청 메시지 구성"""
         conversation_text = "\n".join([f"{speaker}: {text}" for speaker, text in chunk])
         
         prompt = """
@@ -82,14 +177,13 @@ class TeachingDataProcessor:
 {conversations}
 
 각 관점별로 구체적인 예시와 함께 분석해주세요.
+응답은 교사_전문성, 수업_담화, 학습_환경 항목에 분석 문장 목록을 담은 JSON으로 작성해주세요.
 """
 
-        response = self.llm.invoke([
+        return [
             SystemMessage(content="당신은 교육 평가 전문가입니다."),
             HumanMessage(content=prompt.format(conversations=conversation_text))
-        ])
-        
-        return self._parse_llm_analysis(response.content)
+        ]
 
     def _parse_llm_analysis(self, response: str) -> Dict:
         """LLM 응답 파싱"""
@@ -117,43 +211,25 @@ class TeachingDataProcessor:
         
         return analysis
 
-    def extract_conversations(self) -> List[Tuple[str, str]]:
+    @classmethod
+    def from_assemblyai_json(cls, path: Union[str, os.PathLike]) -> "TeachingDataProcessor":
+        """AssemblyAI transcript.json을 텍스트 변환 없이 처리하는 프로세서"""
+        return cls(source=path)
+
+    def extract_conversations(self) -> UtteranceStore:
         """대화 세션과 화자별 발화를 추출"""
-        lines = self.raw_text.split('\n')
-        conversations = []
-        teacher_utterances = []
-        student_utterances = []
-        
-        current_speaker = ""
-        current_text = ""
-        
-        for line in lines:
-            # 화자 구분을 위한 패턴 체크
-            if ": " in line:  # 콜론과 공백으로 구분
-                # 이전 대화가 있으면 저장
-                if current_speaker and current_text:
-                    conversations.append((current_speaker, current_text.strip()))
-                    if current_speaker == "Teacher":
-                        teacher_utterances.append(current_text.strip())
-                    else:
-                        student_utterances.append(current_text.strip())
-                
-                # 새로운 대화 시작
-                parts = line.split(": ", 1)  # 최대 1번만 분할
-                current_speaker = "Teacher" if "teacher" in parts[0].lower() else "Student"
-                current_text = parts[1]
-            else:
-                # 현재 발화에 텍스트 추가
-                if current_text:  # 현재 진행 중인 발화가 있는 경우에만
-                    current_text += " " + line.strip()
-        
-        # 마지막 대화 처리
-        if current_speaker and current_text:
-            conversations.append((current_speaker, current_text.strip()))
-            if current_speaker == "Teacher":
-                teacher_utterances.append(current_text.strip())
-            else:
-                student_utterances.append(current_text.strip())
+        if is_assemblyai_json(self.source):
+            conversations = load_assemblyai_conversations(self.source)
+        else:
+            source = self.source if self.source is not None else io.StringIO(self.raw_text)
+            conversations = UtteranceStore(iter_transcript_turns(source))
+        return self.set_conversations(conversations)
+
+    def set_conversations(self, conversations: UtteranceStore) -> UtteranceStore:
+        """추출된(또는 체크포인트에서 복원한) 대화 세션 설정"""
+        # 화자별 발화는 복사하지 않고 대화 세션 위의 뷰로 제공
+        teacher_utterances = conversations.texts(include=("Teacher",))
+        student_utterances = conversations.texts(exclude=("Teacher",))
         
         # 결과 저장
         self.processed_data["대화_세션"] = conversations
@@ -165,8 +241,13 @@ class TeachingDataProcessor:
         
         return conversations
 
+    def analyze_patterns(self) -> Dict:
+        """교수·피드백·주제 패턴을 단일 패스로 분석 (patterns.TeachingPatternEngine)"""
+        default_engine.apply(self.processed_data)
+        return self.processed_data["교사_전략"]
+
     def analyze_teaching_patterns(self) -> Dict:
-        """교수 패턴 심층 분석"""
+        """교수 패턴 심층 분석 (개별 분석용, 전체 처리에는 analyze_patterns 사용)"""
         for speaker, text in self.processed_data["대화_세션"]:
             if speaker == "Teacher":
                 # 스캐폴딩 분석
@@ -233,26 +314,84 @@ class TeachingDataProcessor:
         self.processed_data["수업_주제"] = subjects
         return subjects
 
-    def process(self) -> Dict:
-        """전체 처리 프로세스"""
+    def process(self, qualitative: bool = True) -> Dict:
+        """전체 처리 프로세스
+        
+        Args:
+            qualitative: False이면 질적 분석을 생략 (통합 청크 분석에서 평가와 함께 수행하는 경우)
+        """
         # 1. 기존 정량적 분석
-        self.extract_conversations()
-        self.analyze_teaching_patterns()
-        self.analyze_feedback_patterns()
-        self.extract_subjects()
+        with tracing.span("추출"):
+            self.extract_conversations()
+        with tracing.span("패턴_분석"):
+            self.analyze_patterns()
+        if not qualitative:
+            return self.processed_data
         
         # 2. 새로운 질적 분석
-        chunks = [self.processed_data["대화_세션"][i:i + self.CHUNK_SIZE] 
-                 for i in range(0, len(self.processed_data["대화_세션"]), self.CHUNK_SIZE)]
+        with tracing.span("질적_분석"):
+            for index, chunk in enumerate(self.chunk_conversations()):
+                analysis = self._analyze_chunk_checkpointed(index, chunk)
+                for category, items in analysis.items():
+                    self.processed_data["질적_분석"][category].extend(items)
         
-        for chunk in chunks:
-            analysis = self.analyze_chunk_with_llm(chunk)
+        return self.processed_data
+
+    async def analyze_qualitative_async(self, semaphore: Optional[asyncio.Semaphore] = None) -> Dict:
+        """청크별 질적 분석을 동시에 수행하고 청크 순서대로 통합"""
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(1)
+        
+        async def run(index: int, chunk: List[Tuple[str, str]]) -> Dict:
+            chunk_hash = messages_hash("qualitative", self._qualitative_messages(chunk))
+            if self.checkpoint is not None:
+                saved = self.checkpoint.load_chunk("qualitative", index, chunk_hash)
+                if saved is not None:
+                    return saved
+            async with semaphore:
+                with tracing.span("질적 분석 청크", "chunk", index=index, 발화_수=len(chunk)):
+                    analysis = await self.analyze_chunk_with_llm_async(chunk)
+            if self.checkpoint is not None:
+                self.checkpoint.save_chunk("qualitative", index, chunk_hash, analysis)
+            return analysis
+        
+        analyses = await asyncio.gather(*[
+            run(index, chunk) for index, chunk in enumerate(self.chunk_conversations())
+        ])
+        for analysis in analyses:
             for category, items in analysis.items():
                 self.processed_data["질적_분석"][category].extend(items)
         
-        return self.processed_data
+        return self.processed_data["질적_분석"]
+
+    def _analyze_chunk_checkpointed(self, index: int, chunk: List[Tuple[str, str]]) -> Dict:
+        """체크포인트에 같은 요청의 결과가 있으면 재사용, 없으면 분석 후 저장"""
+        if self.checkpoint is None:
+            with tracing.span("질적 분석 청크", "chunk", index=index, 발화_수=len(chunk)):
+                return self.analyze_chunk_with_llm(chunk)
+        chunk_hash = messages_hash("qualitative", self._qualitative_messages(chunk))
+        saved = self.checkpoint.load_chunk("qualitative", index, chunk_hash)
+        if saved is not None:
+            return saved
+        with tracing.span("질적 분석 청크", "chunk", index=index, 발화_수=len(chunk)):
+            analysis = self.analyze_chunk_with_llm(chunk)
+        self.checkpoint.save_chunk("qualitative", index, chunk_hash, analysis)
+        return analysis
+
+    def chunk_conversations(self) -> List[UtteranceView]:
+        """질적 분석용 대화 청크 (QUALITATIVE_CHUNK_TOKEN_BUDGET 토큰 단위)"""
+        reserved_tokens = sum(count_tokens(message.content) for message in self._qualitative_messages([]))
+        return self.chunk_planner.chunks(
+            self.processed_data["대화_세션"], reserved_tokens,
+            label="질적 분석 청크", fixed_chunk_size=self.CHUNK_SIZE
+        )
 
 def process_teaching_text(raw_text: str) -> Dict:
     """편의 함수"""
     processor = TeachingDataProcessor(raw_text)
     return processor.process()
+
+def process_teaching_file(source: TranscriptSource) -> Dict:
+    """편의 함수 (전사본 파일을 스트리밍으로 처리)"""
+    processor = TeachingDataProcessor(source=source)
+    return processor.process()
@@ -0,0 +1,232 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from langchain.schema import AIMessage
+import config as config
+import metering
+import tracing
+
+class LLMResponseCache:
+    """SQLite 기반 LLM 응답 캐시
+
+    모델, temperature, 메시지(시스템/사용자) 및 추가 호출 인자를 해시한 값을 키로 사용한다.
+    TTL이 지난 항목과 최대 항목 수를 넘는 오래된 항목(마지막 조회 기준)은 자동으로 삭제된다.
+    """
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None, enabled: Optional[bool] = None):
+        self.path = path or config.LLM_CACHE_PATH
+        self.ttl_seconds = config.LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = config.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.enabled = config.LLM_CACHE_ENABLED if enabled is None else enabled
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "api_calls": 0  # 캐시를 거치지 않고 실제 모델을 호출한 횟수
+        }
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(model: Optional[str], temperature: Optional[float], messages: List,
+                 **kwargs) -> str:
+        """모델·temperature·메시지·호출 인자로 캐시 키 생성"""
+        payload = {
+            "model": model,
+            "temperature": temperature,
+            "messages": [[message.type, message.content] for message in messages],
+            "kwargs": kwargs
+        }
+        encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 응답 조회 (없거나 만료되었으면 None)"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                self.stats["evictions"] += 1
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def set(self, key: str, content: str, model: Optional[str] = None):
+        """응답 저장 후 TTL·최대 항목 수 기준으로 정리"""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, content, now, now)
+            )
+            self.stats["writes"] += 1
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.ttl_seconds:
+            cursor = conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self.stats["evictions"] += max(cursor.rowcount, 0)
+        if self.max_entries:
+            count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                cursor = conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+                self.stats["evictions"] += max(cursor.rowcount, 0)
+
+    def count_api_call(self):
+        with self._lock:
+            self.stats["api_calls"] += 1
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def summary(self) -> str:
+        total = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / total * 100 if total else 0.0
+        return (
+            f"LLM 캐시: 적중 {self.stats['hits']} / 미스 {self.stats['misses']} "
+            f"({hit_rate:.1f}%), 저장 {self.stats['writes']}, 삭제 {self.stats['evictions']}, "
+            f"API 호출 {self.stats['api_calls']}"
+        )
+
+_default_cache: Optional[LLMResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache() -> LLMResponseCache:
+    """프로세스 내 모든 모듈이 공유하는 기본 캐시"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
+
+class CachedChatModel:
+    """ChatOpenAI 호출을 캐시를 거쳐 수행하는 래퍼 (invoke/ainvoke 인터페이스 동일)
+
+    현재 강의 미터(metering.lecture)가 있으면 호출 전에 모델을 정하고(예산 임계치를 넘으면
+    대체 모델), 캐시 미스일 때만 예산을 확인·예약한 뒤 호출 후 토큰·비용을 기록한다.
+    """
+    def __init__(self, llm, cache: Optional[LLMResponseCache] = None):
+        self.llm = llm
+        self.cache = cache or get_default_cache()
+        self.model_name = getattr(llm, "model_name", None)
+        self.temperature = getattr(llm, "temperature", None)
+        self._models = {self.model_name: llm}
+
+    def _key(self, model: Optional[str], messages: List, kwargs: Dict[str, Any]) -> str:
+        return self.cache.make_key(model, self.temperature, messages, **kwargs)
+
+    def _llm_for(self, model: Optional[str]):
+        """모델 이름만 바꾼 ChatOpenAI (예산 초과 시 대체 모델)"""
+        if model not in self._models:
+            self._models[model] = self.llm.model_copy(update={"model_name": model})
+        return self._models[model]
+
+    @contextmanager
+    def _call(self, messages: List, kwargs: Dict[str, Any]) -> Iterator["_MeteredCall"]:
+        """invoke/ainvoke 공통 처리: 모델 결정 → 캐시 조회 → (미스면) 예산 확인·예약 → 호출 후 기록
+
+        예산 확인은 캐시 미스일 때만 하므로 모든 응답이 캐시에 있는 강의는 예산과 무관하게 끝난다.
+        호출하는 쪽은 call.response가 None이면 call.model로 모델을 호출해 응답을 call.response에 넣는다.
+        """
+        meter = metering.current_meter()
+        estimate = meter.estimate(self.model_name, messages) if meter and self.model_name is not None else None
+        call = _MeteredCall(estimate.model if estimate else self.model_name)
+        with tracing.span("LLM 호출", "llm", model=call.model):
+            key = self._key(call.model, messages, kwargs)
+            cached = self.cache.get(key)
+            if cached is not None:
+                tracing.add(cache_hits=1)
+                if estimate:
+                    meter.record(estimate, cache_hit=True)
+                call.response = AIMessage(content=cached)
+                yield call
+                return
+
+            if estimate:
+                call.reservation = meter.reserve(estimate)
+            self.cache.count_api_call()
+            try:
+                yield call
+            except BaseException:
+                if call.reservation:
+                    meter.release(call.reservation)
+                raise
+            tracing.add(llm_calls=1, **tracing.token_usage(call.response))
+            if call.reservation:
+                meter.record(call.reservation, call.response)
+            self.cache.set(key, call.response.content, call.model)
+
+    def invoke(self, messages: List, **kwargs):
+        with self._call(messages, kwargs) as call:
+            if call.response is None:
+                call.response = self._llm_for(call.model).invoke(messages, **kwargs)
+        return call.response
+
+    async def ainvoke(self, messages: List, **kwargs):
+        with self._call(messages, kwargs) as call:
+            if call.response is None:
+                call.response = await self._llm_for(call.model).ainvoke(messages, **kwargs)
+        return call.response
+
+@dataclass
+class _MeteredCall:
+    """CachedChatModel 호출 1건 (모델, 강의 미터 예약, 응답 - 캐시 적중이면 처음부터 응답이 있음)"""
+    model: Optional[str]
+    reservation: Optional[metering.Reservation] = None
+    response: Any = None
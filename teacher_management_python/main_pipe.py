@@ -1,35 +1,98 @@
 import os
-from data_processing import process_teaching_text
-from assess import TeachingAssessor
-from report import generate_fancy_report
-from prompt import TeachingPrompts
+import sys
+import time
+import asyncio
+from typing import Dict, Optional
+import config as config
+from pipeline import run_lecture_pipeline
+from llm_cache import get_default_cache
+from structured_output import structured_output_stats
+from teacher_profiles import get_default_store
+import metering
+import tracing
 
-def main():
-    # 현재 스크립트의 디렉토리를 기준으로 상대 경로 설정
-    current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    input_file = os.path.join(current_dir, 'data', '실제줌강의기반텍스트추출.txt')
-    output_file = os.path.join(current_dir, 'data', 'teaching_report_v10.md')
+def run_lecture(input_file: str, output_file: str, run_dir: Optional[str] = None,
+                resume: bool = False, max_concurrency: Optional[int] = None,
+                verbose: bool = True, teacher: Optional[str] = None,
+                report_id: Optional[str] = None) -> Dict:
+    """전사본 1건을 처리해 리포트를 저장하고 처리 통계 반환
 
-    # 과외 녹화 텍스트 파일 읽기
-    with open(input_file, 'r', encoding='utf-8') as f:
-        raw_text = f.read()
+    Args:
+        input_file: '화자: 발화' 형식 전사본 경로
+        output_file: 리포트(.md) 저장 경로
+        run_dir: 체크포인트 디렉토리 (없으면 체크포인트 미사용)
+        resume: run_dir의 이전 실행 결과 재사용 여부
+        max_concurrency: 동시 LLM 호출 수 (없으면 config.ASSESS_MAX_CONCURRENCY)
+        teacher: 교사 ID (있으면 최종 점수를 교사별 누적 프로필에 반영)
+        report_id: 프로필 중복 반영 방지·사용량 기록용 리포트 ID (없으면 리포트 파일 이름)
+    """
+    cache = get_default_cache()
+    api_calls_before = cache.stats["api_calls"]
+    started = time.perf_counter()
 
-    # 데이터 전처리
-    processed_data = process_teaching_text(raw_text)
-    print("처리된 데이터:", processed_data)  # 데이터 확인용 로그
-
-    # 평가 수행
-    assessor = TeachingAssessor()
-    assessment_result = assessor.assess_teaching(processed_data)
-
-    # 리포트 생성
-    report_md = generate_fancy_report(assessment_result)
+    # 전처리 → 평가 → 리포트 생성 (단계 의존성 그래프로 겹쳐 실행)
+    # 과외 녹화 텍스트 파일은 한 번에 읽지 않고 턴 단위로 스트리밍
+    # LLM 토큰·비용은 강의 미터로 계량 (예산을 넘으면 대체 모델로 전환하거나 BudgetExceeded로 중단)
+    report_id = report_id or os.path.splitext(os.path.basename(output_file))[0]
+    tracing.tracer.reset()
+    with metering.lecture(report_id, teacher) as meter:
+        try:
+            with tracing.span("강의", "lecture", input=os.path.basename(input_file)):
+                result = asyncio.run(run_lecture_pipeline(
+                    source=input_file, max_concurrency=max_concurrency, run_dir=run_dir, resume=resume
+                ))
+        finally:
+            # 중단된 강의도 그때까지 쓴 비용은 기록
+            print(meter.summary())
+            metering.get_default_ledger().record(meter)
+    if verbose:
+        print("처리된 데이터:", result["processed_data"])  # 데이터 확인용 로그
+    report_md = result["report"]
 
     # 리포트 저장
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(report_md)
 
     print(f"리포트가 '{output_file}' 파일로 저장되었습니다.")
 
+    if teacher:
+        profile = get_default_store().record_assessment(teacher, result["assessment"], report_id)
+        if profile is not None:
+            print(f"교사 프로필 갱신: {teacher} (리포트 {profile.reports}건, 총점 평균 {profile.total.mean:.1f})")
+
+    if config.TRACE_DIR:
+        # 느린 강의 분석용 트레이스 (<리포트 이름>.trace.json / .jsonl)
+        print(tracing.tracer.summary())
+        for path in tracing.tracer.export(config.TRACE_DIR, os.path.splitext(os.path.basename(output_file))[0]):
+            print(f"트레이스 저장: {path}")
+
+    return {
+        "input": input_file,
+        "output": output_file,
+        "발화_수": len(result["processed_data"]["대화_세션"]),
+        "소요_시간": time.perf_counter() - started,
+        "LLM_호출": cache.stats["api_calls"] - api_calls_before,
+        "토큰": meter.total.tokens,
+        "비용": meter.total.cost,
+        "대체_모델_전환": meter.degraded
+    }
+
+def main():
+    # 현재 스크립트의 디렉토리를 기준으로 상대 경로 설정
+    current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    input_file = os.path.join(current_dir, 'data', '실제줌강의기반텍스트추출.txt')
+    output_file = os.path.join(current_dir, 'data', 'teaching_report_v10.md')
+
+    # 단계별·청크별 체크포인트 (--resume 또는 PIPELINE_RESUME=1이면 끝난 부분 재사용)
+    run_dir = os.path.join(config.CHECKPOINT_DIR, os.path.splitext(os.path.basename(input_file))[0])
+    resume = "--resume" in sys.argv or config.PIPELINE_RESUME
+
+    run_lecture(input_file, output_file, run_dir=run_dir, resume=resume)
+    print(get_default_cache().summary())
+    print(structured_output_stats.summary())
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,372 @@
+"""LLM 토큰·비용 계량과 강의별 예산
+
+CachedChatModel을 거치는 모든 LLM 호출은 현재 강의 미터(LectureMeter)가 있으면
+    1) 호출 전: 프롬프트 토큰(tiktoken)과 예상 응답 토큰으로 비용을 추정해 모델을 정하고,
+       캐시 미스일 때만 예산을 확인한다 (동시 호출이 함께 예산을 넘지 않도록 추정치를 예약)
+    2) 호출 후: 응답의 사용량 메타데이터로 실제 토큰·비용을 기록한다 (캐시 적중은 비용 0).
+사용량은 모델별·단계별(tracing의 stage 스팬 이름)로 나뉘며, 강의가 끝나면 UsageLedger(SQLite)에
+저장되어 강의별·단계별·교사별 비용을 조회할 수 있다.
+
+예산(LECTURE_TOKEN_BUDGET, LECTURE_COST_BUDGET, 0이면 제한 없음) 처리:
+    degrade  사용량이 예산의 BUDGET_DEGRADE_RATIO를 넘으면 이후 호출을 BUDGET_FALLBACK_MODEL로 전환
+    abort    전환 없이 진행
+어느 경우든 다음 호출이 예산을 넘을 것으로 추정되면 BudgetExceeded를 던져 파이프라인을 중단한다
+(체크포인트에 끝난 청크가 남으므로 예산을 늘려 --resume으로 이어서 실행할 수 있다).
+
+사용법: python metering.py [--teacher 교사]  (교사별·강의별 누적 비용 출력)
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import config as config
+from chunking import count_tokens
+import tracing
+
+# 모델별 가격 (USD / 100만 토큰: 입력, 출력). 모델 이름은 가장 긴 접두어로 찾음
+DEFAULT_PRICES = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60)
+}
+BUDGET_ACTIONS = ("degrade", "abort")
+# 단계 스팬 밖에서 호출된 경우의 단계 이름
+UNKNOWN_STAGE = "기타"
+
+class BudgetExceeded(Exception):
+    """강의 예산을 넘을 것으로 추정되어 LLM 호출을 중단한 경우"""
+    def __init__(self, lecture: str, kind: str, spent: float, estimate: float, limit: float):
+        unit = "USD" if kind == "cost" else "토큰"
+        super().__init__(
+            f"강의 '{lecture}' {('비용' if kind == 'cost' else '토큰')} 예산 초과: "
+            f"사용(진행 중 호출 포함) {spent:,.4g} + 다음 호출 예상 {estimate:,.4g} > 예산 {limit:,.4g} {unit}"
+        )
+        self.lecture = lecture
+        self.kind = kind
+        self.spent = spent
+        self.estimate = estimate
+        self.limit = limit
+
+def _load_prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(DEFAULT_PRICES)
+    if config.MODEL_PRICES:
+        prices.update({model: tuple(value) for model, value in json.loads(config.MODEL_PRICES).items()})
+    return prices
+
+PRICES = _load_prices()
+
+def model_price(model: Optional[str]) -> Tuple[float, float]:
+    """모델 가격 (입력, 출력 USD/100만 토큰, 모르는 모델은 0)"""
+    if not model:
+        return 0.0, 0.0
+    matches = [name for name in PRICES if model.startswith(name)]
+    return PRICES[max(matches, key=len)] if matches else (0.0, 0.0)
+
+def call_cost(model: Optional[str], prompt_tokens: float, completion_tokens: float) -> float:
+    input_price, output_price = model_price(model)
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+def current_stage() -> str:
+    """현재 tracing 스팬에서 가장 가까운 단계(stage) 이름"""
+    span = tracing.current_span()
+    while span is not None and span.category != "stage":
+        span = span.parent
+    return span.name if span is not None else UNKNOWN_STAGE
+
+@dataclass
+class Usage:
+    calls: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, other: "Usage"):
+        self.calls += other.calls
+        self.cache_hits += other.cache_hits
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cost += other.cost
+
+@dataclass(frozen=True)
+class Reservation:
+    """호출 전에 예약한 예상 사용량"""
+    model: str
+    tokens: int
+    cost: float
+
+class LectureMeter:
+    """강의 1건의 LLM 사용량·예산"""
+    def __init__(self, lecture: str, teacher: Optional[str] = None,
+                 token_budget: Optional[int] = None, cost_budget: Optional[float] = None,
+                 action: Optional[str] = None, fallback_model: Optional[str] = None,
+                 degrade_ratio: Optional[float] = None):
+        self.lecture = lecture
+        self.teacher = teacher
+        self.token_budget = config.LECTURE_TOKEN_BUDGET if token_budget is None else token_budget
+        self.cost_budget = config.LECTURE_COST_BUDGET if cost_budget is None else cost_budget
+        self.action = action or config.BUDGET_ACTION
+        if self.action not in BUDGET_ACTIONS:
+            raise ValueError(f"지원하지 않는 예산 초과 처리입니다: {self.action} ({', '.join(BUDGET_ACTIONS)})")
+        self.fallback_model = config.BUDGET_FALLBACK_MODEL if fallback_model is None else fallback_model
+        self.degrade_ratio = config.BUDGET_DEGRADE_RATIO if degrade_ratio is None else degrade_ratio
+        self.total = Usage()
+        self.by_stage: Dict[Tuple[str, str], Usage] = {}
+        self.degraded = False
+        self.aborted: Optional[str] = None
+        self._reserved_tokens = 0
+        self._reserved_cost = 0.0
+        self._lock = threading.Lock()
+
+    def _completion_estimate(self) -> int:
+        """예상 응답 토큰 (지금까지 실제 호출의 평균, 없으면 METER_COMPLETION_ESTIMATE)"""
+        if self.total.calls:
+            return max(1, self.total.completion_tokens // self.total.calls)
+        return config.METER_COMPLETION_ESTIMATE
+
+    def _over(self, tokens: float, cost: float, ratio: float = 1.0) -> Optional[str]:
+        """예약 포함 사용량 + 추정치가 예산 × ratio를 넘는 항목 ('tokens' / 'cost' / None)"""
+        if self.token_budget and self.total.tokens + self._reserved_tokens + tokens > self.token_budget * ratio:
+            return "tokens"
+        if self.cost_budget and self.total.cost + self._reserved_cost + cost > self.cost_budget * ratio:
+            return "cost"
+        return None
+
+    def estimate(self, model: str, messages: List) -> Reservation:
+        """호출할 모델과 예상 사용량 (예산 임계치에 도달했으면 대체 모델, 예산 초과여도 예외 없음)
+
+        모델은 캐시 키에 들어가므로 캐시 조회 전에 정하고, 예산 확인은 캐시 미스일 때만 reserve로 한다.
+        """
+        prompt_tokens = sum(count_tokens(str(message.content)) for message in messages)
+        with self._lock:
+            completion_tokens = self._completion_estimate()
+            tokens = prompt_tokens + completion_tokens
+            if (not self.degraded and self.action == "degrade" and self.fallback_model
+                    and self._over(tokens, call_cost(model, prompt_tokens, completion_tokens), self.degrade_ratio)):
+                self.degraded = True
+                print(
+                    f"Warning: 강의 '{self.lecture}' LLM 사용량이 예산의 {self.degrade_ratio:.0%}에 도달해 "
+                    f"이후 호출을 {self.fallback_model} 모델로 전환합니다"
+                )
+            if self.degraded:
+                model = self.fallback_model
+        return Reservation(model, tokens, call_cost(model, prompt_tokens, completion_tokens))
+
+    def reserve(self, estimate: Reservation) -> Reservation:
+        """예상 사용량 예약 (예산을 넘으면 BudgetExceeded)"""
+        with self._lock:
+            kind = self._over(estimate.tokens, estimate.cost)
+            if kind:
+                spent = self.total.tokens + self._reserved_tokens if kind == "tokens" else self.total.cost + self._reserved_cost
+                limit = self.token_budget if kind == "tokens" else self.cost_budget
+                error = BudgetExceeded(
+                    self.lecture, kind, spent, estimate.tokens if kind == "tokens" else estimate.cost, limit
+                )
+                self.aborted = str(error)
+                raise error
+            self._reserved_tokens += estimate.tokens
+            self._reserved_cost += estimate.cost
+        return estimate
+
+    def release(self, reservation: Reservation):
+        """예약 취소 (호출 실패 시)"""
+        with self._lock:
+            self._reserved_tokens -= reservation.tokens
+            self._reserved_cost -= reservation.cost
+
+    def record(self, reservation: Reservation, response=None, cache_hit: bool = False):
+        """실제 사용량 기록 후 예약 해제 (캐시 적중은 예약 없이 토큰·비용 0으로 기록)"""
+        usage = Usage(cache_hits=1) if cache_hit else Usage(calls=1)
+        if not cache_hit and response is not None:
+            tokens = tracing.token_usage(response)
+            usage.prompt_tokens = tokens["prompt_tokens"]
+            usage.completion_tokens = tokens["completion_tokens"]
+            usage.cost = call_cost(reservation.model, usage.prompt_tokens, usage.completion_tokens)
+        stage = current_stage()
+        with self._lock:
+            if not cache_hit:
+                self._reserved_tokens -= reservation.tokens
+                self._reserved_cost -= reservation.cost
+            self.total.add(usage)
+            self.by_stage.setdefault((stage, reservation.model), Usage()).add(usage)
+
+    def stage_totals(self) -> Dict[str, Usage]:
+        """단계별 합계 (모델 구분 없이)"""
+        totals: Dict[str, Usage] = {}
+        for (stage, _), usage in self.by_stage.items():
+            totals.setdefault(stage, Usage()).add(usage)
+        return totals
+
+    def summary(self) -> str:
+        budget = []
+        if self.token_budget:
+            budget.append(f"토큰 예산 {self.token_budget:,}")
+        if self.cost_budget:
+            budget.append(f"비용 예산 ${self.cost_budget:.2f}")
+        lines = [
+            f"LLM 사용량: 호출 {self.total.calls} (캐시 {self.total.cache_hits}), "
+            f"토큰 {self.total.prompt_tokens:,}/{self.total.completion_tokens:,}, 비용 ${self.total.cost:.4f}"
+            + (f" ({', '.join(budget)})" if budget else "")
+        ]
+        for stage, usage in self.stage_totals().items():
+            lines.append(
+                f"  - {stage}: 호출 {usage.calls}, 토큰 {usage.prompt_tokens:,}/{usage.completion_tokens:,}, "
+                f"${usage.cost:.4f}"
+            )
+        if self.degraded:
+            lines.append(f"  예산 임계치 도달로 {self.fallback_model} 모델로 전환됨")
+        if self.aborted:
+            lines.append(f"  중단: {self.aborted}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict:
+        return {
+            "lecture": self.lecture,
+            "teacher": self.teacher,
+            "total": asdict(self.total),
+            "by_stage": [
+                dict(stage=stage, model=model, **asdict(usage))
+                for (stage, model), usage in self.by_stage.items()
+            ],
+            "degraded": self.degraded,
+            "aborted": self.aborted
+        }
+
+_current_meter: ContextVar[Optional[LectureMeter]] = ContextVar("current_meter", default=None)
+
+def current_meter() -> Optional[LectureMeter]:
+    return _current_meter.get()
+
+@contextmanager
+def lecture(name: str, teacher: Optional[str] = None, **budget) -> Iterator[LectureMeter]:
+    """강의 1건의 LLM 호출을 미터로 계량 (asyncio 태스크·to_thread에도 전달됨)"""
+    meter = LectureMeter(name, teacher, **budget)
+    token = _current_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _current_meter.reset(token)
+
+class UsageLedger:
+    """강의별·단계별·모델별 사용량 누적 기록 (SQLite)"""
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or config.USAGE_LEDGER_PATH
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS usage (
+                    lecture TEXT NOT NULL,
+                    teacher TEXT,
+                    stage TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    calls INTEGER NOT NULL,
+                    cache_hits INTEGER NOT NULL,
+                    prompt_tokens INTEGER NOT NULL,
+                    completion_tokens INTEGER NOT NULL,
+                    cost REAL NOT NULL,
+                    recorded_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_usage_teacher ON usage (teacher)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_usage_lecture ON usage (lecture)")
+            self._conn.commit()
+        return self._conn
+
+    def record(self, meter: LectureMeter):
+        """강의 미터의 단계·모델별 사용량 저장"""
+        now = time.time()
+        rows = [
+            (meter.lecture, meter.teacher, stage, model, usage.calls, usage.cache_hits,
+             usage.prompt_tokens, usage.completion_tokens, usage.cost, now)
+            for (stage, model), usage in meter.by_stage.items()
+        ]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("INSERT INTO usage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+
+    def _totals(self, group_by: str, where: str = "", params: Tuple = ()) -> List[Dict]:
+        with self._lock:
+            rows = self._connect().execute(
+                f"""
+                SELECT {group_by} AS name, SUM(calls) AS calls, SUM(cache_hits) AS cache_hits,
+                       SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens,
+                       SUM(cost) AS cost, COUNT(DISTINCT lecture) AS lectures
+                FROM usage {where} GROUP BY {group_by} ORDER BY cost DESC
+                """,
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def by_teacher(self) -> List[Dict]:
+        return self._totals("teacher")
+
+    def by_lecture(self, teacher: Optional[str] = None) -> List[Dict]:
+        if teacher is None:
+            return self._totals("lecture")
+        return self._totals("lecture", "WHERE teacher = ?", (teacher,))
+
+    def by_stage(self, teacher: Optional[str] = None) -> List[Dict]:
+        if teacher is None:
+            return self._totals("stage")
+        return self._totals("stage", "WHERE teacher = ?", (teacher,))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+_default_ledger: Optional[UsageLedger] = None
+
+def get_default_ledger() -> UsageLedger:
+    global _default_ledger
+    if _default_ledger is None:
+        _default_ledger = UsageLedger()
+    return _default_ledger
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 사용량·비용 조회")
+    parser.add_argument("--teacher", default=None, help="교사 한 명의 강의별·단계별 비용")
+    args = parser.parse_args()
+
+    ledger = get_default_ledger()
+    groups = (
+        [("강의별", ledger.by_lecture(args.teacher)), ("단계별", ledger.by_stage(args.teacher))]
+        if args.teacher else
+        [("교사별", ledger.by_teacher()), ("단계별", ledger.by_stage())]
+    )
+    for title, rows in groups:
+        print(f"{title} LLM 비용")
+        for row in rows:
+            print(
+                f"  {row['name'] or '(교사 없음)'}: ${row['cost']:.4f}, 강의 {row['lectures']}건, "
+                f"호출 {row['calls']} (캐시 {row['cache_hits']}), "
+                f"토큰 {row['prompt_tokens']:,}/{row['completion_tokens']:,}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import re
+import numpy as np
+from utterance_store import UtteranceStore, UtteranceView
+
+# 학생 참여/즉각 피드백 분석에서 학생으로 취급하는 화자
+STUDENT_SPEAKERS = ("Michael", "Abby")
+
+@dataclass(frozen=True)
+class PatternRule:
+    name: str                  # 결과에 기록되는 이름 (전략명, 질문 유형, 키워드 등)
+    phrases: Tuple[str, ...]   # 소문자로 변환된 발화에 하나라도 포함되면 일치하는 ASCII 소문자 구문
+
+# 스캐폴딩 전략 (교사 발화, 일치하는 전략마다 예시 기록)
+SCAFFOLDING_RULES = (
+    PatternRule("단계별 분해", ("let's break this down", "lets break this down")),
+    PatternRule("이전 학습 연계", ("remember when we",)),
+    PatternRule("사고 확장", ("think about what happens if",)),
+    PatternRule("설명 유도", ("can you explain why",)),
+)
+
+# 질문 유형 (블룸의 분류, 교사 발화, 먼저 일치한 유형 하나만 집계)
+QUESTION_TYPE_RULES = (
+    PatternRule("지식", ("what is",)),
+    PatternRule("분석", ("why do you think",)),
+)
+
+# 피드백 유형 (교사 발화, 긍정 강화가 우선)
+POSITIVE_FEEDBACK_RULES = (
+    PatternRule("good", ("good",)),
+    PatternRule("excellent", ("excellent",)),
+    PatternRule("right", ("right",)),
+)
+CORRECTIVE_FEEDBACK_RULES = (
+    PatternRule("instead", ("instead",)),
+    PatternRule("try", ("try",)),
+)
+
+# 학생 참여 (STUDENT_SPEAKERS 발화)
+STUDENT_RULES = (
+    PatternRule("자발적_질문", ("?",)),
+    PatternRule("문제해결_시도", ("i think",)),
+)
+
+# 수업 주제 키워드 (전체 발화)
+SUBJECT_KEYWORDS = (
+    "fraction", "multiply", "divide", "add", "subtract",
+    "equation", "problem solving", "pizza", "pumpkin"
+)
+
+# 발화 구분자 (발화 텍스트에 포함될 수 없는 바이트)
+UTTERANCE_SEPARATOR = "\x00"
+# 유니코드 소문자 변환 시 ASCII 문자가 되는 비ASCII 문자 (İ → i̇, K(켈빈) → k)
+_ASCII_LOWERING_CHARS = ("İ", "K")
+
+def compile_ascii_patterns(patterns: Iterable[str]) -> List["re.Pattern"]:
+    """소문자 버퍼에 적용할 바이트 정규식으로 컴파일"""
+    compiled = []
+    for pattern in patterns:
+        # 버퍼는 ASCII 범위만 소문자화하므로 규칙도 ASCII 소문자로 제한
+        if not pattern.isascii() or pattern != pattern.lower():
+            raise ValueError(f"패턴 규칙은 ASCII 소문자여야 합니다: {pattern}")
+        compiled.append(re.compile(pattern.encode()))
+    return compiled
+
+def lower_utterance_buffer(texts: List[str]) -> Tuple[bytes, np.ndarray]:
+    """발화를 하나의 소문자 UTF-8 버퍼로 합치고 각 발화의 시작 위치 계산"""
+    joined = UTTERANCE_SEPARATOR.join(texts)
+    if any(char in joined for char in _ASCII_LOWERING_CHARS):
+        buffer = UTTERANCE_SEPARATOR.join(text.lower() for text in texts).encode()
+    else:
+        # ASCII 규칙만 검사하므로 바이트 단위 ASCII 소문자화로 충분
+        buffer = joined.encode().lower()
+    separators = np.flatnonzero(np.frombuffer(buffer, dtype=np.uint8) == 0)
+    if len(separators) != max(len(texts) - 1, 0):
+        raise ValueError("발화 텍스트에 구분자(\\x00)가 포함되어 있습니다")
+    starts = np.concatenate(([0], separators + 1)) if texts else separators
+    return buffer, starts
+
+def utterance_hits(regex: "re.Pattern", buffer: bytes, starts: np.ndarray) -> np.ndarray:
+    """규칙이 등장하는 발화 여부 (발화 수 길이의 bool 배열)"""
+    hits = np.zeros(len(starts), dtype=bool)
+    positions = np.fromiter((match.start() for match in regex.finditer(buffer)), dtype=np.int64)
+    if positions.size:
+        hits[np.searchsorted(starts, positions, side="right") - 1] = True
+    return hits
+
+# 영문 텍스트의 문자 빈도(%) (앵커는 텍스트에서 드물게 나올 바이그램으로 고름)
+_CHAR_FREQUENCY = {
+    " ": 18.0, "e": 10.2, "t": 7.5, "a": 6.5, "o": 6.2, "i": 5.7, "n": 5.7, "s": 5.3, "r": 5.0,
+    "h": 4.9, "d": 3.4, "l": 3.3, "u": 2.3, "c": 2.2, "m": 2.0, "f": 1.8, "w": 1.7, "g": 1.6,
+    "p": 1.5, "y": 1.4, "b": 1.2, "v": 0.8, "k": 0.6, "x": 0.15, "j": 0.1, "q": 0.1, "z": 0.07
+}
+# 구문 앞뒤의 임의 문자 (한두 글자 구문의 앵커용)
+_ANY_BYTE = tuple(range(256))
+# 구문 번호를 담는 비트 수 (위치와 함께 정수 하나로 정렬)
+_PHRASE_BITS = 8
+
+# 자주 나오는 영문 바이그램 빈도(%) (나머지는 두 문자 빈도의 곱으로 추정)
+_BIGRAM_FREQUENCY = {
+    "th": 3.6, "he": 3.1, "in": 2.4, "er": 2.1, "an": 2.0, "re": 1.9, "on": 1.8, "at": 1.5,
+    "en": 1.5, "nd": 1.4, "ti": 1.3, "es": 1.3, "or": 1.3, "te": 1.2, "of": 1.2, "ed": 1.2,
+    "is": 1.1, "it": 1.1, "al": 1.1, "ar": 1.1, "st": 1.1, "to": 1.0, "nt": 1.0, "ng": 1.0,
+    "se": 0.9, "ha": 0.9, "as": 0.9, "ou": 0.9, "io": 0.8, "le": 0.8, "ve": 0.8, "co": 0.8,
+    "me": 0.8, "de": 0.8, "hi": 0.8, "ri": 0.7, "ro": 0.7, "ic": 0.7, "ne": 0.7, "ea": 0.7,
+    "ra": 0.7, "ce": 0.7, "li": 0.6, "ch": 0.6, "ll": 0.6, "be": 0.6, "ma": 0.6, "si": 0.6,
+    # 단어 경계 (단어 첫 글자·끝 글자 빈도 × 공백 빈도)
+    " t": 2.9, " a": 2.1, " s": 1.4, " o": 1.4, " i": 1.3, " w": 1.0, " c": 0.9, " b": 0.8,
+    "e ": 3.4, "s ": 2.5, "t ": 2.0, "d ": 1.8, "n ": 1.6, "y ": 1.3, "r ": 1.1, "o ": 0.8
+}
+
+def _pair_frequency(pair: str) -> float:
+    if pair in _BIGRAM_FREQUENCY:
+        return _BIGRAM_FREQUENCY[pair]
+    first, second = (_CHAR_FREQUENCY.get(char, 0.5) for char in pair)
+    return first * second / 100
+
+def _anchor_cost(window: bytes) -> float:
+    """세 글자 구간 abc의 두 바이그램(ab, bc)이 텍스트에서 나올 상대 빈도"""
+    window = window.decode()
+    return _pair_frequency(window[:2]) + _pair_frequency(window[1:])
+
+def _case_variants(byte: int) -> Tuple[int, ...]:
+    return (byte, byte ^ 0x20) if 0x61 <= byte <= 0x7a else (byte,)
+
+class PhraseMatcher:
+    """여러 ASCII 소문자 구문을 전체 텍스트에서 한 번에 찾는 매처
+
+    텍스트를 문자당 1바이트(ASCII는 그대로, 그 외는 128 이상)로 바꾼 뒤 짝수 위치의 2바이트
+    쌍을 65536칸 표에 한 번 대조한다. 구문마다 인접한 두 바이그램을 표에 올려 두면 구문이
+    어느 위치에서 시작하든 둘 중 하나는 짝수 위치에 걸리므로 텍스트 전체를 훑는 연산은
+    이 한 번뿐이다. 표에 걸린 후보만 8바이트 단위로 구문 전체를 대조하고(대소문자는 0x20
+    비트로 무시), 일치 위치를 발화 번호로 바꾼다.
+    """
+    def __init__(self, phrases: Sequence[str]):
+        self.phrases = list(dict.fromkeys(phrases))
+        if len(self.phrases) >= 1 << _PHRASE_BITS:
+            raise ValueError(f"구문은 {(1 << _PHRASE_BITS) - 1}개까지 지원합니다")
+        for phrase in self.phrases:
+            if not phrase or not phrase.isascii() or phrase != phrase.lower():
+                raise ValueError(f"패턴 구문은 ASCII 소문자여야 합니다: {phrase!r}")
+        self.lengths = np.array([len(phrase) for phrase in self.phrases], dtype=np.int64)
+
+        # 바이그램 → [(구문 번호, 바이그램 위치 기준 구문 시작 오프셋, 8바이트 대조 목록)]
+        anchors: Dict[int, List[Tuple[int, int, tuple]]] = {}
+        for index, phrase in enumerate(self.phrases):
+            codes = phrase.encode()
+            if len(codes) >= 3:
+                # 두 바이그램이 가장 드물게 나올 세 글자 구간
+                k = min(range(len(codes) - 2), key=lambda k: _anchor_cost(codes[k:k + 3]))
+                pairs = [(codes[k:k + 1], codes[k + 1:k + 2], k), (codes[k + 1:k + 2], codes[k + 2:k + 3], k + 1)]
+            elif len(codes) == 2:
+                pairs = [(codes[0:1], codes[1:2], 0), (None, codes[0:1], -1)]
+            else:
+                pairs = [(codes, None, 0), (None, codes, -1)]
+            checks = tuple(self._word_check(codes[start:start + 8], start) for start in range(0, len(codes), 8))
+            for first, second, offset in pairs:
+                firsts = _case_variants(first[0]) if first else _ANY_BYTE
+                seconds = _case_variants(second[0]) if second else _ANY_BYTE
+                # 앵커 바이그램(구문의 offset, offset + 1번째 글자)이 구문 전체를 덮으면 대조 생략
+                covered = set(range(len(codes))) <= {offset, offset + 1}
+                for a in firsts:
+                    for b in seconds:
+                        anchors.setdefault(a | (b << 8), []).append((index, offset, () if covered else checks))
+
+        # 같은 후보 목록을 공유하는 바이그램은 같은 그룹 번호 (0은 후보 아님)
+        groups: Dict[Tuple[Tuple[int, int, tuple], ...], int] = {}
+        self._table = np.zeros(1 << 16, dtype=np.uint8)
+        for key, entries in anchors.items():
+            self._table[key] = groups.setdefault(tuple(entries), len(groups) + 1)
+        if len(groups) > 255:
+            raise ValueError("구문 앵커 그룹이 너무 많습니다")
+        self._groups = list(groups)
+
+    @staticmethod
+    def _word_check(chunk: bytes, start: int) -> Tuple[int, np.uint64, Optional[np.uint64], np.uint64]:
+        """구문 8바이트 조각 대조용 (시작 오프셋, 대소문자 비트, 유효 바이트 마스크(8바이트면 None), 기대값)"""
+        fold = bytes(0x20 if 0x61 <= byte <= 0x7a else 0 for byte in chunk)
+        return (
+            start,
+            np.uint64(int.from_bytes(fold, "little")),
+            np.uint64(int.from_bytes(b"\xff" * len(chunk), "little")) if len(chunk) < 8 else None,
+            np.uint64(int.from_bytes(chunk, "little"))
+        )
+
+    @staticmethod
+    def _fold(text: str) -> np.ndarray:
+        """문자당 1바이트 배열 (ASCII는 코드 그대로, 그 외는 128 이상, 끝에 0 8바이트)"""
+        size = len(text)
+        if text.isascii():
+            return np.frombuffer(text.encode("ascii") + bytes(8), dtype=np.uint8)
+        encoded = text.encode("utf-16-le")
+        if len(encoded) == 2 * size:
+            units = np.frombuffer(encoded, dtype="<u2")
+        else:  # BMP 밖 문자(서로게이트 쌍)가 있으면 문자 위치를 맞추기 위해 UTF-32
+            units = np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+        folded = np.zeros(size + 8, dtype=np.uint8)
+        low = folded[:size]
+        np.copyto(low, units, casting="unsafe")
+        # 하위 바이트가 ASCII처럼 보여도 최상위 비트를 세워 일치하지 않게 함
+        high = np.greater(units, 127).view(np.uint8)
+        np.left_shift(high, 7, out=high)
+        low |= high
+        return folded
+
+    def find(self, text: str, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """구문 일치 (발화 번호 배열, 구문 번호 배열), offsets는 발화 경계 (발화 수 + 1)
+
+        발화 경계에 걸친 일치는 제외하며, 한 발화에서 같은 구문이 여러 번 나오면 중복된다.
+        """
+        if any(char in text for char in _ASCII_LOWERING_CHARS):
+            # 소문자 변환으로 ASCII가 되는 문자가 있으면 발화별로 소문자화한 텍스트에서 검색
+            bounds = offsets.tolist()
+            texts = [text[start:end].lower() for start, end in zip(bounds, bounds[1:])]
+            lowered_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+            np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)), out=lowered_offsets[1:])
+            return self.find("".join(texts), lowered_offsets)
+
+        size = len(text)
+        folded = self._fold(text)
+        # 인덱스가 uint16이라 표(65536칸) 범위를 벗어나지 않으므로 범위 검사 없는 clip 모드
+        group_ids = self._table.take(np.ndarray(((size + 1) // 2,), dtype="<u2", buffer=folded), mode="clip")
+        positions = np.flatnonzero(group_ids != 0)
+        group_ids = group_ids[positions]
+        positions *= 2
+        order = np.argsort(group_ids, kind="stable")
+        bounds = np.cumsum(np.bincount(group_ids, minlength=len(self._groups) + 1)).tolist()
+        positions = positions[order]
+
+        # 후보 위치에서 구문 전체를 8바이트씩 대조 (정렬되지 않은 위치도 읽을 수 있는 보폭 1 뷰)
+        words = np.ndarray((size + 1,), dtype="<u8", buffer=folded, strides=(1,))
+        found = []
+        for group_id, entries in enumerate(self._groups, 1):
+            candidates = positions[bounds[group_id - 1]:bounds[group_id]]
+            if not candidates.size:
+                continue
+            for index, offset, checks in entries:
+                starts = candidates - offset
+                # 그룹 안의 후보는 오름차순이므로 양 끝만 보고 텍스트 밖 시작 위치 제외
+                if starts[0] < 0 or starts[-1] >= size:
+                    starts = starts[(starts >= 0) & (starts < size)]
+                for start, fold, keep, value in checks:
+                    if not starts.size:
+                        break
+                    chunk = words[starts + start] | fold
+                    if keep is not None:
+                        chunk &= keep
+                    starts = starts[chunk == value]
+                found.append((starts << _PHRASE_BITS) | index)
+
+        # 위치 순으로 정렬한 뒤 발화마다 시작 위치가 속한 일치 구간을 찾고, 경계를 넘는 일치는 제외
+        keys = np.sort(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+        starts = keys >> _PHRASE_BITS
+        indices = keys & ((1 << _PHRASE_BITS) - 1)
+        per_utterance = np.diff(np.searchsorted(starts, offsets))
+        utterances = np.repeat(np.arange(len(offsets) - 1), per_utterance)
+        inside = starts + self.lengths[indices] <= offsets[utterances + 1]
+        return utterances[inside], indices[inside]
+
+def _columns(conversations) -> Tuple[str, np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    """(전체 텍스트, 발화 경계, 교사 여부, 학생 여부, 발화 텍스트 목록 또는 None)"""
+    if isinstance(conversations, (UtteranceStore, UtteranceView)):
+        store = conversations if isinstance(conversations, UtteranceStore) else conversations.store
+        start, stop = (0, len(store)) if conversations is store else (conversations.start, conversations.stop)
+        offsets = np.frombuffer(store.offsets, dtype=np.int64)[start:stop + 1]
+        text = store.buffer if conversations is store else store.buffer[offsets[0]:offsets[-1]]
+        codes = np.frombuffer(store.codes, dtype=np.uint16)[start:stop]
+        teacher_codes = np.array([speaker == "Teacher" for speaker in store.speakers], dtype=bool)
+        student_codes = np.array([speaker in STUDENT_SPEAKERS for speaker in store.speakers], dtype=bool)
+        return text, offsets - offsets[0], teacher_codes[codes], student_codes[codes], None
+
+    conversations = list(conversations)
+    speakers = np.array([speaker for speaker, _ in conversations], dtype=object)
+    texts = [text for _, text in conversations]
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)), out=offsets[1:])
+    is_student = np.zeros(len(texts), dtype=bool)
+    for name in STUDENT_SPEAKERS:
+        is_student |= speakers == name
+    return "".join(texts), offsets, speakers == "Teacher", is_student, texts
+
+class TeachingPatternEngine:
+    """교수·피드백·주제 패턴을 한 번에 분석하는 엔진
+
+    모든 규칙의 구문은 생성 시 하나의 PhraseMatcher로 묶인다. 분석할 때는 발화 전체를
+    이어 붙인 텍스트(UtteranceStore/뷰는 공유 버퍼를 그대로 사용)를 한 번만 훑어 모든 구문의
+    일치 발화를 구하고, 규칙별 결과는 발화 수 길이의 bool 배열 연산으로 집계한다.
+    발화마다 lower()/re.search를 반복하지 않는다.
+    """
+    def __init__(self):
+        self._matcher = PhraseMatcher(
+            [phrase for rule in self._rules() for phrase in rule.phrases] + list(SUBJECT_KEYWORDS)
+        )
+        self._phrase_index = {phrase: index for index, phrase in enumerate(self._matcher.phrases)}
+
+    @staticmethod
+    def _rules() -> Tuple[PatternRule, ...]:
+        return (
+            SCAFFOLDING_RULES + QUESTION_TYPE_RULES + POSITIVE_FEEDBACK_RULES
+            + CORRECTIVE_FEEDBACK_RULES + STUDENT_RULES
+        )
+
+    def analyze(self, conversations: Iterable[Tuple[str, str]]) -> Dict:
+        """대화 세션을 분석해 패턴별 집계 결과 반환"""
+        text, offsets, is_teacher, is_student, texts = _columns(conversations)
+        count = len(offsets) - 1
+        utterances, indices = self._matcher.find(text, offsets)
+        present = np.zeros((len(self._matcher.phrases), count), dtype=bool)
+        present[indices, utterances] = True
+
+        def hits(rule: PatternRule, speakers: np.ndarray) -> np.ndarray:
+            matched = np.zeros(count, dtype=bool)
+            for phrase in rule.phrases:
+                matched |= present[self._phrase_index[phrase]]
+            return matched & speakers
+
+        def any_hit(rules: Sequence[PatternRule]) -> np.ndarray:
+            combined = np.zeros(count, dtype=bool)
+            for rule in rules:
+                combined |= hits(rule, is_teacher)
+            return combined
+
+        # 스캐폴딩: 일치한 (발화, 규칙) 쌍을 발화 순서 → 규칙 선언 순서로 기록
+        scaffolding_matrix = np.array([hits(rule, is_teacher) for rule in SCAFFOLDING_RULES])
+        utterance_indices, rule_indices = np.nonzero(scaffolding_matrix.T)
+        names = [rule.name for rule in SCAFFOLDING_RULES]
+        if texts is None:
+            bounds = offsets.tolist()
+            examples = [text[bounds[index]:bounds[index + 1]] for index in utterance_indices.tolist()]
+        else:
+            examples = [texts[index] for index in utterance_indices.tolist()]
+        scaffolding = [
+            {"전략": names[rule_index], "예시": example}
+            for rule_index, example in zip(rule_indices.tolist(), examples)
+        ]
+
+        # 질문 유형: 앞선 유형에 일치하지 않은 발화만 다음 유형으로 집계
+        question_types = {}
+        remaining = np.ones(count, dtype=bool)
+        for rule in QUESTION_TYPE_RULES:
+            matched = remaining & hits(rule, is_teacher)
+            question_types[rule.name] = int(matched.sum())
+            remaining &= ~matched
+
+        positive = any_hit(POSITIVE_FEEDBACK_RULES)
+        corrective = any_hit(CORRECTIVE_FEEDBACK_RULES) & ~positive
+
+        # 학생 발화 바로 다음에 이어진 교사 발화
+        immediate_feedback = int((is_student[:-1] & is_teacher[1:]).sum())
+
+        subjects = {
+            keyword for keyword in SUBJECT_KEYWORDS
+            if present[self._phrase_index[keyword]].any()
+        }
+
+        return {
+            "스캐폴딩": scaffolding,
+            "질문_유형": question_types,
+            "학생_참여": {
+                rule.name: int(hits(rule, is_student).sum()) for rule in STUDENT_RULES
+            },
+            "피드백_분석": {
+                "즉각_피드백": immediate_feedback,
+                "긍정_강화": int(positive.sum()),
+                "교정_피드백": int(corrective.sum())
+            },
+            "수업_주제": subjects
+        }
+
+    def apply(self, processed_data: Dict) -> Dict:
+        """분석 결과를 processed_data의 각 카운터에 누적"""
+        result = self.analyze(processed_data["대화_세션"])
+
+        processed_data["교사_전략"]["스캐폴딩"].extend(result["스캐폴딩"])
+        for question_type, count in result["질문_유형"].items():
+            processed_data["교사_전략"]["질문_유형"][question_type] += count
+        for key, count in result["학생_참여"].items():
+            processed_data["학생_참여"][key] += count
+        for key, count in result["피드백_분석"].items():
+            processed_data["피드백_분석"][key] += count
+        processed_data["수업_주제"] = result["수업_주제"]
+
+        return processed_data
+
+# 구문 표 구성은 프로세스당 한 번만 수행
+default_engine = TeachingPatternEngine()
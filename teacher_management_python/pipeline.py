@@ -0,0 +1,208 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import os
+import time
+from data_processing import TeachingDataProcessor, TranscriptSource
+from assess import TeachingAssessor
+from report import generate_fancy_report
+from utterance_store import UtteranceStore
+from checkpoint import RunCheckpoint, content_hash
+from blob_store import artifact_sha256
+import tracing
+
+class StageGraph:
+    """단계 의존성 그래프 실행기
+
+    각 단계는 선행 단계의 결과가 모두 준비되는 즉시 시작된다.
+    코루틴 함수는 이벤트 루프에서, 일반 함수는 스레드에서 실행된다.
+    """
+    def __init__(self):
+        self.stages: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def add_stage(self, name: str, func: Callable, deps: Iterable[str] = ()):
+        """단계 등록 (선행 단계의 결과가 deps 순서대로 인자로 전달됨)"""
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"등록되지 않은 선행 단계입니다: {dep}")
+        if name in self.stages:
+            raise ValueError(f"이미 등록된 단계입니다: {name}")
+        self.stages[name] = (func, deps)
+
+    async def run(self) -> Dict[str, Any]:
+        """모든 단계를 실행하고 단계별 결과 반환"""
+        started = time.perf_counter()
+        self.timings = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str, func: Callable, deps: Tuple[str, ...]) -> Any:
+            inputs = [await tasks[dep] for dep in deps]
+            stage_started = time.perf_counter()
+            with tracing.span(name, "stage"):
+                if asyncio.iscoroutinefunction(func):
+                    result = await func(*inputs)
+                else:
+                    result = await asyncio.to_thread(func, *inputs)
+            self.timings[name] = {
+                "시작": stage_started - started,
+                "종료": time.perf_counter() - started
+            }
+            return result
+
+        # 단계는 선행 단계 이후에만 등록되므로 등록 순서가 곧 위상 정렬 순서
+        for name, (func, deps) in self.stages.items():
+            tasks[name] = asyncio.create_task(run_stage(name, func, deps))
+
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return dict(zip(tasks.keys(), results))
+
+    def critical_path_time(self) -> float:
+        """의존성을 따라 가장 오래 걸리는 경로의 소요 시간"""
+        finish: Dict[str, float] = {}
+        for name, (_, deps) in self.stages.items():
+            timing = self.timings.get(name, {"시작": 0.0, "종료": 0.0})
+            duration = timing["종료"] - timing["시작"]
+            finish[name] = max([finish[dep] for dep in deps], default=0.0) + duration
+        return max(finish.values(), default=0.0)
+
+    def print_timings(self):
+        """단계별 소요 시간 및 임계 경로 대비 실제 소요 시간 출력"""
+        total = 0.0
+        for name, timing in self.timings.items():
+            duration = timing["종료"] - timing["시작"]
+            total += duration
+            print(f"[{name}] {timing['시작']:.2f}s → {timing['종료']:.2f}s ({duration:.2f}초)")
+        wall_time = max([timing["종료"] for timing in self.timings.values()], default=0.0)
+        print(
+            f"파이프라인 완료: 실제 {wall_time:.2f}초 / 임계 경로 {self.critical_path_time():.2f}초 "
+            f"/ 단계 합계 {total:.2f}초"
+        )
+
+class LecturePipeline:
+    """추출 → (패턴 분석 | 질적 분석) → 청크 평가 → 최종 점수 → 리포트
+
+    질적 분석과 청크 평가는 서로의 결과를 기다리지 않고 겹쳐 실행되며,
+    두 단계의 LLM 호출은 하나의 동시 호출 제한(max_concurrency)을 공유한다.
+    청크 평가 프롬프트에는 아직 진행 중인 질적 분석 결과가 들어가지 않고,
+    질적 분석은 최종 점수 산출 단계에서 합류한다.
+    통합 분석(fused) 모드에서는 질적 분석 단계 없이 청크 평가가 두 결과를 함께 만든다.
+
+    run_dir를 지정하면 추출·패턴 분석·최종 점수 단계와 청크별 LLM 결과를 체크포인트로
+    기록하고, resume=True이면 같은 입력의 이전 실행에서 끝난 부분을 재사용한다.
+    """
+    def __init__(self, max_concurrency: Optional[int] = None, fused: Optional[bool] = None,
+                 run_dir: Optional[str] = None, resume: bool = False):
+        self.assessor = TeachingAssessor(max_concurrency, fused=fused)
+        self.graph: Optional[StageGraph] = None
+        self.run_dir = run_dir
+        self.resume = resume
+        self.checkpoint: Optional[RunCheckpoint] = None
+
+    @staticmethod
+    def _input_hash(raw_text: str, source: Optional[TranscriptSource]) -> str:
+        if source is None:
+            return content_hash(raw_text)
+        if isinstance(source, (str, os.PathLike)):
+            # 저장소로 옮겨진 transcript.json은 manifest의 SHA-256 (원본 파일 해시와 같은 값)
+            return artifact_sha256(os.fspath(source))
+        raise ValueError("체크포인트를 사용하려면 전사본 파일 경로나 텍스트가 필요합니다")
+
+    async def run(self, raw_text: str = "", source: Optional[TranscriptSource] = None) -> Dict:
+        processor = TeachingDataProcessor(raw_text, source=source)
+        processed_data = processor.processed_data
+        semaphore = asyncio.Semaphore(self.assessor.max_concurrency)
+
+        checkpoint = None
+        if self.run_dir:
+            checkpoint = RunCheckpoint(self.run_dir, self._input_hash(raw_text, source), self.resume)
+        self.checkpoint = checkpoint
+        processor.checkpoint = checkpoint
+        self.assessor.checkpoint = checkpoint
+
+        def extract() -> UtteranceStore:
+            saved = checkpoint.load_stage("추출") if checkpoint else None
+            if saved is not None:
+                return processor.set_conversations(UtteranceStore.from_dict(saved))
+            conversations = processor.extract_conversations()
+            if checkpoint:
+                checkpoint.save_stage("추출", conversations.to_dict())
+            return conversations
+
+        def analyze_patterns(_conversations) -> Dict:
+            pattern_keys = ["교사_전략", "학생_참여", "피드백_분석", "수업_주제"]
+            saved = checkpoint.load_stage("패턴_분석") if checkpoint else None
+            if saved is not None:
+                processed_data.update(saved)
+                processed_data["수업_주제"] = set(saved["수업_주제"])
+                return processed_data
+            processor.analyze_patterns()
+            if checkpoint:
+                checkpoint.save_stage("패턴_분석", {key: processed_data[key] for key in pattern_keys})
+            return processed_data
+
+        async def analyze_qualitative(_conversations) -> Dict:
+            return await processor.analyze_qualitative_async(semaphore)
+
+        async def assess_chunks(_conversations, _patterns) -> List[Dict]:
+            # 질적 분석은 동시에 채워지고 있으므로 청크 프롬프트에서는 제외
+            chunk_input = dict(processed_data, 질적_분석={})
+            return await self.assessor.assess_chunks_async(chunk_input, semaphore)
+
+        def score(chunk_assessments: List[Dict], *_qualitative) -> Dict:
+            # 청크 결과나 질적 분석이 바뀌면 최종 점수도 다시 산출
+            inputs_hash = content_hash(
+                chunk_assessments, processed_data["질적_분석"], processed_data["핵심_지표"],
+                self.assessor.fused
+            ) if checkpoint else None
+            saved = checkpoint.load_stage("최종_점수", inputs_hash) if checkpoint else None
+            if saved is not None:
+                processed_data["질적_분석"] = saved["질적_분석"]
+                return saved["assessment"]
+            assessment = self.assessor.finalize_assessment(chunk_assessments, processed_data)
+            if checkpoint:
+                checkpoint.save_stage("최종_점수", {
+                    "assessment": assessment,
+                    "질적_분석": processed_data["질적_분석"]
+                }, inputs_hash)
+            return assessment
+
+        def render(assessment_result: Dict) -> str:
+            return generate_fancy_report(assessment_result)
+
+        graph = StageGraph()
+        graph.add_stage("추출", extract)
+        graph.add_stage("패턴_분석", analyze_patterns, ["추출"])
+        graph.add_stage("청크_평가", assess_chunks, ["추출", "패턴_분석"])
+        if self.assessor.fused:
+            graph.add_stage("최종_점수", score, ["청크_평가"])
+        else:
+            graph.add_stage("질적_분석", analyze_qualitative, ["추출"])
+            graph.add_stage("최종_점수", score, ["청크_평가", "질적_분석"])
+        graph.add_stage("리포트", render, ["최종_점수"])
+        self.graph = graph
+
+        results = await graph.run()
+        graph.print_timings()
+        if checkpoint:
+            print(checkpoint.summary())
+
+        return {
+            "processed_data": processed_data,
+            "assessment": results["최종_점수"],
+            "report": results["리포트"]
+        }
+
+async def run_lecture_pipeline(raw_text: str = "", max_concurrency: Optional[int] = None,
+                               source: Optional[TranscriptSource] = None,
+                               fused: Optional[bool] = None, run_dir: Optional[str] = None,
+                               resume: bool = False) -> Dict:
+    """편의 함수"""
+    pipeline = LecturePipeline(max_concurrency, fused=fused, run_dir=run_dir, resume=resume)
+    return await pipeline.run(raw_text, source=source)
@@ -1,10 +1,73 @@
 from typing import Dict, List, Tuple
+from chunking import count_tokens
 
 class TeachingPrompts:
     SCORING_SYSTEM_PROMPT = "당신은 매우 엄격한 교육 평가 전문가입니다."
+    FUSED_SYSTEM_PROMPT = "당신은 매우 엄격한 교육 평가 전문가입니다. 반드시 지정된 JSON 형식으로만 응답합니다."
+    
+    ASSESSMENT_JSON_INSTRUCTION = (
+        "응답은 세부_평가(영역별 근거를 포함한 평가 서술), 우수점(특히 우수한 부분 목록), "
+        "개선점(개선이 필요한 부분 목록) 항목을 가진 JSON으로 작성해주세요."
+    )
+    
+    # 청크 평가 응답의 JSON 스키마
+    ASSESSMENT_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "세부_평가": {"type": "string"},
+            "우수점": {"type": "array", "items": {"type": "string"}},
+            "개선점": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["세부_평가", "우수점", "개선점"],
+        "additionalProperties": False
+    }
+    
+    # 영역별 점수 응답의 JSON 스키마 (0-20점 정수)
+    SCORES_SCHEMA = {
+        "type": "object",
+        "properties": {
+            area: {"type": "integer", "minimum": 0, "maximum": 20}
+            for area in ("학생_참여", "개념_설명", "피드백", "체계성", "상호작용")
+        },
+        "required": ["학생_참여", "개념_설명", "피드백", "체계성", "상호작용"],
+        "additionalProperties": False
+    }
+    
+    # 질적 분석 응답의 JSON 스키마
+    QUALITATIVE_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "교사_전문성": {"type": "array", "items": {"type": "string"}},
+            "수업_담화": {"type": "array", "items": {"type": "string"}},
+            "학습_환경": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["교사_전문성", "수업_담화", "학습_환경"],
+        "additionalProperties": False
+    }
+    
+    # 통합 청크 분석(질적 분석 + 청크 평가) 응답의 JSON 스키마
+    FUSED_CHUNK_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "교사_전문성": {"type": "array", "items": {"type": "string"}},
+            "수업_담화": {"type": "array", "items": {"type": "string"}},
+            "학습_환경": {"type": "array", "items": {"type": "string"}},
+            "세부_평가": {"type": "string"},
+            "우수점": {"type": "array", "items": {"type": "string"}},
+            "개선점": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["교사_전문성", "수업_담화", "학습_환경", "세부_평가", "우수점", "개선점"],
+        "additionalProperties": False
+    }
+    
+    # 요약 블록에 넣는 예시/질적 분석 항목의 최대 길이(문자)와 개수
+    SUMMARY_EXAMPLE_CHARS = 80
+    SUMMARY_ITEMS_PER_CATEGORY = 2
     
     @staticmethod
     def get_assessment_prompt(chunk_data: Dict) -> str:
+        if "lecture_summary" in chunk_data or "chunk_metrics" in chunk_data:
+            return TeachingPrompts._get_compact_assessment_prompt(chunk_data)
         return f"""
 다음 수업 데이터를 분석하여 평가해주세요:
 
@@ -18,8 +81,109 @@ class TeachingPrompts:
 {TeachingPrompts._format_conversations(chunk_data['대화_세션'])}
 
 각 영역별로 구체적인 근거와 함께 평가해주세요.
+{TeachingPrompts.ASSESSMENT_JSON_INSTRUCTION}
+"""
+
+    @staticmethod
+    def _get_compact_assessment_prompt(chunk_data: Dict) -> str:
+        """요약 컨텍스트(summary) 또는 청크 자체 지표(local)만 포함한 평가 프롬프트"""
+        if "lecture_summary" in chunk_data:
+            context_title, context = "수업 전체 요약", chunk_data["lecture_summary"]
+        else:
+            context_title, context = "이 구간의 지표", chunk_data["chunk_metrics"]
+        return f"""
+다음 수업 데이터를 분석하여 평가해주세요:
+
+1. {context_title}:
+{context}
+
+2. 대화 내용:
+{TeachingPrompts._format_conversations(chunk_data['대화_세션'])}
+
+각 영역별로 구체적인 근거와 함께 평가해주세요.
+{TeachingPrompts.ASSESSMENT_JSON_INSTRUCTION}
+"""
+
+    @staticmethod
+    def get_fused_analysis_prompt(chunk_data: Dict) -> str:
+        """질적 분석과 청크 평가를 한 번의 호출로 요청하는 프롬프트 (JSON 응답)"""
+        if "lecture_summary" in chunk_data:
+            context = f"수업 전체 요약:\n{chunk_data['lecture_summary']}"
+        elif "chunk_metrics" in chunk_data:
+            context = f"이 구간의 지표:\n{chunk_data['chunk_metrics']}"
+        else:
+            context = f"정량적 지표:\n{TeachingPrompts._format_metrics(chunk_data)}"
+        return f"""
+다음 수업 데이터를 분석하여 평가해주세요.
+
+1. {context}
+
+2. 대화 내용:
+{TeachingPrompts._format_conversations(chunk_data['대화_세션'])}
+
+아래 항목을 JSON으로 응답해주세요. 각 목록 항목에는 대화 속 구체적인 예시를 포함해주세요.
+- 교사_전문성: 개념 설명의 명확성, 학생 이해도 점검, 교사 전략의 적절성에 대한 분석 목록
+- 수업_담화: 대화의 질, 질문의 수준, 피드백의 효과성에 대한 분석 목록
+- 학습_환경: 학생 참여도, 상호작용의 질, 수업 분위기에 대한 분석 목록
+- 세부_평가: 각 영역별 구체적인 근거를 포함한 평가 서술
+- 우수점: 특히 우수한 부분 목록
+- 개선점: 개선이 필요한 부분 목록
 """
 
+    @staticmethod
+    def build_lecture_summary(data: Dict, max_tokens: int) -> str:
+        """지표·교사 전략·질적 분석을 max_tokens 이내의 요약 블록으로 정리
+        
+        0인 지표는 생략하고 스캐폴딩은 전략별 횟수와 짧은 예시 하나만 남긴다.
+        토큰 한도를 넘으면 우선순위가 낮은 뒤쪽 줄부터 생략한다.
+        """
+        lines = []
+        
+        def add_counts(label: str, counts: Dict):
+            nonzero = {key: value for key, value in counts.items() if value}
+            if nonzero:
+                lines.append(f"- {label}: " + ", ".join(f"{key} {value}" for key, value in nonzero.items()))
+        
+        add_counts("핵심_지표", data.get("핵심_지표", {}))
+        strategies = data.get("교사_전략", {})
+        add_counts("질문_유형", strategies.get("질문_유형", {}))
+        
+        scaffolding: Dict[str, List[str]] = {}
+        for item in strategies.get("스캐폴딩", []):
+            scaffolding.setdefault(item["전략"], []).append(item["예시"])
+        if scaffolding:
+            lines.append("- 스캐폴딩: " + ", ".join(
+                f"{strategy} {len(examples)}회 "
+                f"(예: \"{TeachingPrompts._shorten(examples[0], TeachingPrompts.SUMMARY_EXAMPLE_CHARS)}\")"
+                for strategy, examples in scaffolding.items()
+            ))
+        
+        add_counts("학생_참여", data.get("학생_참여", {}))
+        add_counts("피드백_분석", data.get("피드백_분석", {}))
+        
+        for category, items in data.get("질적_분석", {}).items():
+            if items:
+                shown = [
+                    TeachingPrompts._shorten(str(item), TeachingPrompts.SUMMARY_EXAMPLE_CHARS)
+                    for item in items[:TeachingPrompts.SUMMARY_ITEMS_PER_CATEGORY]
+                ]
+                lines.append(f"- {category} ({len(items)}건): " + " / ".join(shown))
+        
+        if not lines:
+            return "- (집계된 지표 없음)"
+        
+        if count_tokens("\n".join(lines)) > max_tokens:
+            omitted = "- ...(이하 생략)"
+            while len(lines) > 1 and count_tokens("\n".join(lines + [omitted])) > max_tokens:
+                lines.pop()
+            lines.append(omitted)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _shorten(text: str, limit: int) -> str:
+        text = " ".join(text.split())
+        return text if len(text) <= limit else text[:limit - 1] + "…"
+
     @staticmethod
     def get_scoring_prompt(detailed_eval: str, qualitative_analysis: Dict, metrics: Dict) -> str:
         return f"""
@@ -3,6 +3,33 @@ from dataclasses import dataclass
 from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 import config as config
+from llm_cache import CachedChatModel
+from structured_output import StructuredOutputClient
+
+# 유사 문제 생성 응답의 JSON 스키마
+PROBLEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "문제": {"type": "string"},
+        "풀이": {"type": "string"},
+        "교사_팁": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["문제", "풀이", "교사_팁"],
+    "additionalProperties": False
+}
+
+# 개념 팝업 응답의 JSON 스키마
+CONCEPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "핵심_개념": {"type": "array", "items": {"type": "string"}},
+        "오개념": {"type": "array", "items": {"type": "string"}},
+        "교수_팁": {"type": "array", "items": {"type": "string"}},
+        "심화_학습": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["핵심_개념", "오개념", "교수_팁", "심화_학습"],
+    "additionalProperties": False
+}
 
 @dataclass
 class ProblemTemplate:
@@ -13,11 +40,13 @@ class ProblemTemplate:
 
 class AIBookGenerator:
     def __init__(self):
-        self.llm = ChatOpenAI(
+        self.llm = CachedChatModel(ChatOpenAI(
             api_key=config.OPENAI_API_KEY,
             model="gpt-4.1-2025-04-14",
             temperature=0.7
-        )
+        ))
+        # JSON 스키마 검증 + 실패한 호출만 재시도
+        self.structured = StructuredOutputClient(self.llm)
         
     def generate_similar_problem(self, template: ProblemTemplate) -> Dict:
         """유사 문제 생성"""
@@ -32,13 +61,13 @@ class AIBookGenerator:
 1. 문제는 명확하고 학습 목표에 부합해야 합니다.
 2. 풀이 과정은 단계별로 자세히 설명해주세요.
 3. 교사가 수업에서 바로 활용할 수 있도록 작성해주세요.
+
+응답은 문제, 풀이, 교사_팁(목록) 항목을 가진 JSON으로 작성해주세요.
 """
-        response = self.llm.invoke([
+        return self.structured.invoke([
             SystemMessage(content="당신은 숙련된 교사입니다."),
             HumanMessage(content=prompt)
-        ])
-        
-        return self._parse_problem_response(response.content)
+        ], PROBLEM_SCHEMA, "similar_problem", fallback=self._parse_problem_response)
     
     def generate_concept_popup(self, concept: str) -> Dict:
         """개념 팝업 생성"""
@@ -52,13 +81,13 @@ class AIBookGenerator:
 2. 학생들이 자주 겪는 오개념
 3. 교수 팁 (실생활 예시, 시각화 방법 등)
 4. 심화 학습 연계 포인트
+
+응답은 핵심_개념, 오개념, 교수_팁, 심화_학습 항목에 각각 문장 목록을 담은 JSON으로 작성해주세요.
 """
-        response = self.llm.invoke([
+        return self.structured.invoke([
             SystemMessage(content="당신은 교육과정 전문가입니다."),
             HumanMessage(content=prompt)
-        ])
-        
-        return self._parse_concept_response(response.content)
+        ], CONCEPT_SCHEMA, "concept_popup", fallback=self._parse_concept_response)
     
     def _parse_problem_response(self, response: str) -> Dict:
         """문제 생성 응답 파싱"""
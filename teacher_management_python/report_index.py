@@ -0,0 +1,361 @@
+"""public/reports 아카이브 점수 인덱스
+
+public/reports/<교사>/<시각>/analysis.json의 교사, 리포트 ID, 시각, 영역별 점수 5개,
+우수점/개선점/highlights 개수를 SQLite 파일 하나에 보관한다. update()는 파일의
+수정 시각(ns)과 크기가 바뀐 analysis.json만 다시 파싱하고 사라진 리포트는 삭제하므로,
+관리자 화면·통계 조회는 JSON을 열지 않고 인덱스에 대한 SQL만 실행한다.
+
+analysis.json은 형식이 섞여 있다.
+    - UTF-8 BOM이 붙은 파일
+    - {"scores": {...}, "우수점": [...], ...} 객체 (점수 키가 '학생_참여도', '학생 참여도' 등으로 다름)
+    - 초기 버전의 평가 본문 문자열 ("1. 학생 참여도: 16/20 ... 우수점: 1. ...")
+점수 키는 SCORE_AREAS(파이프라인의 SCORES_SCHEMA와 같은 이름)로 통일한다.
+
+사용법: python report_index.py [--reports-dir DIR] [--index PATH] [--teacher 교사]
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import config as config
+
+# 인덱스의 점수 영역 (파이프라인 점수 스키마와 같은 키)
+SCORE_AREAS = ("학생_참여", "개념_설명", "피드백", "체계성", "상호작용")
+
+# 아카이브에 섞여 있는 점수 키 → 영역 (키에 포함된 핵심어로 판별)
+SCORE_ALIASES = (
+    ("참여", "학생_참여"),
+    ("개념", "개념_설명"),
+    ("피드백", "피드백"),
+    ("체계", "체계성"),
+    ("상호작용", "상호작용")
+)
+
+# 점수 영역 → SQL 컬럼 이름
+_COLUMNS = {area: f"score_{index}" for index, area in enumerate(SCORE_AREAS)}
+_SCORE_LINE_RE = re.compile(r"^\s*(?:\d+\.\s*)?([^:：]+)[:：]\s*(\d+(?:\.\d+)?)")
+_SECTION_RE = re.compile(r"^\s*(우수점|개선점)\s*[:：]?\s*$")
+_ITEM_RE = re.compile(r"^\s*(?:\d+[.)]|[-•*])\s*\S")
+
+def score_area(key: str) -> Optional[str]:
+    """점수 키('학생 참여도', '수업_체계성' 등)를 SCORE_AREAS 이름으로 변환 (모르는 키는 None)"""
+    for keyword, area in SCORE_ALIASES:
+        if keyword in key:
+            return area
+    return None
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = re.search(r"\d+(?:\.\d+)?", value)
+        return float(match.group()) if match else None
+    return None
+
+def _count(value) -> int:
+    return len(value) if isinstance(value, list) else 0
+
+def parse_text_analysis(text: str) -> Dict:
+    """초기 형식의 평가 본문 문자열에서 점수와 우수점/개선점 개수 추출"""
+    scores: Dict[str, float] = {}
+    counts = {"우수점": 0, "개선점": 0}
+    section = None
+    for line in text.splitlines():
+        heading = _SECTION_RE.match(line)
+        if heading:
+            section = heading.group(1)
+            continue
+        if section:
+            if _ITEM_RE.match(line):
+                counts[section] += 1
+            continue
+        match = _SCORE_LINE_RE.match(line)
+        if match:
+            area = score_area(match.group(1))
+            if area and area not in scores:
+                scores[area] = float(match.group(2))
+    return {"scores": scores, "우수점": counts["우수점"], "개선점": counts["개선점"], "highlights": 0}
+
+def parse_analysis(data) -> Dict:
+    """analysis.json 내용(객체 또는 문자열)을 인덱스 항목으로 변환"""
+    if isinstance(data, str):
+        return dict(parse_text_analysis(data), format="text")
+    if not isinstance(data, dict):
+        raise ValueError(f"지원하지 않는 analysis.json 형식입니다: {type(data).__name__}")
+    scores = {}
+    for key, value in (data.get("scores") or {}).items():
+        area = score_area(key)
+        number = _number(value)
+        if area and number is not None:
+            scores[area] = number
+    return {
+        "scores": scores,
+        "우수점": _count(data.get("우수점")),
+        "개선점": _count(data.get("개선점")),
+        "highlights": _count(data.get("highlights")),
+        "title": data.get("title"),
+        "uploadDate": data.get("uploadDate"),
+        "format": "json"
+    }
+
+class ReportIndex:
+    """analysis.json 점수 인덱스 (SQLite, 수정 시각·크기 기준 증분 갱신)"""
+    def __init__(self, path: Optional[str] = None, reports_dir: Optional[str] = None):
+        self.path = path or config.REPORT_INDEX_PATH
+        self.reports_dir = reports_dir or config.REPORTS_DIR
+        self.stats = {"scanned": 0, "updated": 0, "removed": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            score_columns = ",\n".join(f"{column} REAL" for column in _COLUMNS.values())
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS reports (
+                    path TEXT PRIMARY KEY,
+                    teacher TEXT NOT NULL,
+                    report_id TEXT NOT NULL,
+                    timestamp INTEGER,
+                    title TEXT,
+                    upload_date TEXT,
+                    format TEXT,
+                    {score_columns},
+                    total REAL,
+                    strengths INTEGER NOT NULL DEFAULT 0,
+                    improvements INTEGER NOT NULL DEFAULT 0,
+                    highlights INTEGER NOT NULL DEFAULT 0,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    error TEXT
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reports_teacher ON reports (teacher, timestamp)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_timestamp ON reports (timestamp)")
+            self._conn.commit()
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _scan(self) -> Iterable[Tuple[str, str, str, os.stat_result]]:
+        """(경로, 교사, 리포트 ID, stat) — <교사>/<리포트>/analysis.json만 확인"""
+        if not os.path.isdir(self.reports_dir):
+            return
+        for teacher in os.scandir(self.reports_dir):
+            # 산출물 저장소(.blobs) 등 숨김 디렉토리 제외
+            if not teacher.is_dir() or teacher.name.startswith("."):
+                continue
+            for report in os.scandir(teacher.path):
+                if not report.is_dir():
+                    continue
+                path = os.path.join(report.path, "analysis.json")
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, teacher.name, report.name, stat
+
+    def _row(self, path: str, teacher: str, report_id: str, stat: os.stat_result) -> Dict:
+        row = {
+            "path": path, "teacher": teacher, "report_id": report_id,
+            "timestamp": int(report_id) if report_id.isdigit() else None,
+            "title": None, "upload_date": None, "format": None, "total": None,
+            "strengths": 0, "improvements": 0, "highlights": 0,
+            "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "error": None
+        }
+        row.update(dict.fromkeys(_COLUMNS.values()))
+        try:
+            # 일부 파일은 UTF-8 BOM으로 시작
+            with open(path, encoding="utf-8-sig") as f:
+                parsed = parse_analysis(json.load(f))
+        except (OSError, ValueError) as e:
+            # 깨진 파일도 stat을 기록해 두어 바뀌기 전까지 다시 파싱하지 않음
+            row["error"] = f"{type(e).__name__}: {e}"
+            return row
+        for area, value in parsed["scores"].items():
+            row[_COLUMNS[area]] = value
+        if parsed["scores"]:
+            row["total"] = sum(parsed["scores"].values())
+        row.update({
+            "title": parsed.get("title"),
+            "upload_date": parsed.get("uploadDate"),
+            "format": parsed["format"],
+            "strengths": parsed["우수점"],
+            "improvements": parsed["개선점"],
+            "highlights": parsed["highlights"]
+        })
+        return row
+
+    def update(self) -> Dict:
+        """바뀐 analysis.json만 다시 읽어 인덱스 갱신 후 이번 갱신 통계 반환"""
+        started = time.perf_counter()
+        with self._lock:
+            conn = self._connect()
+            known = {
+                row["path"]: (row["mtime_ns"], row["size"])
+                for row in conn.execute("SELECT path, mtime_ns, size FROM reports")
+            }
+            changed = []
+            seen = set()
+            for path, teacher, report_id, stat in self._scan():
+                seen.add(path)
+                if known.get(path) != (stat.st_mtime_ns, stat.st_size):
+                    changed.append(self._row(path, teacher, report_id, stat))
+            removed = [path for path in known if path not in seen]
+
+            if changed:
+                columns = list(changed[0])
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO reports ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    [tuple(row[column] for column in columns) for row in changed]
+                )
+            if removed:
+                conn.executemany("DELETE FROM reports WHERE path = ?", [(path,) for path in removed])
+            conn.commit()
+
+        result = {
+            "scanned": len(seen),
+            "updated": len(changed),
+            "removed": len(removed),
+            "errors": sum(1 for row in changed if row["error"]),
+            "seconds": time.perf_counter() - started
+        }
+        for key in self.stats:
+            self.stats[key] += result[key]
+        return result
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    @staticmethod
+    def _report(row: sqlite3.Row) -> Dict:
+        return {
+            "teacher": row["teacher"],
+            "report_id": row["report_id"],
+            "timestamp": row["timestamp"],
+            "title": row["title"],
+            "scores": {area: row[column] for area, column in _COLUMNS.items() if row[column] is not None},
+            "total": row["total"],
+            "우수점": row["strengths"],
+            "개선점": row["improvements"],
+            "highlights": row["highlights"]
+        }
+
+    def teachers(self) -> List[str]:
+        return [row["teacher"] for row in self._query("SELECT DISTINCT teacher FROM reports ORDER BY teacher")]
+
+    def teacher_reports(self, teacher: str, since: Optional[int] = None, until: Optional[int] = None) -> List[Dict]:
+        """교사의 리포트 목록 (시각순, since/until은 ms 타임스탬프)"""
+        where, params = self._time_filter(since, until)
+        rows = self._query(
+            f"SELECT * FROM reports WHERE teacher = ? AND error IS NULL {where} ORDER BY timestamp",
+            (teacher,) + params
+        )
+        return [self._report(row) for row in rows]
+
+    @staticmethod
+    def _time_filter(since: Optional[int], until: Optional[int]) -> Tuple[str, Tuple]:
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("AND timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("AND timestamp < ?")
+            params.append(until)
+        return " ".join(clauses), tuple(params)
+
+    def _summaries(self, group_by: Optional[str], where: str, params: Tuple) -> List[Dict]:
+        averages = ", ".join(f"AVG({column}) AS {column}" for column in _COLUMNS.values())
+        select_group = f"{group_by}, " if group_by else ""
+        rows = self._query(
+            f"""
+            SELECT {select_group}COUNT(*) AS reports, COUNT(total) AS scored, {averages},
+                   AVG(total) AS total, MIN(total) AS min_total, MAX(total) AS max_total,
+                   SUM(strengths) AS strengths, SUM(improvements) AS improvements,
+                   SUM(highlights) AS highlights, MIN(timestamp) AS first, MAX(timestamp) AS last
+            FROM reports WHERE error IS NULL {where}
+            {f"GROUP BY {group_by} ORDER BY {group_by}" if group_by else ""}
+            """,
+            params
+        )
+        return [
+            {
+                **({"teacher": row["teacher"]} if group_by else {}),
+                "리포트_수": row["reports"],
+                "점수_리포트_수": row["scored"],
+                "영역별_평균": {area: row[column] for area, column in _COLUMNS.items()},
+                "총점_평균": row["total"],
+                "총점_최저": row["min_total"],
+                "총점_최고": row["max_total"],
+                "우수점": row["strengths"] or 0,
+                "개선점": row["improvements"] or 0,
+                "highlights": row["highlights"] or 0,
+                "첫_리포트": row["first"],
+                "마지막_리포트": row["last"]
+            }
+            for row in rows
+        ]
+
+    def teacher_summary(self, teacher: str, since: Optional[int] = None, until: Optional[int] = None) -> Dict:
+        """교사 한 명의 영역별 평균·총점 범위·개수 합계"""
+        where, params = self._time_filter(since, until)
+        summary = self._summaries(None, f"AND teacher = ? {where}", (teacher,) + params)[0]
+        return dict(summary, teacher=teacher)
+
+    def cohort_summary(self, teachers: Optional[List[str]] = None, since: Optional[int] = None,
+                       until: Optional[int] = None) -> Dict:
+        """교사 집단(기본 전체)의 전체 요약과 교사별 요약"""
+        where, params = self._time_filter(since, until)
+        if teachers is not None:
+            if not teachers:
+                return {"전체": self._summaries(None, "AND 0", ())[0], "교사별": []}
+            where = f"AND teacher IN ({', '.join('?' * len(teachers))}) {where}"
+            params = tuple(teachers) + params
+        return {
+            "전체": self._summaries(None, where, params)[0],
+            "교사별": self._summaries("teacher", where, params)
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="리포트 아카이브 점수 인덱스 갱신·조회")
+    parser.add_argument("--reports-dir", default=None, help="리포트 디렉토리 (기본 REPORTS_DIR)")
+    parser.add_argument("--index", default=None, help="인덱스 파일 (기본 REPORT_INDEX_PATH)")
+    parser.add_argument("--teacher", default=None, help="교사별 요약 출력")
+    args = parser.parse_args()
+
+    index = ReportIndex(args.index, args.reports_dir)
+    result = index.update()
+    print(
+        f"인덱스 갱신: 리포트 {result['scanned']}개 확인, {result['updated']}개 갱신, "
+        f"{result['removed']}개 삭제, 오류 {result['errors']}개 ({result['seconds'] * 1000:.1f}ms)"
+    )
+    if args.teacher:
+        summaries = [index.teacher_summary(args.teacher)]
+    else:
+        summaries = index.cohort_summary()["교사별"]
+    for summary in summaries:
+        average = "점수 없음" if summary["총점_평균"] is None else f"총점 평균 {summary['총점_평균']:.1f}"
+        print(f"  {summary['teacher']}: 리포트 {summary['리포트_수']}개, {average}")
+    index.close()
+
+if __name__ == "__main__":
+    main()
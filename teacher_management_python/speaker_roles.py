@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from patterns import compile_ascii_patterns, lower_utterance_buffer, utterance_hits
+
+# 교사 발화에 자주 나오는 표현 (소문자 기준 부분 일치)
+TEACHER_PATTERNS = (
+    "let's", "look at", "can anyone", "tell me",
+    "does anyone", "remember", "explain",
+    "understand", "question", "next",
+    "class", "everyone", "please"
+)
+
+# 화자별 특징 (특징 행렬의 열 순서)
+FEATURES = ("패턴_일치", "평균_발화_길이", "발화_수", "질문_비율")
+
+# 특징별 교사 점수 가중치 (기존 규칙: 패턴 ×2, 평균 길이 ×0.5, 발화 수 ×0.3)
+DEFAULT_WEIGHTS = (2.0, 0.5, 0.3, 5.0)
+
+@dataclass(frozen=True)
+class SpeakerRole:
+    speaker: str
+    role: str            # "Teacher" 또는 "Student"
+    confidence: float    # 교사일 확률 (화자 간 softmax, 합계 1)
+    score: float         # 가중 합 점수
+    features: Dict[str, float]
+
+class SpeakerRoleClassifier:
+    """화자별 특징 행렬을 만들어 교사 화자를 판별하는 분류기
+
+    발화 전체를 하나의 소문자 버퍼로 합쳐 미리 컴파일한 패턴을 버퍼 단위로 한 번씩만
+    검사하고, 화자별 집계는 np.bincount로 계산한다. 점수는 특징 행렬 × 가중치이며,
+    confidence는 점수를 temperature로 나눈 softmax(화자 간 교사일 확률)이다.
+    """
+    def __init__(self, patterns: Sequence[str] = TEACHER_PATTERNS,
+                 weights: Sequence[float] = DEFAULT_WEIGHTS, temperature: float = 10.0):
+        if len(weights) != len(FEATURES):
+            raise ValueError(f"가중치는 {len(FEATURES)}개여야 합니다: {FEATURES}")
+        if temperature <= 0:
+            raise ValueError("temperature는 0보다 커야 합니다")
+        self._patterns = compile_ascii_patterns(patterns)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.temperature = temperature
+
+    def features(self, speakers: Sequence[str], texts: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """화자 목록(첫 등장 순서)과 특징 행렬 (화자 수 × len(FEATURES)) 반환"""
+        if len(speakers) != len(texts):
+            raise ValueError("화자와 발화 수가 다릅니다")
+        if not speakers:
+            return [], np.zeros((0, len(FEATURES)))
+
+        # 화자 번호는 첫 등장 순서 (문자열 정렬 없이 한 번에 부여)
+        speaker_codes: Dict[str, int] = {}
+        codes = np.fromiter(
+            (speaker_codes.setdefault(speaker, len(speaker_codes)) for speaker in speakers),
+            dtype=np.int64, count=len(speakers)
+        )
+        speaker_count = len(speaker_codes)
+
+        buffer, starts = lower_utterance_buffer(list(texts))
+        # 발화별 일치한 패턴 수 (패턴마다 발화당 한 번만 집계)
+        pattern_hits = np.zeros(len(texts), dtype=np.int64)
+        for regex in self._patterns:
+            pattern_hits += utterance_hits(regex, buffer, starts)
+        questions = np.zeros(len(texts), dtype=bool)
+        positions = np.flatnonzero(np.frombuffer(buffer, dtype=np.uint8) == ord("?"))
+        if positions.size:
+            questions[np.searchsorted(starts, positions, side="right") - 1] = True
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+
+        turns = np.bincount(codes, minlength=speaker_count).astype(np.float64)
+        matrix = np.column_stack((
+            np.bincount(codes, weights=pattern_hits, minlength=speaker_count),
+            np.bincount(codes, weights=lengths, minlength=speaker_count) / turns,
+            turns,
+            np.bincount(codes, weights=questions, minlength=speaker_count) / turns
+        ))
+        return list(speaker_codes), matrix
+
+    def classify(self, speakers: Sequence[str], texts: Sequence[str]) -> Dict[str, SpeakerRole]:
+        """화자별 역할과 교사 확률 (점수가 가장 높은 화자 한 명만 Teacher)"""
+        labels, matrix = self.features(speakers, texts)
+        if not labels:
+            return {}
+        scores = matrix @ self.weights
+        scaled = (scores - scores.max()) / self.temperature
+        confidence = np.exp(scaled) / np.exp(scaled).sum()
+        teacher = int(np.argmax(scores))
+        return {
+            label: SpeakerRole(
+                speaker=label,
+                role="Teacher" if index == teacher else "Student",
+                confidence=float(confidence[index]),
+                score=float(scores[index]),
+                features=dict(zip(FEATURES, matrix[index].tolist()))
+            )
+            for index, label in enumerate(labels)
+        }
+
+    def label(self, utterances: Iterable, roles: Optional[Dict[str, SpeakerRole]] = None) -> List[Dict]:
+        """speaker/text 속성을 가진 발화 목록을 교사/학생으로 변환"""
+        utterances = list(utterances)
+        speakers = [utterance.speaker for utterance in utterances]
+        texts = [utterance.text for utterance in utterances]
+        roles = roles if roles is not None else self.classify(speakers, texts)
+        return [
+            {"speaker": roles[speaker].role, "text": text}
+            for speaker, text in zip(speakers, texts)
+        ]
+
+# 패턴 컴파일은 프로세스당 한 번만 수행
+default_classifier = SpeakerRoleClassifier()
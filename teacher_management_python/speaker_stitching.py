@@ -0,0 +1,177 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from speaker_roles import SpeakerRole, SpeakerRoleClassifier, default_classifier
+
+# 화자 프로필 (청크 간 같은 화자 판별에 쓰는 특징) 항목별 비교 척도
+PROFILE_FEATURES = ("패턴_비율", "평균_발화_길이(log)", "질문_비율", "발화_비중", "발화_시간_비중")
+PROFILE_SCALES = np.array([0.3, 0.3, 0.15, 0.2, 0.2])
+
+@dataclass
+class GlobalSpeaker:
+    """청크를 가로질러 합쳐진 화자의 누적 통계"""
+    label: str
+    pattern_hits: float = 0.0
+    total_length: float = 0.0
+    turns: float = 0.0
+    questions: float = 0.0
+    turn_share: float = 0.0      # 청크별 발화 비중의 합
+    talk_share: float = 0.0      # 청크별 발화 시간 비중의 합
+    chunks: int = 0
+    local_labels: List[str] = field(default_factory=list)
+
+    def profile(self) -> np.ndarray:
+        return np.array([
+            self.pattern_hits / self.turns,
+            np.log1p(self.total_length / self.turns),
+            self.questions / self.turns,
+            self.turn_share / self.chunks,
+            self.talk_share / self.chunks
+        ])
+
+def _speaker_label(index: int) -> str:
+    """AssemblyAI와 같은 A, B, C ... 라벨 (26명 이후는 S27 형식)"""
+    return chr(ord("A") + index) if index < 26 else f"S{index + 1}"
+
+class SpeakerStitcher:
+    """청크별 화자 분리 결과를 강의 전체의 화자·시간축으로 합치는 단계
+
+    청크마다 AssemblyAI 화자 라벨(A, B, ...)과 시간(ms)이 0부터 다시 시작하므로,
+    청크의 각 화자를 화자 프로필(패턴 비율, 평균 발화 길이, 질문 비율, 발화 비중)이
+    가장 가까운 전역 화자에 배정한다. 청크 경계에서 말이 끊긴 화자는 다음 청크 첫 화자와
+    같은 사람일 가능성이 높아 continuity_bonus를 더한다. 유사도가 threshold 미만이면
+    새 전역 화자로 등록한다(max_speakers에 도달한 뒤에는 새로 만들지 않고, 전역 화자보다 많은
+    청크 화자는 가장 비슷한 전역 화자에 합친다).
+    청크는 순서대로 add_chunk에 전달해야 하지만 전사 자체는 순서와 무관하게 병렬로 끝나도 된다.
+    """
+    def __init__(self, classifier: Optional[SpeakerRoleClassifier] = None,
+                 threshold: float = 0.2, continuity_bonus: float = 0.1,
+                 boundary_gap_ms: int = 2000, max_speakers: Optional[int] = None):
+        self.classifier = classifier or default_classifier
+        self.threshold = threshold
+        self.continuity_bonus = continuity_bonus
+        self.boundary_gap_ms = boundary_gap_ms
+        self.max_speakers = max_speakers
+        self.speakers: List[GlobalSpeaker] = []
+        self.utterances: List[Dict] = []
+        self._boundary_end: Optional[float] = None
+
+    def _local_profiles(self, utterances: Sequence[Dict]):
+        """청크 내 화자별 통계와 프로필 행렬"""
+        speakers = [utterance["speaker"] for utterance in utterances]
+        texts = [utterance["text"] for utterance in utterances]
+        labels, matrix = self.classifier.features(speakers, texts)
+        pattern_hits, average_length, turns, question_rate = matrix.T
+
+        talk = dict.fromkeys(labels, 0.0)
+        for utterance in utterances:
+            talk[utterance["speaker"]] += max(0, (utterance.get("end") or 0) - (utterance.get("start") or 0))
+        talk_time = np.array([talk[label] for label in labels])
+        talk_share = talk_time / talk_time.sum() if talk_time.sum() else np.zeros(len(labels))
+
+        profiles = np.column_stack((
+            pattern_hits / turns,
+            np.log1p(average_length),
+            question_rate,
+            turns / turns.sum(),
+            talk_share
+        ))
+        return labels, matrix, talk_share, profiles
+
+    def _similarity(self, profiles: np.ndarray) -> np.ndarray:
+        """청크 화자 × 전역 화자 유사도 (0~1)"""
+        known = np.array([speaker.profile() for speaker in self.speakers])
+        distance = np.abs(profiles[:, None, :] - known[None, :, :]) / PROFILE_SCALES
+        return np.exp(-distance.mean(axis=2))
+
+    def _assign(self, labels: List[str], profiles: np.ndarray, first_speaker: Optional[str]) -> Dict[str, int]:
+        """유사도가 높은 쌍부터 탐욕적으로 배정 (한 청크의 두 화자가 같은 전역 화자가 되지 않도록, 화자 수가 찼으면 예외)"""
+        if not self.speakers:
+            return {}
+        similarity = self._similarity(profiles)
+        if first_speaker is not None and self.utterances:
+            # 경계에서 이어진 발화: 이전 청크 마지막 화자와 이번 청크 첫 화자
+            previous = self._global_index(self.utterances[-1]["speaker"])
+            similarity[labels.index(first_speaker), previous] += self.continuity_bonus
+
+        # 예상 화자 수에 도달하면 새 화자를 만들지 않고 가장 가까운 화자에 배정
+        full = self.max_speakers is not None and len(self.speakers) >= self.max_speakers
+        assignment = {}
+        used = set()
+        for flat in np.argsort(-similarity, axis=None, kind="stable"):
+            local, known = np.unravel_index(flat, similarity.shape)
+            if similarity[local, known] < self.threshold and not full:
+                break
+            if labels[local] in assignment or known in used:
+                continue
+            assignment[labels[local]] = int(known)
+            used.add(int(known))
+        if full:
+            # 전역 화자보다 많은 청크 화자는 유사도가 가장 높은 전역 화자에 합침 (여러 청크 화자가 같은 화자로 갈 수 있음)
+            for local, label in enumerate(labels):
+                if label not in assignment:
+                    assignment[label] = int(np.argmax(similarity[local]))
+        return assignment
+
+    def _global_index(self, label: str) -> int:
+        return next(index for index, speaker in enumerate(self.speakers) if speaker.label == label)
+
+    def add_chunk(self, utterances: Sequence[Dict], offset_ms: float = 0) -> List[Dict]:
+        """청크 발화(speaker/text/start/end)를 전역 화자·강의 시간으로 변환해 추가
+
+        Returns:
+            이번 청크의 변환된 발화 목록 (speaker는 전역 라벨, start/end는 강의 기준 ms)
+        """
+        utterances = [utterance for utterance in utterances if utterance.get("text")]
+        if not utterances:
+            return []
+        labels, matrix, talk_share, profiles = self._local_profiles(utterances)
+
+        # 청크 시작 직후에 시작한 첫 발화는 이전 청크 마지막 발화에서 이어진 것으로 봄
+        first = utterances[0]
+        continues = (
+            self._boundary_end is not None
+            and (first.get("start") or 0) <= self.boundary_gap_ms
+            and offset_ms - self._boundary_end <= self.boundary_gap_ms
+        )
+        assignment = self._assign(labels, profiles, first["speaker"] if continues else None)
+
+        for index, label in enumerate(labels):
+            if label not in assignment:
+                self.speakers.append(GlobalSpeaker(label=_speaker_label(len(self.speakers))))
+                assignment[label] = len(self.speakers) - 1
+            speaker = self.speakers[assignment[label]]
+            hits, average_length, turns, question_rate = matrix[index]
+            speaker.pattern_hits += hits
+            speaker.total_length += average_length * turns
+            speaker.turns += turns
+            speaker.questions += question_rate * turns
+            speaker.turn_share += turns / matrix[:, 2].sum()
+            speaker.talk_share += talk_share[index]
+            speaker.chunks += 1
+            speaker.local_labels.append(label)
+
+        stitched = [
+            {
+                "speaker": self.speakers[assignment[utterance["speaker"]]].label,
+                "text": utterance["text"],
+                "start": (utterance.get("start") or 0) + offset_ms,
+                "end": (utterance.get("end") or 0) + offset_ms
+            }
+            for utterance in utterances
+        ]
+        self.utterances.extend(stitched)
+        self._boundary_end = stitched[-1]["end"]
+        return stitched
+
+    def roles(self) -> Dict[str, SpeakerRole]:
+        """지금까지 합쳐진 전체 발화 기준 전역 화자별 역할"""
+        return self.classifier.classify(
+            [utterance["speaker"] for utterance in self.utterances],
+            [utterance["text"] for utterance in self.utterances]
+        )
+
+    def labelled(self, roles: Optional[Dict[str, SpeakerRole]] = None) -> List[Dict]:
+        """전역 발화 목록에 역할(Teacher/Student) 추가"""
+        roles = roles if roles is not None else self.roles()
+        return [dict(utterance, role=roles[utterance["speaker"]].role) for utterance in self.utterances]
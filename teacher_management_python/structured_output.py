@@ -0,0 +1,192 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import re
+import threading
+from langchain.schema import AIMessage, HumanMessage
+import config as config
+import tracing
+
+# JSON 스키마 type → 파이썬 타입 (bool은 int의 하위 타입이므로 별도 처리)
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool
+}
+
+class StructuredOutputError(Exception):
+    """재시도 후에도 스키마에 맞는 응답을 받지 못한 경우"""
+    def __init__(self, name: str, errors: List[str], content: str):
+        super().__init__(f"{name} 응답이 스키마와 맞지 않습니다: {'; '.join(errors)}")
+        self.name = name
+        self.errors = errors
+        self.content = content
+
+def validate(data: Any, schema: Dict, path: str = "$") -> List[str]:
+    """JSON 스키마 검증 (type/properties/required/additionalProperties/items/minimum/maximum 지원)
+
+    Returns:
+        오류 메시지 목록 (비어 있으면 유효)
+    """
+    errors = []
+    expected = schema.get("type")
+    if expected:
+        python_type = _JSON_TYPES[expected]
+        is_bool = isinstance(data, bool)
+        if not isinstance(data, python_type) or (is_bool and expected != "boolean"):
+            return [f"{path}: {expected} 타입이어야 합니다"]
+
+    if expected == "object":
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in data:
+                errors.append(f"{path}.{key}: 필수 항목이 없습니다")
+        for key, value in data.items():
+            if key in properties:
+                errors.extend(validate(value, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}.{key}: 허용되지 않은 항목입니다")
+    elif expected == "array" and "items" in schema:
+        for index, item in enumerate(data):
+            errors.extend(validate(item, schema["items"], f"{path}[{index}]"))
+    elif expected in ("integer", "number"):
+        if "minimum" in schema and data < schema["minimum"]:
+            errors.append(f"{path}: {schema['minimum']} 이상이어야 합니다")
+        if "maximum" in schema and data > schema["maximum"]:
+            errors.append(f"{path}: {schema['maximum']} 이하여야 합니다")
+    return errors
+
+def parse_json(content: str) -> Tuple[Optional[Any], Optional[str]]:
+    """응답 텍스트에서 JSON 추출 (코드 블록으로 감싼 응답도 허용)"""
+    text = content.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        return json.loads(text), None
+    except json.JSONDecodeError as e:
+        return None, f"JSON 파싱 실패: {e.msg} (위치 {e.pos})"
+
+def json_schema_format(name: str, schema: Dict) -> Dict:
+    """스키마로 응답을 제한하는 OpenAI response_format"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": schema
+        }
+    }
+
+class StructuredOutputStats:
+    """구조화 응답 호출·재시도·실패 카운터 (호출 이름별로도 집계)"""
+    FIELDS = ("calls", "retries", "invalid", "fallbacks", "failures")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = dict.fromkeys(self.FIELDS, 0)
+        self.by_name: Dict[str, Dict[str, int]] = {}
+
+    def add(self, name: str, field: str, count: int = 1):
+        with self._lock:
+            self.totals[field] += count
+            self.by_name.setdefault(name, dict.fromkeys(self.FIELDS, 0))[field] += count
+
+    def reset(self):
+        with self._lock:
+            self.totals = dict.fromkeys(self.FIELDS, 0)
+            self.by_name = {}
+
+    def summary(self) -> str:
+        totals = self.totals
+        lines = [
+            f"구조화 응답: 호출 {totals['calls']}, 재시도 {totals['retries']}, "
+            f"검증 실패 {totals['invalid']}, 대체 파서 {totals['fallbacks']}, 최종 실패 {totals['failures']}"
+        ]
+        for name, counts in self.by_name.items():
+            if counts["invalid"] or counts["failures"]:
+                lines.append(
+                    f"  - {name}: 호출 {counts['calls']}, 검증 실패 {counts['invalid']}, "
+                    f"대체 파서 {counts['fallbacks']}, 최종 실패 {counts['failures']}"
+                )
+        return "\n".join(lines)
+
+# 프로세스 내 모든 구조화 호출이 공유하는 카운터
+structured_output_stats = StructuredOutputStats()
+
+class StructuredOutputClient:
+    """JSON 스키마로 제한한 LLM 호출 + 검증 + 해당 호출만 재시도
+
+    응답이 JSON이 아니거나 스키마와 맞지 않으면 같은 대화에 이전 응답과 오류 목록을 덧붙여
+    그 호출만 다시 요청한다. max_retries번 재시도 후에도 실패하면 fallback 파서(기존
+    텍스트 파서)로 마지막 응답을 해석하고, fallback이 없으면 StructuredOutputError를 던진다.
+    """
+    def __init__(self, llm, max_retries: Optional[int] = None,
+                 stats: Optional[StructuredOutputStats] = None):
+        self.llm = llm
+        self.max_retries = config.STRUCTURED_OUTPUT_MAX_RETRIES if max_retries is None else max_retries
+        self.stats = stats or structured_output_stats
+
+    def _check(self, content: str, schema: Dict) -> Tuple[Optional[Any], List[str]]:
+        data, error = parse_json(content)
+        if error:
+            return None, [error]
+        return data, validate(data, schema)
+
+    @staticmethod
+    def _retry_messages(messages: List, content: str, errors: List[str]) -> List:
+        return list(messages) + [
+            AIMessage(content=content),
+            HumanMessage(content=(
+                "이전 응답이 요구한 JSON 형식과 맞지 않습니다.\n"
+                + "\n".join(f"- {error}" for error in errors[:10])
+                + "\n설명 없이 스키마에 맞는 JSON만 다시 응답해주세요."
+            ))
+        ]
+
+    def _give_up(self, name: str, errors: List[str], content: str,
+                 fallback: Optional[Callable[[str], Any]]) -> Any:
+        if fallback is not None:
+            self.stats.add(name, "fallbacks")
+            print(f"Warning: {name} 응답 검증 실패, 기존 파서로 대체합니다 ({'; '.join(errors[:3])})")
+            return fallback(content)
+        self.stats.add(name, "failures")
+        raise StructuredOutputError(name, errors, content)
+
+    def invoke(self, messages: List, schema: Dict, name: str,
+               fallback: Optional[Callable[[str], Any]] = None) -> Any:
+        """스키마에 맞는 응답(dict) 반환"""
+        response_format = json_schema_format(name, schema)
+        attempt_messages = messages
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats.add(name, "retries")
+                tracing.add(retries=1)
+            self.stats.add(name, "calls")
+            content = self.llm.invoke(attempt_messages, response_format=response_format).content
+            data, errors = self._check(content, schema)
+            if not errors:
+                return data
+            self.stats.add(name, "invalid")
+            attempt_messages = self._retry_messages(messages, content, errors)
+        return self._give_up(name, errors, content, fallback)
+
+    async def ainvoke(self, messages: List, schema: Dict, name: str,
+                      fallback: Optional[Callable[[str], Any]] = None) -> Any:
+        """스키마에 맞는 응답(dict) 반환 (비동기)"""
+        response_format = json_schema_format(name, schema)
+        attempt_messages = messages
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats.add(name, "retries")
+                tracing.add(retries=1)
+            self.stats.add(name, "calls")
+            response = await self.llm.ainvoke(attempt_messages, response_format=response_format)
+            data, errors = self._check(response.content, schema)
+            if not errors:
+                return data
+            self.stats.add(name, "invalid")
+            attempt_messages = self._retry_messages(messages, response.content, errors)
+        return self._give_up(name, errors, response.content, fallback)
@@ -0,0 +1,265 @@
+"""교사별 누적 점수 프로필 (리포트 1건당 O(1) 갱신)
+
+교사 요약·비교 화면에 필요한 총점·영역별 평균, 분산, 추세, 최고/최저 영역을 과거 리포트를
+다시 읽지 않고 스트리밍 통계로 유지한다.
+    - 평균·분산: Welford 방식 (개수, 평균, 편차 제곱합 M2)
+    - 추세: 총점의 지수 가중 이동 평균(EWMA)과 연속 리포트 간 총점 변화량의 EWMA
+    - 영역별: 평균·분산·EWMA와 최소/최대 점수
+프로필은 교사당 SQLite 한 행(JSON)으로 저장되며, 새 최종 평가가 기록될 때 해당 교사 행만
+읽고 고쳐 쓴다. 같은 리포트 ID는 한 번만 반영되므로 재개(resume)로 다시 실행해도 중복되지 않는다.
+
+사용법: python teacher_profiles.py [--rebuild] [--teacher 교사]
+    --rebuild는 report_index의 리포트 아카이브 인덱스로 프로필을 처음부터 다시 만든다.
+"""
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+import argparse
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import config as config
+from report_index import SCORE_AREAS, ReportIndex, score_area
+
+@dataclass
+class RunningStat:
+    """스트리밍 통계 하나 (Welford 평균·분산, EWMA, 최소/최대)"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    ewma: Optional[float] = None
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+
+    def update(self, value: float, alpha: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.ewma = value if self.ewma is None else alpha * value + (1 - alpha) * self.ewma
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    @property
+    def variance(self) -> float:
+        """표본 분산 (2건 미만이면 0)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+@dataclass
+class TeacherProfile:
+    teacher: str
+    reports: int = 0
+    total: RunningStat = field(default_factory=RunningStat)
+    areas: Dict[str, RunningStat] = field(default_factory=dict)
+    trend: float = 0.0                   # 연속 리포트 간 총점 변화량의 EWMA (양수면 상승 추세)
+    last_total: Optional[float] = None
+    last_report: Optional[str] = None
+    updated_at: Optional[float] = None
+
+    def add(self, scores: Dict[str, float], alpha: float, report_id: Optional[str] = None):
+        """새 리포트 점수 반영 (과거 리포트 수와 무관한 상수 시간)"""
+        total = sum(scores.values())
+        if self.last_total is not None:
+            change = total - self.last_total
+            self.trend = change if self.reports == 1 else alpha * change + (1 - alpha) * self.trend
+        self.total.update(total, alpha)
+        for area, value in scores.items():
+            self.areas.setdefault(area, RunningStat()).update(value, alpha)
+        self.reports += 1
+        self.last_total = total
+        self.last_report = report_id
+        self.updated_at = time.time()
+
+    @property
+    def best_area(self) -> Optional[str]:
+        return max(self.areas, key=lambda area: self.areas[area].mean) if self.areas else None
+
+    @property
+    def worst_area(self) -> Optional[str]:
+        return min(self.areas, key=lambda area: self.areas[area].mean) if self.areas else None
+
+    def summary(self) -> Dict:
+        """요약·비교 화면용 값"""
+        return {
+            "teacher": self.teacher,
+            "리포트_수": self.reports,
+            "총점_평균": self.total.mean,
+            "총점_표준편차": self.total.std,
+            "총점_최근_가중평균": self.total.ewma,
+            "추세": self.trend,
+            "총점_최저": self.total.minimum,
+            "총점_최고": self.total.maximum,
+            "영역별_평균": {area: self.areas[area].mean for area in SCORE_AREAS if area in self.areas},
+            "영역별_범위": {
+                area: (self.areas[area].minimum, self.areas[area].maximum)
+                for area in SCORE_AREAS if area in self.areas
+            },
+            "최고_영역": self.best_area,
+            "최저_영역": self.worst_area
+        }
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TeacherProfile":
+        data = dict(data)
+        data["total"] = RunningStat(**data["total"])
+        data["areas"] = {area: RunningStat(**stat) for area, stat in data["areas"].items()}
+        return cls(**data)
+
+def normalize_scores(scores: Dict) -> Dict[str, float]:
+    """최종 평가 점수(키 이름이 제각각)를 SCORE_AREAS 기준 숫자로 변환"""
+    normalized = {}
+    for key, value in (scores or {}).items():
+        area = score_area(key)
+        if area and isinstance(value, (int, float)) and not isinstance(value, bool):
+            normalized[area] = float(value)
+    return normalized
+
+class TeacherProfileStore:
+    """교사별 프로필 저장소 (SQLite, 교사당 한 행)"""
+    def __init__(self, path: Optional[str] = None, alpha: Optional[float] = None):
+        self.path = path or config.TEACHER_PROFILE_PATH
+        self.alpha = config.TEACHER_PROFILE_EWMA_ALPHA if alpha is None else alpha
+        if not 0 < self.alpha <= 1:
+            raise ValueError("EWMA alpha는 0보다 크고 1 이하여야 합니다")
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # 트랜잭션은 직접 시작 (여러 워커 프로세스가 같은 교사를 동시에 갱신할 수 있음)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS profiles (
+                    teacher TEXT PRIMARY KEY,
+                    profile TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS recorded_reports (
+                    teacher TEXT NOT NULL,
+                    report_id TEXT NOT NULL,
+                    PRIMARY KEY (teacher, report_id)
+                )
+            """)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def record(self, teacher: str, scores: Dict, report_id: Optional[str] = None) -> Optional[TeacherProfile]:
+        """최종 평가 점수 1건을 교사 프로필에 반영 (이미 반영한 report_id거나 점수가 없으면 None)"""
+        scores = normalize_scores(scores)
+        if not scores:
+            return None
+        with self._lock:
+            conn = self._connect()
+            # 읽기-수정-쓰기를 한 트랜잭션으로 (다른 프로세스의 같은 교사 갱신과 겹치지 않도록)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if report_id is not None:
+                    inserted = conn.execute(
+                        "INSERT OR IGNORE INTO recorded_reports (teacher, report_id) VALUES (?, ?)",
+                        (teacher, report_id)
+                    ).rowcount
+                    if not inserted:
+                        conn.execute("ROLLBACK")
+                        return None
+                row = conn.execute("SELECT profile FROM profiles WHERE teacher = ?", (teacher,)).fetchone()
+                profile = TeacherProfile.from_dict(json.loads(row[0])) if row else TeacherProfile(teacher)
+                profile.add(scores, self.alpha, report_id)
+                conn.execute(
+                    "INSERT OR REPLACE INTO profiles (teacher, profile) VALUES (?, ?)",
+                    (teacher, json.dumps(profile.to_dict(), ensure_ascii=False))
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return profile
+
+    def record_assessment(self, teacher: str, assessment: Dict,
+                          report_id: Optional[str] = None) -> Optional[TeacherProfile]:
+        """TeachingAssessor 최종 평가 결과({"scores": ...}) 반영"""
+        return self.record(teacher, assessment.get("scores") or {}, report_id)
+
+    def get(self, teacher: str) -> Optional[TeacherProfile]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT profile FROM profiles WHERE teacher = ?", (teacher,)
+            ).fetchone()
+        return TeacherProfile.from_dict(json.loads(row[0])) if row else None
+
+    def all(self) -> List[TeacherProfile]:
+        with self._lock:
+            rows = self._connect().execute("SELECT profile FROM profiles ORDER BY teacher").fetchall()
+        return [TeacherProfile.from_dict(json.loads(row[0])) for row in rows]
+
+    def compare(self, teachers: Optional[List[str]] = None) -> List[Dict]:
+        """교사 비교용 요약 목록 (총점 평균 높은 순)"""
+        profiles = self.all()
+        if teachers is not None:
+            profiles = [profile for profile in profiles if profile.teacher in teachers]
+        return sorted((profile.summary() for profile in profiles), key=lambda item: -item["총점_평균"])
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM profiles")
+            conn.execute("DELETE FROM recorded_reports")
+
+    def rebuild_from_index(self, index: ReportIndex) -> int:
+        """리포트 아카이브 인덱스의 리포트를 시각순으로 다시 반영 (반영한 리포트 수 반환)"""
+        self.clear()
+        recorded = 0
+        for teacher in index.teachers():
+            for report in index.teacher_reports(teacher):
+                if self.record(teacher, report["scores"], report["report_id"]):
+                    recorded += 1
+        return recorded
+
+_default_store: Optional[TeacherProfileStore] = None
+
+def get_default_store() -> TeacherProfileStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = TeacherProfileStore()
+    return _default_store
+
+def main():
+    parser = argparse.ArgumentParser(description="교사별 누적 점수 프로필")
+    parser.add_argument("--rebuild", action="store_true", help="리포트 아카이브 인덱스로 프로필 재구성")
+    parser.add_argument("--teacher", default=None, help="교사 한 명만 출력")
+    args = parser.parse_args()
+
+    store = get_default_store()
+    if args.rebuild:
+        index = ReportIndex()
+        index.update()
+        print(f"프로필 재구성: 리포트 {store.rebuild_from_index(index)}건 반영")
+    teachers = [args.teacher] if args.teacher else None
+    for summary in store.compare(teachers):
+        print(
+            f"{summary['teacher']}: 리포트 {summary['리포트_수']}건, "
+            f"총점 {summary['총점_평균']:.1f}±{summary['총점_표준편차']:.1f}, "
+            f"추세 {summary['추세']:+.1f}, 최고 {summary['최고_영역']}, 최저 {summary['최저_영역']}"
+        )
+
+if __name__ == "__main__":
+    main()
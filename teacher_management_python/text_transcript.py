@@ -1,114 +1,277 @@
 import assemblyai as aai
-from pydub import AudioSegment
 import os
 import subprocess
-from config import AAI_API_KEY
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import (
+    AAI_API_KEY, AAI_BASE_URL, TRANSCRIBE_MAX_CONCURRENCY,
+    TRANSCRIBE_SAMPLE_RATE, TRANSCRIBE_AUDIO_BITRATE, TRACE_DIR
+)
+from typing import Callable, Iterable, Iterator, List, Dict, NamedTuple, Optional
+from speaker_roles import default_classifier
+from speaker_stitching import SpeakerStitcher
+import json
+import resource
 import sys
+import tracing
+
+# 음성 인식용 인코딩 (16kHz 모노면 충분)
+SPEECH_AUDIO_ARGS = [
+    "-ac", "1", "-ar", str(TRANSCRIBE_SAMPLE_RATE),
+    "-c:a", "libmp3lame", "-b:a", TRANSCRIBE_AUDIO_BITRATE
+]
+# 이미 인코딩된 오디오를 다시 인코딩하지 않고 자르기만 할 때
+COPY_AUDIO_ARGS = ["-c", "copy"]
+# 이전 추출 방식(고음질 MP3) 비트레이트, 전송량 비교용
+LEGACY_AUDIO_BITRATE = 192000
+# 화자 분리 시 예상 화자 수
+SPEAKERS_EXPECTED = 3
+
+class AudioChunk(NamedTuple):
+    path: str
+    start: float  # 원본 기준 시작 시각 (초)
+    end: float    # 원본 기준 끝 시각 (초)
 
 def convert_mp4_to_mp3(mp4_path, mp3_path):
     """MP4 파일을 MP3로 변환 (ffmpeg 사용)"""
-    command = f'ffmpeg -i "{mp4_path}" -q:a 0 -map a "{mp3_path}"'
+    command = ["ffmpeg", "-nostdin", "-y", "-i", mp4_path, "-q:a", "0", "-map", "a", mp3_path]
     try:
-        subprocess.call(command, shell=True)
+        subprocess.run(command, check=True)
     except Exception as e:
         print(f"Error converting file: {str(e)}")
         return False
     return True
 
-def split_audio(mp3_path, chunk_duration=10):
-    """MP3 파일을 지정된 시간(분) 단위로 분할"""
-    audio = AudioSegment.from_mp3(mp3_path)
-    chunks = []
+def iter_audio_segments(source_path, chunk_duration=10, output_dir=None,
+                        audio_args: Optional[List[str]] = None,
+                        stats: Optional[Dict] = None) -> Iterator[AudioChunk]:
+    """오디오/영상 파일을 지정된 시간(분) 단위로 분할하면서 완성된 청크를 차례로 반환
     
-    # 분할 크기 계산 (밀리초 단위)
-    chunk_length_ms = chunk_duration * 60 * 1000
+    ffmpeg segment muxer가 원본을 한 번만 읽으면서 청크를 기록하고,
+    청크가 닫힐 때마다 segment list(CSV)를 stdout으로 내보낸다.
+    메모리 사용량은 강의 길이와 무관하며, 첫 청크는 전체 분할이 끝나기 전에 전사로 넘길 수 있다.
     
-    # 오디오 분할
-    for i in range(0, len(audio), chunk_length_ms):
-        chunk = audio[i:i + chunk_length_ms]
-        chunk_path = f"chunk_{i//chunk_length_ms}.mp3"
-        chunk.export(chunk_path, format="mp3")
-        chunks.append(chunk_path)
-    
-    return chunks
+    Args:
+        audio_args: 청크 인코딩 옵션 (기본값: 재인코딩 없이 자르기, 영상은 SPEECH_AUDIO_ARGS)
+        stats: 전달하면 청크 수(segments), 청크 바이트(bytes), ffmpeg 소요 시간(encode_seconds)을 기록
+    """
+    output_dir = output_dir or os.path.dirname(os.path.abspath(source_path))
+    os.makedirs(output_dir, exist_ok=True)
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", source_path,
+        "-vn", "-map", "0:a:0", *(audio_args or COPY_AUDIO_ARGS),
+        "-f", "segment", "-segment_time", str(chunk_duration * 60),
+        "-reset_timestamps", "1",
+        "-segment_list", "pipe:1", "-segment_list_type", "csv",
+        os.path.join(output_dir, "chunk_%03d.mp3")
+    ]
+    if stats is not None:
+        stats.update(segments=0, bytes=0, encode_seconds=0.0)
+    started = time.perf_counter()
+    # ffmpeg는 하위 프로세스이므로 CPU 시간은 종료된 자식 프로세스 사용량 차이로 계산
+    children_started = resource.getrusage(resource.RUSAGE_CHILDREN)
+    segment_started = started
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1
+    )
+    try:
+        # 한 줄 = 완성된 청크 하나 (파일명,시작,끝)
+        for line in process.stdout:
+            fields = line.strip().split(",")
+            if len(fields) >= 3 and fields[0]:
+                chunk = AudioChunk(os.path.join(output_dir, fields[0]), float(fields[1]), float(fields[2]))
+                if stats is not None:
+                    stats["segments"] += 1
+                    stats["bytes"] += os.path.getsize(chunk.path)
+                # 청크 하나가 완성되기까지의 구간 (제너레이터이므로 스팬 대신 끝난 구간으로 기록)
+                segment_ended = time.perf_counter()
+                tracing.record("청크 분할", "audio", segment_started, segment_ended,
+                               file=os.path.basename(chunk.path), start=chunk.start, end=chunk.end)
+                segment_started = segment_ended
+                yield chunk
+                segment_started = time.perf_counter()
+        error = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(f"오디오 분할 실패 (ffmpeg 종료 코드 {process.returncode}): {error.strip()}")
+        if stats is not None:
+            stats["encode_seconds"] = time.perf_counter() - started
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        tracing.record(
+            "ffmpeg", "audio", started, time.perf_counter(),
+            cpu_time=(children.ru_utime - children_started.ru_utime) + (children.ru_stime - children_started.ru_stime),
+            source=os.path.basename(source_path), segments=stats["segments"] if stats is not None else None
+        )
+    finally:
+        # 소비자가 중간에 멈춘 경우 ffmpeg 종료
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
 
-def transcribe_audio(file_path, api_key):
-    """오디오 파일을 텍스트로 변환"""
+def split_audio(mp3_path, chunk_duration=10, output_dir=None):
+    """MP3 파일을 지정된 시간(분) 단위로 분할"""
+    return [chunk.path for chunk in iter_audio_segments(mp3_path, chunk_duration, output_dir)]
+
+def iter_speech_segments(video_path, chunk_duration=10, output_dir=None,
+                         stats: Optional[Dict] = None) -> Iterator[AudioChunk]:
+    """영상에서 음성 인식용(16kHz 모노) 청크를 바로 추출 (디코딩·인코딩 1회)"""
+    return iter_audio_segments(video_path, chunk_duration, output_dir, SPEECH_AUDIO_ARGS, stats)
+
+def configure_assemblyai(api_key):
+    """AssemblyAI 클라이언트 설정 (AAI_BASE_URL 지정 시 로컬 대체 서버 사용)"""
     aai.settings.api_key = api_key
+    if AAI_BASE_URL:
+        aai.settings.base_url = AAI_BASE_URL
+
+def _transcribe(file_path, api_key):
+    configure_assemblyai(api_key)
     transcriber = aai.Transcriber()
     
     # 화자 구분을 위한 설정 (지원되는 파라미터만 사용)
     config = aai.TranscriptionConfig(
         speaker_labels=True,
-        speakers_expected=3
+        speakers_expected=SPEAKERS_EXPECTED
     )
     
-    transcript = transcriber.transcribe(file_path, config=config)
+    return transcriber.transcribe(file_path, config=config)
+
+def transcribe_audio(file_path, api_key):
+    """오디오 파일을 텍스트로 변환"""
+    transcript = _transcribe(file_path, api_key)
     if transcript.status == aai.TranscriptStatus.error:
         return f"Error: {transcript.error}"
     
     return _analyze_speaker_patterns(transcript.utterances)
 
+def transcribe_audio_utterances(file_path, api_key) -> List[Dict]:
+    """오디오 파일을 전사해 화자 라벨(A, B, ...)과 시간(ms)이 그대로 담긴 발화 목록 반환"""
+    transcript = _transcribe(file_path, api_key)
+    if transcript.status == aai.TranscriptStatus.error:
+        raise RuntimeError(f"전사 실패 ({file_path}): {transcript.error}")
+    return [
+        {"speaker": utterance.speaker, "text": utterance.text,
+         "start": utterance.start, "end": utterance.end}
+        for utterance in transcript.utterances or []
+    ]
+
 def _analyze_speaker_patterns(utterances) -> List[Dict]:
     """화자 패턴 분석을 통한 교사/학생 구분"""
-    speaker_stats = {}
-    
-    # 1단계: 통계 수집 및 교사 특징 분석
-    for utterance in utterances:
-        speaker = utterance.speaker
-        text = utterance.text
-        
-        if speaker not in speaker_stats:
-            speaker_stats[speaker] = {
-                "말한_횟수": 0,
-                "총_발화_길이": 0,
-                "교사_특징_점수": 0
-            }
-        
-        # 기본 통계
-        speaker_stats[speaker]["말한_횟수"] += 1
-        speaker_stats[speaker]["총_발화_길이"] += len(text)
-        
-        # 교사 특징 점수 계산
-        teacher_patterns = [
-            "let's", "look at", "can anyone", "tell me",
-            "does anyone", "remember", "explain",
-            "understand", "question", "next",
-            "class", "everyone", "please"
-        ]
-        
-        for pattern in teacher_patterns:
-            if pattern in text.lower():
-                speaker_stats[speaker]["교사_특징_점수"] += 1
+    utterances = list(utterances)
+    roles = default_classifier.classify(
+        [utterance.speaker for utterance in utterances],
+        [utterance.text for utterance in utterances]
+    )
+    for role in roles.values():
+        print(f"화자 {role.speaker}: {role.role} (교사 확률 {role.confidence:.2f})")
+    return default_classifier.label(utterances, roles)
+
+def probe_duration(media_path) -> Optional[float]:
+    """ffprobe로 미디어 길이(초) 조회 (실패 시 None)"""
+    command = [
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", media_path
+    ]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        return float(output.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+def audio_chunk_count(media_path, chunk_duration=10, duration: Optional[float] = None) -> Optional[int]:
+    """미디어 길이로 예상 청크 수 계산 (실패 시 None)"""
+    duration = probe_duration(media_path) if duration is None else duration
+    if duration is None:
+        return None
+    return max(1, -(-int(duration) // (chunk_duration * 60)))
+
+def format_audio_report(stats: Dict, duration: Optional[float]) -> str:
+    """전사용 오디오 전송량·인코딩 시간 요약 (이전 고음질 MP3 방식 추정치와 비교)"""
+    report = (
+        f"전사용 오디오: 청크 {stats['segments']}개, 전송 {stats['bytes'] / 1e6:.1f}MB, "
+        f"인코딩 {stats['encode_seconds']:.1f}초 (1회 디코딩)"
+    )
+    if duration:
+        legacy_bytes = duration * LEGACY_AUDIO_BITRATE / 8
+        saved = 1 - stats["bytes"] / legacy_bytes if legacy_bytes else 0.0
+        report += (
+            f", 이전 방식 추정 전송 {legacy_bytes / 1e6:.1f}MB 대비 {saved:.0%} 절감"
+            f" (인코딩 시간 비교: benchmarks/bench_audio_extract.py)"
+        )
+    return report
+
+def transcribe_chunks(chunks: Iterable[AudioChunk], api_key: str,
+                      on_ready: Callable[[int, AudioChunk, List[Dict]], None],
+                      on_progress: Optional[Callable[[int, int], None]] = None,
+                      max_workers: Optional[int] = None,
+                      expected_total: Optional[int] = None):
+    """오디오 청크를 동시에 전사하고, 결과는 청크 순서대로 on_ready에 전달
     
-    # 2단계: 교사 식별
-    teacher_speaker = None
-    max_teacher_score = -1
+    Args:
+        chunks: 순서대로 정렬된 오디오 청크 (분할 중인 제너레이터도 가능)
+        on_ready: (청크 번호, 청크, 청크 기준 발화 목록) - 앞선 청크가 모두 전달된 뒤에만 호출됨
+        on_progress: (완료된 청크 수, 전체 청크 수) - 청크 전사가 끝날 때마다 호출됨
+        max_workers: 동시에 전사할 최대 청크 수 (기본값: TRANSCRIBE_MAX_CONCURRENCY)
+        expected_total: 분할이 끝나기 전 진행률 계산에 쓸 예상 청크 수
+    """
+    configure_assemblyai(api_key)
+    max_workers = max(1, max_workers or TRANSCRIBE_MAX_CONCURRENCY)
+    submitted: List[AudioChunk] = []
+    ready: Dict[int, List[Dict]] = {}
+    futures = {}
+    state = {"next_index": 0, "completed": 0, "split_done": False}
     
-    for speaker, stats in speaker_stats.items():
-        if stats["말한_횟수"] > 0:
-            avg_length = stats["총_발화_길이"] / stats["말한_횟수"]
-            teacher_score = (
-                stats["교사_특징_점수"] * 2 +  # 교사 특징 가중치
-                avg_length * 0.5 +            # 평균 발화 길이 가중치
-                stats["말한_횟수"] * 0.3       # 발화 빈도 가중치
-            )
-            
-            if teacher_score > max_teacher_score:
-                max_teacher_score = teacher_score
-                teacher_speaker = speaker
+    def transcribe(index: int, chunk: AudioChunk) -> List[Dict]:
+        with tracing.span("전사", "transcribe", index=index, start=chunk.start, end=chunk.end):
+            return transcribe_audio_utterances(chunk.path, api_key)
+    # 워커 스레드의 전사 스팬이 호출한 쪽 스팬 아래에 기록되도록 감쌈
+    transcribe = tracing.in_current_span(transcribe)
     
-    # 3단계: 결과 변환 (교사/학생으로만 구분)
-    processed_utterances = []
-    for utterance in utterances:
-        speaker_role = "Teacher" if utterance.speaker == teacher_speaker else "Student"
-        processed_utterances.append({
-            "speaker": speaker_role,
-            "text": utterance.text
-        })
+    def handle(future):
+        index = futures.pop(future)
+        ready[index] = future.result()
+        state["completed"] += 1
+        if on_progress:
+            # 분할이 끝나기 전에는 예상 청크 수 기준 (실제 청크가 더 많으면 실제 수 기준)
+            total = len(submitted) if state["split_done"] else max(expected_total or 0, len(submitted))
+            on_progress(state["completed"], total)
+        
+        # 앞선 청크가 모두 준비된 경우에만 순서대로 전달
+        while state["next_index"] in ready:
+            index = state["next_index"]
+            on_ready(index, submitted[index], ready.pop(index))
+            state["next_index"] += 1
     
-    return processed_utterances
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            # 청크가 만들어지는 대로 제출하고, 그 사이 끝난 전사는 바로 처리
+            for chunk in chunks:
+                futures[executor.submit(transcribe, len(submitted), chunk)] = len(submitted)
+                submitted.append(chunk)
+                for future in [future for future in futures if future.done()]:
+                    handle(future)
+            state["split_done"] = True
+            for future in as_completed(list(futures)):
+                handle(future)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+def write_transcript(transcript_file, utterances: List[Dict], append=False):
+    """'Teacher: 발화' 형식 전사본 기록 (append=False면 헤더부터 새로 작성)"""
+    try:
+        with open(transcript_file, 'a' if append else 'w', encoding='utf-8') as f:
+            if not append:
+                f.write("#Lecture transcript\n\n")
+            for utterance in utterances:
+                # 단순화된 화자 구분 (Teacher/Student)
+                speaker = "Teacher" if utterance.get("role") == "Teacher" else "Student"
+                f.write(f"{speaker}: {utterance.get('text')}\n")
+    except Exception as e:
+        print(f"파일 저장 중 오류 발생: {str(e)}")
+        raise
 
 def main(input_video_path, teacher_id):
     try:
@@ -119,55 +282,77 @@ def main(input_video_path, teacher_id):
         base_dir = os.path.join(os.path.dirname(input_video_path), 'outputs', teacher_id)
         os.makedirs(base_dir, exist_ok=True)
         
-        mp3_file = os.path.join(base_dir, 'output.mp3')
         transcript_file = os.path.join(base_dir, 'transcript.txt')
+        utterances_file = os.path.join(base_dir, 'transcript.json')
         
         # 대화 내용을 텍스트 파일로 저장
-        try:
-            with open(transcript_file, 'w', encoding='utf-8') as f:
-                f.write("#Lecture transcript\n\n")  # 파일 초기화
-        except Exception as e:
-            print(f"파일 생성 중 오류 발생: {str(e)}")
-            raise
+        write_transcript(transcript_file, [])  # 파일 초기화
         
         print("Progress: 10")  # 초기 설정 완료
+        tracing.tracer.reset()
+        
+        # 영상에서 16kHz 모노 청크를 바로 추출 (중간 MP3 없이 한 번만 인코딩)
+        duration = probe_duration(input_video_path)
+        expected_chunks = audio_chunk_count(input_video_path, duration=duration)
+        audio_stats: Dict = {}
+        chunks = iter_speech_segments(input_video_path, output_dir=base_dir, stats=audio_stats)
+        print("Progress: 40")  # 추출·분할 시작
         
-        # MP4를 MP3로 변환
-        convert_mp4_to_mp3(input_video_path, mp3_file)
-        print("Progress: 30")  # 변환 완료
+        def report_progress(completed, total):
+            progress = int(40 + (completed / total * 50))  # 40%에서 90%까지 진행 (완료된 청크 기준)
+            print(f"Progress: {progress}", flush=True)
         
-        # MP3 파일 분할
-        chunks = split_audio(mp3_file)
-        print("Progress: 40")  # 분할 완료
+        # 청크별 화자 라벨·시간을 강의 전체 기준으로 합침
+        stitcher = SpeakerStitcher(max_speakers=SPEAKERS_EXPECTED)
+        written_roles: List[str] = []
         
-        total_chunks = len(chunks)
-        for i, chunk in enumerate(chunks):
-            utterances = transcribe_audio(chunk, API_KEY)
-            progress = int(40 + (i / total_chunks * 50))  # 40%에서 90%까지 진행
-            print(f"Progress: {progress}")
-            
-            # 변환된 내용을 바로 파일에 추가
-            try:
-                with open(transcript_file, 'a', encoding='utf-8') as f:
-                    for utterance in utterances:
-                        # 단순화된 화자 구분 (Teacher/Student)
-                        speaker = "Teacher" if utterance.get("speaker") == "Teacher" else "Student"
-                        f.write(f"{speaker}: {utterance.get('text')}\n")
-            except Exception as e:
-                print(f"파일 저장 중 오류 발생: {str(e)}")
-                raise
+        def append_chunk(index, chunk, utterances):
+            # 청크 순서대로 전사 결과를 파일에 추가 (역할은 지금까지의 전체 발화 기준)
+            stitched = stitcher.add_chunk(utterances, offset_ms=chunk.start * 1000)
+            roles = stitcher.roles()
+            labelled = [dict(utterance, role=roles[utterance["speaker"]].role) for utterance in stitched]
+            write_transcript(transcript_file, labelled, append=True)
+            written_roles.extend(utterance["role"] for utterance in labelled)
                 
             # 청크 파일 삭제
-            os.remove(chunk)
+            os.remove(chunk.path)
+        
+        # 청크를 동시에 전사 (동시 요청 수: TRANSCRIBE_MAX_CONCURRENCY)
+        with tracing.span("분할·전사", "stage", video=os.path.basename(input_video_path)):
+            transcribe_chunks(chunks, API_KEY, append_chunk, report_progress,
+                              expected_total=expected_chunks)
+        
+        # 뒤 청크까지 본 뒤 교사 판별이 바뀌었으면 전체를 다시 기록
+        with tracing.span("화자 역할·저장", "stage"):
+            roles = stitcher.roles()
+            final = stitcher.labelled(roles)
+            if [utterance["role"] for utterance in final] != written_roles:
+                print("전체 발화 기준으로 교사/학생 역할이 바뀌어 전사본을 다시 기록합니다.")
+                write_transcript(transcript_file, final)
+            with open(utterances_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "utterances": final,
+                    "speakers": {
+                        label: {"role": role.role, "confidence": role.confidence, "features": role.features}
+                        for label, role in roles.items()
+                    }
+                }, f, ensure_ascii=False, indent=2)
+        for role in roles.values():
+            print(f"화자 {role.speaker}: {role.role} (교사 확률 {role.confidence:.2f})")
         
-        # 임시 MP3 파일 삭제
-        os.remove(mp3_file)
+        print(format_audio_report(audio_stats, duration))
         print(f"변환된 텍스트가 {transcript_file}에 저장되었습니다.")
+        if TRACE_DIR:
+            name = f"transcribe-{teacher_id}-{os.path.splitext(os.path.basename(input_video_path))[0]}"
+            for path in tracing.tracer.export(TRACE_DIR, name):
+                print(f"트레이스 저장: {path}")
         
         print("Progress: 100")  # 완료
         
         return {
             "transcript_path": transcript_file,
+            "utterances_path": utterances_file,
+            "audio": audio_stats,
             "status": "completed"
         }
     except Exception as e:
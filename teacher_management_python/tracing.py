@@ -0,0 +1,245 @@
+"""단계·청크 단위 프로파일링 스팬과 트레이스 내보내기
+
+span()으로 감싼 구간마다 실제 시간(wall), CPU 시간, LLM 호출 수·캐시 적중·프롬프트/응답 토큰·
+재시도 수를 기록한다. 현재 스팬은 contextvars로 전달되므로 asyncio 태스크와 asyncio.to_thread에서
+만든 스팬은 자동으로 부모 스팬 아래에 붙고, ThreadPoolExecutor에 넘기는 함수는 in_current_span()으로
+감싸면 된다. LLM 호출 수 등 카운터는 현재 스팬과 모든 상위 스팬에 함께 더해진다.
+
+CPU 시간은 스팬을 연 스레드의 CPU 시간(time.thread_time)이다. 이벤트 루프에서 await하는 비동기
+스팬에는 같은 루프에서 겹쳐 실행된 다른 태스크의 CPU 시간도 포함된다.
+
+내보내기:
+    Chrome 트레이스(.trace.json): chrome://tracing 또는 https://ui.perfetto.dev 에서 열기
+    JSON Lines(.jsonl): 스팬 한 줄씩 (이름, 부모, 시작/소요 시간, CPU 시간, 카운터, 속성)
+
+TRACE_ENABLED=0이면 span()은 아무것도 기록하지 않는다. 현재 스팬은 그대로 설정되므로 current_span()으로
+단계 이름을 찾는 강의 미터(metering.py)의 단계별 사용량은 트레이스 설정과 무관하다.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import config as config
+
+# 스팬에 누적하는 카운터
+COUNTERS = ("llm_calls", "cache_hits", "prompt_tokens", "completion_tokens", "retries")
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    span_id: int
+    parent: Optional["Span"]
+    start: float                      # 트레이서 시작 기준 초
+    thread_id: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(COUNTERS, 0))
+    end: Optional[float] = None
+    cpu_time: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.span_id,
+            "parent": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "category": self.category,
+            "start": self.start,
+            "duration": self.duration,
+            "cpu_time": self.cpu_time,
+            "thread": self.thread_id,
+            "counters": dict(self.counters),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class Tracer:
+    """프로세스 내 스팬 수집기"""
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = config.TRACE_ENABLED if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+
+    def reset(self):
+        """수집한 스팬을 비우고 시간 기준점을 다시 잡음 (강의 1건 시작 시)"""
+        with self._lock:
+            self.spans = []
+            self.origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **attributes) -> Iterator[Optional[Span]]:
+        """구간 기록 (중첩 가능, 예외가 나도 종료 시각·오류 기록)"""
+        current = Span(
+            name=name, category=category, span_id=next(self._ids), parent=_current_span.get(),
+            start=time.perf_counter() - self.origin, thread_id=threading.get_ident(), attributes=attributes
+        )
+        token = _current_span.set(current)
+        if not self.enabled:
+            # 기록은 하지 않지만 현재 스팬은 설정 (강의 미터가 단계 이름을 찾을 수 있도록)
+            try:
+                yield current
+            finally:
+                _current_span.reset(token)
+            return
+        cpu_started = time.thread_time()
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.cpu_time = time.thread_time() - cpu_started
+            current.end = time.perf_counter() - self.origin
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(current)
+
+    def record(self, name: str, category: str, started: float, ended: float,
+               cpu_time: float = 0.0, **attributes) -> Optional[Span]:
+        """이미 끝난 구간을 현재 스팬의 자식으로 기록 (perf_counter 값, 제너레이터·하위 프로세스용)"""
+        if not self.enabled:
+            return None
+        recorded = Span(
+            name=name, category=category, span_id=next(self._ids), parent=_current_span.get(),
+            start=started - self.origin, thread_id=threading.get_ident(), attributes=attributes,
+            end=ended - self.origin, cpu_time=cpu_time
+        )
+        with self._lock:
+            self.spans.append(recorded)
+        return recorded
+
+    def add(self, **counts: int):
+        """현재 스팬과 상위 스팬 전체에 카운터 추가 (스팬 밖이면 무시)"""
+        span = _current_span.get()
+        if span is None:
+            return
+        with self._lock:
+            while span is not None:
+                for key, value in counts.items():
+                    span.counters[key] = span.counters.get(key, 0) + value
+                span = span.parent
+
+    def finished(self) -> List[Span]:
+        with self._lock:
+            return sorted(self.spans, key=lambda span: span.start)
+
+    def chrome_trace(self) -> Dict:
+        """Chrome 트레이스 형식 (완료 이벤트 'X', 마이크로초 단위)"""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": dict(span.attributes, cpu_time=span.cpu_time, error=span.error,
+                             **{key: value for key, value in span.counters.items() if value})
+            }
+            for span in self.finished()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path: str) -> str:
+        _ensure_dir(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False, default=str)
+        return path
+
+    def export_jsonl(self, path: str) -> str:
+        _ensure_dir(path)
+        with open(path, "w", encoding="utf-8") as f:
+            for span in self.finished():
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+        return path
+
+    def export(self, directory: str, name: str) -> List[str]:
+        """<directory>/<name>.trace.json과 <name>.jsonl로 내보내기"""
+        if not self.enabled or not self.spans:
+            return []
+        return [
+            self.export_chrome(os.path.join(directory, f"{name}.trace.json")),
+            self.export_jsonl(os.path.join(directory, f"{name}.jsonl"))
+        ]
+
+    def summary(self, exclude=("llm",)) -> str:
+        """이름별 합계 (횟수, 실제 시간, CPU 시간, LLM 호출·토큰·재시도, 개별 LLM 호출 스팬 제외)"""
+        totals: Dict[str, Dict[str, float]] = {}
+        for span in self.finished():
+            if span.category in exclude:
+                continue
+            total = totals.setdefault(span.name, dict(count=0, wall=0.0, cpu=0.0, **dict.fromkeys(COUNTERS, 0)))
+            total["count"] += 1
+            total["wall"] += span.duration
+            total["cpu"] += span.cpu_time
+            for key in COUNTERS:
+                total[key] += span.counters.get(key, 0)
+        lines = ["트레이스 요약 (이름: 횟수, 실제/CPU 시간, LLM 호출(캐시), 토큰 입력/출력, 재시도)"]
+        for name, total in totals.items():
+            lines.append(
+                f"  {name}: {total['count']}회, {total['wall']:.2f}s/{total['cpu']:.2f}s, "
+                f"LLM {total['llm_calls']}({total['cache_hits']}), "
+                f"토큰 {total['prompt_tokens']}/{total['completion_tokens']}, 재시도 {total['retries']}"
+            )
+        return "\n".join(lines)
+
+def _ensure_dir(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+def token_usage(response) -> Dict[str, int]:
+    """LangChain 응답 메시지의 토큰 사용량 (usage_metadata 또는 OpenAI token_usage)"""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        return {
+            "prompt_tokens": usage.get("input_tokens", 0) or 0,
+            "completion_tokens": usage.get("output_tokens", 0) or 0
+        }
+    metadata = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return {
+        "prompt_tokens": metadata.get("prompt_tokens", 0) or 0,
+        "completion_tokens": metadata.get("completion_tokens", 0) or 0
+    }
+
+# 프로세스 내 모든 모듈이 공유하는 트레이서
+tracer = Tracer()
+
+def span(name: str, category: str = "stage", **attributes):
+    return tracer.span(name, category, **attributes)
+
+def record(name: str, category: str, started: float, ended: float, cpu_time: float = 0.0, **attributes):
+    return tracer.record(name, category, started, ended, cpu_time, **attributes)
+
+def add(**counts: int):
+    tracer.add(**counts)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def in_current_span(func: Callable) -> Callable:
+    """현재 컨텍스트(스팬, 강의 미터 등)를 기억해 다른 스레드(ThreadPoolExecutor 등)에서 실행할 함수로 감싸기"""
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        # 같은 Context는 여러 스레드에서 동시에 실행할 수 없으므로 호출마다 복사본에서 실행
+        return context.copy().run(func, *args, **kwargs)
+    return run
@@ -0,0 +1,101 @@
+"""AssemblyAI transcript.json 스트리밍 읽기
+
+transcript.json은 최상위 text(전체 전사문), words(단어 수천 개), utterances(발화마다 words 포함)
+등으로 구성된 약 1.6MB 파일이다. 발화 단위 분석에는 utterances의 화자·텍스트·시각만 필요하므로,
+파일을 mmap으로 열어 utterances 키 위치로 바로 이동하고(text/words는 읽지 않음) 배열 원소를
+일정 크기 창(window) 단위로 디코딩하며 하나씩 파싱한다. 메모리에는 창 하나와 발화 하나만 올라간다.
+
+JSON 문자열 안의 큰따옴표는 항상 \\"로 이스케이프되므로 "utterances" 뒤에 콜론이 오는 바이트열은
+키로만 나타날 수 있다. AssemblyAI 형식에서 이 키는 최상위에만 있다.
+"""
+from typing import Dict, Iterator, Optional
+import codecs
+import json
+import mmap
+import os
+import re
+from blob_store import read_artifact
+
+# 발화에서 남기는 키 (발화별 words 등은 버림)
+UTTERANCE_KEYS = ("speaker", "text", "start", "end", "confidence")
+# 한 번에 디코딩하는 바이트 수
+WINDOW_BYTES = 1 << 18
+
+_UTTERANCES_KEY_RE = re.compile(rb'"utterances"\s*:\s*')
+_DECODER = json.JSONDecoder()
+
+def _find_utterances(buffer, start: int) -> Optional[int]:
+    """utterances 값의 시작 위치 (키가 없으면 None)"""
+    for match in _UTTERANCES_KEY_RE.finditer(buffer, start):
+        # 앞에 홀수 개의 역슬래시가 있으면 문자열 안의 이스케이프된 따옴표
+        backslashes = 0
+        position = match.start() - 1
+        while position >= start and buffer[position] == 0x5C:
+            backslashes += 1
+            position -= 1
+        if backslashes % 2 == 0:
+            return match.end()
+    return None
+
+def iter_utterances_from_buffer(buffer, start: int = 0, window: int = WINDOW_BYTES) -> Iterator[Dict]:
+    """transcript.json 버퍼(bytes/mmap)의 utterances 원소를 차례로 반환"""
+    position = _find_utterances(buffer, start)
+    if position is None or buffer[position:position + 1] != b'[':
+        # 키가 없거나 null
+        return
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    byte_position = position + 1
+    text = ""
+    offset = 0
+
+    def refill() -> bool:
+        nonlocal text, offset, byte_position
+        if byte_position >= len(buffer):
+            return False
+        block = buffer[byte_position:byte_position + window]
+        byte_position += len(block)
+        # 이미 파싱한 앞부분은 버리고 창을 이어 붙임
+        text = text[offset:] + decoder.decode(block, final=byte_position >= len(buffer))
+        offset = 0
+        return True
+
+    while True:
+        # 원소 사이의 공백·쉼표 건너뛰기
+        while True:
+            while offset < len(text) and text[offset] in " \t\r\n,":
+                offset += 1
+            if offset < len(text) or not refill():
+                break
+        if offset >= len(text):
+            raise ValueError("utterances 배열이 닫히지 않았습니다")
+        if text[offset] == "]":
+            return
+        try:
+            utterance, end = _DECODER.raw_decode(text, offset)
+        except json.JSONDecodeError:
+            # 원소가 창 경계에서 잘린 경우 다음 창을 읽고 다시 시도
+            if not refill():
+                raise
+            continue
+        offset = end
+        yield {key: utterance[key] for key in UTTERANCE_KEYS if key in utterance}
+
+def iter_assemblyai_utterances(path: str) -> Iterator[Dict]:
+    """transcript.json에서 발화(speaker/text/start/end/confidence)만 스트리밍으로 읽기"""
+    if not os.path.exists(path):
+        # 저장소로 옮겨진 transcript.json은 압축을 풀어 메모리 버퍼로 읽음
+        buffer = read_artifact(path)
+        yield from iter_utterances_from_buffer(buffer, 3 if buffer.startswith(codecs.BOM_UTF8) else 0)
+        return
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            # UTF-8 BOM 허용
+            start = 3 if buffer[:3] == codecs.BOM_UTF8 else 0
+            yield from iter_utterances_from_buffer(buffer, start)
+
+def is_assemblyai_json(source) -> bool:
+    """AssemblyAI transcript.json 경로인지 여부 (확장자 기준)"""
+    return isinstance(source, (str, os.PathLike)) and os.fspath(source).lower().endswith(".json")
@@ -0,0 +1,233 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# 시작/종료 시각이 없는 발화에 기록하는 값
+NO_TIME = -1
+
+class UtteranceStore:
+    """배열 기반 발화 저장소
+
+    발화마다 튜플과 문자열 복사본을 두는 대신 다음 열(column)로 저장한다.
+    - 화자 코드: array('H') (화자명은 speakers 테이블에 한 번만 저장)
+    - 텍스트: 하나의 공유 버퍼 + 발화 경계 오프셋 array('q')
+    - 시작/종료 시각(ms): 시각이 있는 발화가 추가될 때만 array('q')로 생성
+    정수 인덱스는 (화자, 발화) 튜플을, 슬라이스는 복사 없는 UtteranceView를 반환한다.
+    """
+    def __init__(self, utterances: Iterable[Tuple[str, str]] = ()):
+        self.speakers: List[str] = []
+        self._speaker_codes: Dict[str, int] = {}
+        self.codes = array('H')
+        self.offsets = array('q', [0])
+        self.starts: Optional[array] = None
+        self.ends: Optional[array] = None
+        self._buffer = ""
+        self._pending: List[str] = []
+        for speaker, text in utterances:
+            self.append(speaker, text)
+
+    def speaker_code(self, speaker: str) -> int:
+        """화자명 → 화자 코드 (처음 보는 화자는 새 코드 부여)"""
+        code = self._speaker_codes.get(speaker)
+        if code is None:
+            code = len(self.speakers)
+            self.speakers.append(speaker)
+            self._speaker_codes[speaker] = code
+        return code
+
+    def append(self, speaker: str, text: str, start: Optional[int] = None, end: Optional[int] = None):
+        """발화 추가 (start/end는 밀리초 단위, 없으면 생략)"""
+        self.codes.append(self.speaker_code(speaker))
+        self._pending.append(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+        if self.starts is None and (start is not None or end is not None):
+            # 처음으로 시각이 있는 발화가 들어오면 앞선 발화는 NO_TIME으로 채움
+            self.starts = array('q', [NO_TIME]) * (len(self.codes) - 1)
+            self.ends = array('q', [NO_TIME]) * (len(self.codes) - 1)
+        if self.starts is not None:
+            self.starts.append(NO_TIME if start is None else int(start))
+            self.ends.append(NO_TIME if end is None else int(end))
+
+    @property
+    def buffer(self) -> str:
+        """모든 발화 텍스트를 이어 붙인 공유 버퍼"""
+        if self._pending:
+            self._buffer = "".join([self._buffer] + self._pending)
+            self._pending = []
+        return self._buffer
+
+    @property
+    def has_times(self) -> bool:
+        return self.starts is not None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def speaker(self, index: int) -> str:
+        return self.speakers[self.codes[index]]
+
+    def text(self, index: int) -> str:
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def times(self, index: int) -> Tuple[Optional[int], Optional[int]]:
+        """발화의 (시작, 종료) 시각, 없으면 (None, None)"""
+        if self.starts is None:
+            return None, None
+        start, end = self.starts[index], self.ends[index]
+        return (None if start == NO_TIME else start), (None if end == NO_TIME else end)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return self.view()[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("발화 인덱스가 범위를 벗어났습니다")
+        return self.speaker(index), self.text(index)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return self._iter_range(0, len(self))
+
+    def _iter_range(self, start: int, stop: int) -> Iterator[Tuple[str, str]]:
+        buffer, offsets, codes, speakers = self.buffer, self.offsets, self.codes, self.speakers
+        for i in range(start, stop):
+            yield speakers[codes[i]], buffer[offsets[i]:offsets[i + 1]]
+
+    def view(self, start: int = 0, stop: Optional[int] = None) -> "UtteranceView":
+        """[start, stop) 구간의 복사 없는 뷰"""
+        stop = len(self) if stop is None else stop
+        return UtteranceView(self, max(0, start), max(start, min(stop, len(self))))
+
+    def texts(self, include: Optional[Sequence[str]] = None,
+              exclude: Optional[Sequence[str]] = None) -> "SpeakerTextView":
+        """화자 조건에 맞는 발화 텍스트 뷰"""
+        return self.view().texts(include, exclude)
+
+    def relabel(self, mapping: Dict[str, str]):
+        """화자명 변경 (여러 화자를 같은 이름으로 바꾸면 하나의 화자 코드로 합침)"""
+        speakers: List[str] = []
+        speaker_codes: Dict[str, int] = {}
+        table = []
+        for speaker in self.speakers:
+            name = mapping.get(speaker, speaker)
+            if name not in speaker_codes:
+                speaker_codes[name] = len(speakers)
+                speakers.append(name)
+            table.append(speaker_codes[name])
+        if table != list(range(len(table))):
+            self.codes = array('H', (table[code] for code in self.codes))
+        self.speakers = speakers
+        self._speaker_codes = speaker_codes
+
+    def to_dict(self) -> Dict:
+        """JSON으로 저장 가능한 열 형식 사전 (체크포인트용)"""
+        data = {
+            "speakers": list(self.speakers),
+            "codes": self.codes.tolist(),
+            "offsets": self.offsets.tolist(),
+            "buffer": self.buffer
+        }
+        if self.starts is not None:
+            data["starts"] = self.starts.tolist()
+            data["ends"] = self.ends.tolist()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "UtteranceStore":
+        """to_dict 결과로 저장소 복원"""
+        store = cls()
+        store.speakers = list(data["speakers"])
+        store._speaker_codes = {speaker: code for code, speaker in enumerate(store.speakers)}
+        store.codes = array('H', data["codes"])
+        store.offsets = array('q', data["offsets"])
+        store._buffer = data["buffer"]
+        if "starts" in data:
+            store.starts = array('q', data["starts"])
+            store.ends = array('q', data["ends"])
+        return store
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (UtteranceStore, UtteranceView, list, tuple)):
+            return len(self) == len(other) and all(a == tuple(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"UtteranceStore(발화 {len(self)}개, 화자 {len(self.speakers)}명)"
+
+class UtteranceView:
+    """UtteranceStore의 연속 구간 뷰 (청크 분할 시 복사 없이 사용)"""
+    def __init__(self, store: UtteranceStore, start: int, stop: int):
+        self.store = store
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return UtteranceView(self.store, self.start + start, self.start + max(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("발화 인덱스가 범위를 벗어났습니다")
+        return self.store[self.start + index]
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return self.store._iter_range(self.start, self.stop)
+
+    def times(self, index: int) -> Tuple[Optional[int], Optional[int]]:
+        return self.store.times(self.start + index)
+
+    def texts(self, include: Optional[Sequence[str]] = None,
+              exclude: Optional[Sequence[str]] = None) -> "SpeakerTextView":
+        return SpeakerTextView(self, include, exclude)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (UtteranceStore, UtteranceView, list, tuple)):
+            return len(self) == len(other) and all(a == tuple(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"UtteranceView([{self.start}:{self.stop}], 발화 {len(self)}개)"
+
+class SpeakerTextView:
+    """특정 화자(include) 또는 특정 화자를 제외한(exclude) 발화 텍스트의 지연 뷰"""
+    def __init__(self, view: UtteranceView, include: Optional[Sequence[str]] = None,
+                 exclude: Optional[Sequence[str]] = None):
+        self.view = view
+        self.include = tuple(include) if include is not None else None
+        self.exclude = tuple(exclude) if exclude is not None else ()
+
+    def _matches(self, speaker: str) -> bool:
+        if self.include is not None and speaker not in self.include:
+            return False
+        return speaker not in self.exclude
+
+    def __iter__(self) -> Iterator[str]:
+        for speaker, text in self.view:
+            if self._matches(speaker):
+                yield text
+
+    def __len__(self) -> int:
+        store = self.view.store
+        matching_codes = {code for code, name in enumerate(store.speakers) if self._matches(name)}
+        return sum(1 for code in store.codes[self.view.start:self.view.stop] if code in matching_codes)
+
+    def __bool__(self) -> bool:
+        return any(True for _ in self)
+
+    def __repr__(self) -> str:
+        return f"SpeakerTextView(발화 {len(self)}개)"
+
+def select_texts(conversations, include: Optional[Sequence[str]] = None,
+                 exclude: Optional[Sequence[str]] = None) -> Iterable[str]:
+    """대화(저장소/뷰/튜플 리스트)에서 화자 조건에 맞는 발화 텍스트"""
+    if isinstance(conversations, (UtteranceStore, UtteranceView)):
+        return conversations.texts(include, exclude)
+    return [
+        text for speaker, text in conversations
+        if (include is None or speaker in include) and speaker not in (exclude or ())
+    ]
@@ -0,0 +1,239 @@
+"""AssemblyAI transcript.json 단어 단위 메모리 맵 사이드카
+
+transcript.json(약 1.6MB)의 words/utterances를 열 단위 NumPy 배열과 문자열 테이블로
+하나의 바이너리 파일(transcript.words.bin)에 저장한다. 읽을 때는 헤더만 파싱하고 배열은
+np.memmap으로 매핑하므로, 시간 구간·발화 조회 시 전체 JSON을 파싱하지 않는다.
+
+파일 구조:
+    MAGIC(8바이트) | 헤더 길이(uint64) | 헤더(JSON: 화자 목록, 배열별 dtype/shape/offset) | 배열들
+    배열은 ALIGNMENT 바이트 경계에 정렬된다.
+
+사용법: python word_index.py <transcript.json | 리포트 디렉토리> [--force]
+"""
+from typing import Dict, List, Optional, Sequence
+import argparse
+import json
+import os
+import struct
+import numpy as np
+from blob_store import artifact_mtime, iter_artifacts, read_artifact
+
+MAGIC = b"TMWORD01"
+ALIGNMENT = 64
+SIDECAR_SUFFIX = ".words.bin"
+
+def sidecar_path(transcript_path: str) -> str:
+    """transcript.json → transcript.words.bin"""
+    return os.path.splitext(transcript_path)[0] + SIDECAR_SUFFIX
+
+def _string_table(texts: Sequence[str]):
+    """문자열 목록 → (UTF-8 바이트 배열, 시작 위치 배열(길이 n+1))"""
+    encoded = [(text or "").encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _utterance_word_ranges(utterances: List[Dict], word_starts: np.ndarray) -> np.ndarray:
+    """발화별 words 배열 구간 [시작, 끝)"""
+    counts = [len(utterance.get("words") or []) for utterance in utterances]
+    ranges = np.zeros((len(utterances), 2), dtype=np.int64)
+    if sum(counts) == len(word_starts):
+        # 최상위 words는 발화별 words를 이어 붙인 것과 같으므로 개수 누적으로 구간 계산
+        ends = np.cumsum(counts)
+        ranges[:, 0] = ends - counts
+        ranges[:, 1] = ends
+    else:
+        # 구조가 다르면 발화 시간 구간에 시작하는 단어로 계산
+        for index, utterance in enumerate(utterances):
+            ranges[index, 0] = np.searchsorted(word_starts, utterance.get("start") or 0, side="left")
+            ranges[index, 1] = np.searchsorted(word_starts, utterance.get("end") or 0, side="left")
+    return ranges
+
+def build_word_index(transcript_path: str, output_path: Optional[str] = None) -> str:
+    """transcript.json을 읽어 단어 사이드카 생성 후 경로 반환"""
+    transcript = json.loads(read_artifact(transcript_path).decode("utf-8-sig"))
+    words = transcript.get("words") or []
+    utterances = transcript.get("utterances") or []
+
+    speakers = sorted({item.get("speaker") for item in words + utterances if item.get("speaker") is not None})
+    speaker_codes = {speaker: code for code, speaker in enumerate(speakers)}
+
+    def speaker_column(items):
+        return np.array([speaker_codes.get(item.get("speaker"), -1) for item in items], dtype=np.int16)
+
+    word_starts = np.array([word.get("start") or 0 for word in words], dtype=np.int64)
+    word_text, word_text_offsets = _string_table([word.get("text") for word in words])
+    utterance_text, utterance_text_offsets = _string_table([utterance.get("text") for utterance in utterances])
+    arrays = {
+        "word_start": word_starts,
+        "word_end": np.array([word.get("end") or 0 for word in words], dtype=np.int64),
+        "word_confidence": np.array([word.get("confidence") or 0.0 for word in words], dtype=np.float32),
+        "word_speaker": speaker_column(words),
+        "word_text": word_text,
+        "word_text_offsets": word_text_offsets,
+        "utterance_start": np.array([utterance.get("start") or 0 for utterance in utterances], dtype=np.int64),
+        "utterance_end": np.array([utterance.get("end") or 0 for utterance in utterances], dtype=np.int64),
+        "utterance_confidence": np.array(
+            [utterance.get("confidence") or 0.0 for utterance in utterances], dtype=np.float32
+        ),
+        "utterance_speaker": speaker_column(utterances),
+        "utterance_words": _utterance_word_ranges(utterances, word_starts),
+        "utterance_text": utterance_text,
+        "utterance_text_offsets": utterance_text_offsets,
+    }
+
+    # 배열 위치를 정한 뒤 헤더 작성 (헤더 길이가 배열 시작 위치에 영향을 주므로 고정점까지 반복)
+    header = {"speakers": speakers, "audio_duration": transcript.get("audio_duration"), "arrays": {}}
+    data_start = 0
+    while True:
+        offset = data_start
+        for name, array in arrays.items():
+            header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        needed = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+        if needed == data_start:
+            break
+        data_start = needed
+
+    output_path = output_path or sidecar_path(transcript_path)
+    tmp_path = f"{output_path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+            for name, array in arrays.items():
+                f.seek(header["arrays"][name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_path
+
+class WordIndex:
+    """단어 사이드카 읽기 (배열은 메모리 맵, 접근한 페이지만 읽음)"""
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"단어 사이드카 파일이 아닙니다: {path}")
+            header_length, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length).decode("utf-8"))
+        self.speakers: List[str] = header["speakers"]
+        self.audio_duration = header.get("audio_duration")
+        # 파일 전체를 한 번 매핑하고 배열은 그 위의 뷰로 사용
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        self._arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            nbytes = int(np.prod(spec["shape"])) * dtype.itemsize
+            view = self._map[spec["offset"]:spec["offset"] + nbytes].view(dtype)
+            self._arrays[name] = view.reshape(spec["shape"])
+
+    @classmethod
+    def for_transcript(cls, transcript_path: str, rebuild: bool = True) -> "WordIndex":
+        """transcript.json의 사이드카 열기 (없거나 오래됐으면 생성)"""
+        path = sidecar_path(transcript_path)
+        stale = not os.path.exists(path) or os.path.getmtime(path) < artifact_mtime(transcript_path)
+        if stale:
+            if not rebuild:
+                raise FileNotFoundError(f"단어 사이드카가 없거나 오래되었습니다: {path}")
+            build_word_index(transcript_path, path)
+        return cls(path)
+
+    def __len__(self) -> int:
+        return len(self._arrays["word_start"])
+
+    @property
+    def utterance_count(self) -> int:
+        return len(self._arrays["utterance_start"])
+
+    def _text(self, prefix: str, index: int) -> str:
+        offsets = self._arrays[f"{prefix}_text_offsets"]
+        return bytes(self._arrays[f"{prefix}_text"][offsets[index]:offsets[index + 1]]).decode("utf-8")
+
+    def _speaker(self, code: int) -> Optional[str]:
+        return self.speakers[code] if code >= 0 else None
+
+    def word(self, index: int) -> Dict:
+        arrays = self._arrays
+        return {
+            "text": self._text("word", index),
+            "start": int(arrays["word_start"][index]),
+            "end": int(arrays["word_end"][index]),
+            "confidence": float(arrays["word_confidence"][index]),
+            "speaker": self._speaker(int(arrays["word_speaker"][index]))
+        }
+
+    def word_range(self, start_ms: float, end_ms: float) -> range:
+        """[start_ms, end_ms) 구간과 겹치는 단어 번호 (시작 시각 기준 이진 탐색)"""
+        starts = self._arrays["word_start"]
+        first = int(np.searchsorted(starts, start_ms, side="left"))
+        # 구간 시작 전에 시작했지만 구간 안에서 끝나는 단어 포함
+        if first > 0 and self._arrays["word_end"][first - 1] > start_ms:
+            first -= 1
+        return range(first, int(np.searchsorted(starts, end_ms, side="left")))
+
+    def words_between(self, start_ms: float, end_ms: float) -> List[Dict]:
+        return [self.word(index) for index in self.word_range(start_ms, end_ms)]
+
+    def text_between(self, start_ms: float, end_ms: float) -> str:
+        return " ".join(self._text("word", index) for index in self.word_range(start_ms, end_ms))
+
+    def utterance(self, index: int, with_words: bool = False) -> Dict:
+        arrays = self._arrays
+        result = {
+            "speaker": self._speaker(int(arrays["utterance_speaker"][index])),
+            "text": self._text("utterance", index),
+            "confidence": float(arrays["utterance_confidence"][index]),
+            "start": int(arrays["utterance_start"][index]),
+            "end": int(arrays["utterance_end"][index])
+        }
+        if with_words:
+            first, stop = arrays["utterance_words"][index]
+            result["words"] = [self.word(word_index) for word_index in range(int(first), int(stop))]
+        return result
+
+    def utterance_at(self, time_ms: float) -> Optional[int]:
+        """해당 시각에 진행 중인 발화 번호 (없으면 None)"""
+        index = int(np.searchsorted(self._arrays["utterance_start"], time_ms, side="right")) - 1
+        if index >= 0 and self._arrays["utterance_end"][index] > time_ms:
+            return index
+        return None
+
+    def utterances_between(self, start_ms: float, end_ms: float) -> List[Dict]:
+        """구간과 겹치는 발화 목록"""
+        starts = self._arrays["utterance_start"]
+        ends = self._arrays["utterance_end"]
+        stop = int(np.searchsorted(starts, end_ms, side="left"))
+        first = int(np.searchsorted(ends[:stop], start_ms, side="right")) if stop else 0
+        return [self.utterance(index) for index in range(first, stop) if ends[index] > start_ms]
+
+def build_all(source: str, force: bool = False) -> List[str]:
+    """transcript.json 파일 또는 디렉토리 하위 전체의 사이드카 생성 (최신이면 건너뜀)"""
+    if os.path.isdir(source):
+        paths = sorted(iter_artifacts(source, "transcript.json"))
+    else:
+        paths = [source]
+    built = []
+    for path in paths:
+        target = sidecar_path(path)
+        if force or not os.path.exists(target) or os.path.getmtime(target) < artifact_mtime(path):
+            build_word_index(path, target)
+            built.append(target)
+    return built
+
+def main():
+    parser = argparse.ArgumentParser(description="transcript.json 단어 사이드카 생성")
+    parser.add_argument("source", help="transcript.json 또는 리포트 디렉토리")
+    parser.add_argument("--force", action="store_true", help="최신 사이드카도 다시 생성")
+    args = parser.parse_args()
+    built = build_all(args.source, args.force)
+    print(f"단어 사이드카 {len(built)}개 생성")
+
+if __name__ == "__main__":
+    main()